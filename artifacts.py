@@ -0,0 +1,323 @@
+# artifacts.py
+# Compact binary container for compiler artifacts (token stream and IR).
+#
+# File layout (all integers little-endian):
+#
+#   header   : magic "MLAR", version (u16), kind (u16), record_count (u32),
+#              string_count (u32), strings_offset (u64), records_offset (u64)
+#   strings  : (string_count + 1) u64 start offsets into the blob, then the
+#              UTF-8 blob itself. Every distinct string is stored once.
+#   records  : fixed-width records, padded to 4-byte alignment
+#              tokens → (type id, value index, line, col)            4 × u32
+#              IR     → (kind, dest, arg1, op, arg2)                 5 × u32
+#
+# Type ids, values and IR operands are indexes into the string table.
+# Readers mmap the file and decode a record only when it is accessed, so
+# tooling can jump to token 10_000_000 without loading the rest.
+# The .txt files remain available as an export view of these artifacts.
+
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b"MLAR"
+VERSION = 1
+
+KIND_TOKENS = 1
+KIND_IR = 2
+
+HEADER = struct.Struct("<4sHHIIQQ")
+OFFSET = struct.Struct("<Q")
+TOKEN_RECORD = struct.Struct("<IIII")
+IR_RECORD = struct.Struct("<IIIII")
+
+NONE = 0xFFFFFFFF   # "no operand" marker in IR records
+
+# IR instruction kinds
+IR_RAW = 0          # anything we do not recognise, stored verbatim in arg1
+IR_COPY = 1         # dest = arg1
+IR_BINARY = 2       # dest = arg1 op arg2
+IR_LABEL = 3        # dest:
+IR_GOTO = 4         # GOTO dest
+IR_IF = 5           # IF arg1 GOTO dest
+IR_RETURN = 6       # RETURN [arg1]
+
+
+# -----------------------
+# String table
+# -----------------------
+class StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, s):
+        # Return the index of s, storing it on first sight
+        idx = self.index.get(s)
+        if idx is None:
+            idx = len(self.strings)
+            self.index[s] = idx
+            self.strings.append(s)
+        return idx
+
+    def to_bytes(self):
+        offsets = array("Q")
+        blob = bytearray()
+        for s in self.strings:
+            offsets.append(len(blob))
+            blob += s.encode("utf-8")
+        offsets.append(len(blob))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        return offsets.tobytes() + bytes(blob)
+
+
+def _pad4(n):
+    return (4 - n % 4) % 4
+
+
+def _write_container(path, kind, record_count, strings, records):
+    # records: array('I') holding the flattened fixed-width records
+    if sys.byteorder != "little":
+        records.byteswap()
+    string_bytes = strings.to_bytes()
+    strings_offset = HEADER.size
+    padding = _pad4(strings_offset + len(string_bytes))
+    records_offset = strings_offset + len(string_bytes) + padding
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, kind, record_count,
+            len(strings.strings), strings_offset, records_offset,
+        ))
+        f.write(string_bytes)
+        f.write(b"\0" * padding)
+        f.write(records.tobytes())
+
+
+# -----------------------
+# Writers
+# -----------------------
+def write_token_artifact(tokens_list, path="tokens.bin"):
+    """
+    Write a token stream (list of (type, value, line, col)) as a binary artifact.
+    """
+    strings = StringTable()
+    records = array("I")
+    for tok_type, tok_value, tok_line, tok_col in tokens_list:
+        records.extend((
+            strings.add(tok_type),
+            strings.add(str(tok_value)),
+            tok_line,
+            tok_col,
+        ))
+    _write_container(path, KIND_TOKENS, len(tokens_list), strings, records)
+
+
+def encode_ir_line(line):
+    """
+    Split an IR line into (kind, dest, arg1, op, arg2) strings.
+    Lines that do not survive a decode round trip are kept as IR_RAW.
+    """
+    parts = line.split()
+    fields = (IR_RAW, None, line, None, None)
+
+    if len(parts) == 1 and line.endswith(":"):
+        fields = (IR_LABEL, line[:-1], None, None, None)
+    elif len(parts) == 2 and parts[0] == "GOTO":
+        fields = (IR_GOTO, parts[1], None, None, None)
+    elif len(parts) >= 4 and parts[0] == "IF" and parts[-2] == "GOTO":
+        fields = (IR_IF, parts[-1], " ".join(parts[1:-2]), None, None)
+    elif parts and parts[0] == "RETURN" and len(parts) <= 2:
+        fields = (IR_RETURN, None, parts[1] if len(parts) == 2 else None, None, None)
+    elif len(parts) == 3 and parts[1] == "=":
+        fields = (IR_COPY, parts[0], parts[2], None, None)
+    elif len(parts) == 5 and parts[1] == "=":
+        fields = (IR_BINARY, parts[0], parts[2], parts[3], parts[4])
+
+    if decode_ir_fields(*fields) != line:
+        return (IR_RAW, None, line, None, None)
+    return fields
+
+
+def decode_ir_fields(kind, dest, arg1, op, arg2):
+    # Inverse of encode_ir_line: rebuild the textual IR instruction
+    if kind == IR_COPY:
+        return f"{dest} = {arg1}"
+    if kind == IR_BINARY:
+        return f"{dest} = {arg1} {op} {arg2}"
+    if kind == IR_LABEL:
+        return f"{dest}:"
+    if kind == IR_GOTO:
+        return f"GOTO {dest}"
+    if kind == IR_IF:
+        return f"IF {arg1} GOTO {dest}"
+    if kind == IR_RETURN:
+        return f"RETURN {arg1}" if arg1 is not None else "RETURN"
+    return arg1
+
+
+def write_ir_artifact(ir_lines, path="ir.bin"):
+    """
+    Write a list of IR instruction strings as a binary artifact.
+    """
+    strings = StringTable()
+    records = array("I")
+    for line in ir_lines:
+        kind, *operands = encode_ir_line(line)
+        records.append(kind)
+        records.extend(NONE if o is None else strings.add(o) for o in operands)
+    _write_container(path, KIND_IR, len(ir_lines), strings, records)
+
+
+# -----------------------
+# Readers
+# -----------------------
+class ArtifactReader:
+    """
+    Random-access reader over a binary artifact. The file is mmapped and
+    records are decoded on demand; nothing is loaded up front.
+    """
+    kind = None
+    record = None
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, version, kind, self.record_count, self.string_count,
+         self.strings_offset, self.records_offset) = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            self.close()
+            raise Exception(f"Artifact Error: '{path}' is not a MiniLang artifact")
+        if version != VERSION:
+            self.close()
+            raise Exception(f"Artifact Error: '{path}' has unsupported version {version}")
+        if self.kind is not None and kind != self.kind:
+            self.close()
+            raise Exception(f"Artifact Error: '{path}' holds artifact kind {kind}, expected {self.kind}")
+
+        self.blob_offset = self.strings_offset + OFFSET.size * (self.string_count + 1)
+        self._strings = {}
+
+    def string(self, idx):
+        """Return string number idx from the string table (cached after first use)."""
+        s = self._strings.get(idx)
+        if s is None:
+            if not 0 <= idx < self.string_count:
+                raise IndexError(f"string index {idx} out of range")
+            pos = self.strings_offset + OFFSET.size * idx
+            start = OFFSET.unpack_from(self._view, pos)[0]
+            end = OFFSET.unpack_from(self._view, pos + OFFSET.size)[0]
+            s = str(self._view[self.blob_offset + start:self.blob_offset + end], "utf-8")
+            self._strings[idx] = s
+        return s
+
+    def raw_record(self, i):
+        """Return record i as a tuple of integers, without resolving strings."""
+        if i < 0:
+            i += self.record_count
+        if not 0 <= i < self.record_count:
+            raise IndexError(f"record index {i} out of range")
+        return self.record.unpack_from(self._view, self.records_offset + i * self.record.size)
+
+    def __len__(self):
+        return self.record_count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.record_count))]
+        return self.decode(self.raw_record(i))
+
+    def __iter__(self):
+        for i in range(self.record_count):
+            yield self.decode(self.raw_record(i))
+
+    def decode(self, rec):
+        raise NotImplementedError
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TokenArtifactReader(ArtifactReader):
+    kind = KIND_TOKENS
+    record = TOKEN_RECORD
+
+    def decode(self, rec):
+        # Same shape as tokenize(): (type, value, line, col)
+        type_idx, value_idx, line, col = rec
+        return (self.string(type_idx), self.string(value_idx), line, col)
+
+
+class IRArtifactReader(ArtifactReader):
+    kind = KIND_IR
+    record = IR_RECORD
+
+    def decode(self, rec):
+        kind, *operands = rec
+        return decode_ir_fields(kind, *(None if o == NONE else self.string(o) for o in operands))
+
+
+# -----------------------
+# Text export views
+# -----------------------
+def export_tokens_text(bin_path, txt_path):
+    # Same format compiler.py writes to tokens.txt
+    with TokenArtifactReader(bin_path) as reader, open(txt_path, "w") as f:
+        f.writelines(
+            f"<{line}, {col}> <{tok_type}, {value}>\n"
+            for tok_type, value, line, col in reader
+        )
+
+
+def export_ir_text(bin_path, txt_path):
+    with IRArtifactReader(bin_path) as reader, open(txt_path, "w") as f:
+        f.writelines(line + "\n" for line in reader)
+
+
+def open_artifact(path):
+    """Open a binary artifact with the reader matching its kind."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        raise Exception(f"Artifact Error: '{path}' is not a MiniLang artifact")
+    kind = HEADER.unpack(header)[2]
+    if kind == KIND_TOKENS:
+        return TokenArtifactReader(path)
+    if kind == KIND_IR:
+        return IRArtifactReader(path)
+    raise Exception(f"Artifact Error: '{path}' has unknown artifact kind {kind}")
+
+
+def is_artifact(path):
+    # True when the file starts with the artifact magic number
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == MAGIC
+    except OSError:
+        return False
+
+
+# Export a binary artifact to its text view:
+#   python artifacts.py tokens.bin tokens.txt
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python artifacts.py <artifact.bin> <output.txt>")
+        sys.exit(2)
+    with open_artifact(sys.argv[1]) as reader:
+        exporter = export_tokens_text if reader.kind == KIND_TOKENS else export_ir_text
+    exporter(sys.argv[1], sys.argv[2])
+    print(f"{sys.argv[1]} exported to {sys.argv[2]}")
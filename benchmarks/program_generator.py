@@ -0,0 +1,210 @@
+# program_generator.py
+# Seeded generator for synthetic MiniLang (.mini) programs used by the
+# benchmark suite. Every program it emits is lexically and semantically
+# valid, and uses only what the front end lowers: all variables are
+# declared before they are used, and parentheses appear only in conditions.
+#
+# Shapes:
+#  - declarations  : many "int vN = K;" lines
+#  - nesting       : ifs with deeply parenthesised && / || conditions
+#  - straight_line : a few declarations followed by a long run of "a = b op c;"
+#  - comments      : straight-line code buried in // and /* */ comments
+#  - mixed         : a blend of all of the above
+#  - arrays        : indexed loads and stores on a few int arrays
+#  - branches      : if / else if / else with && / || / ! conditions
+
+import argparse
+import random
+
+SHAPES = ["declarations", "nesting", "straight_line", "comments", "mixed", "arrays", "branches"]
+OPERATORS = ["+", "-", "*", "/"]
+RELATIONAL = ["<", "<=", ">", ">=", "==", "!="]
+
+
+class ProgramGenerator:
+    def __init__(self, seed=0, nesting_depth=16, comment_ratio=3):
+        # Same seed + same arguments → same program, byte for byte
+        self.rng = random.Random(seed)
+        self.nesting_depth = nesting_depth
+        self.comment_ratio = comment_ratio
+        self.declared = []
+        self.arrays = {}
+        self.lines = []
+
+    # -----------------------
+    # Utility generators
+    # -----------------------
+    def new_var(self):
+        name = f"v{len(self.declared)}"
+        self.declared.append(name)
+        return name
+
+    def operand(self):
+        # Either a declared variable or a small non-zero literal
+        if self.declared and self.rng.random() < 0.7:
+            return self.rng.choice(self.declared)
+        return str(self.rng.randint(1, 99))
+
+    def comparison(self):
+        return f"{self.operand()} {self.rng.choice(RELATIONAL)} {self.operand()}"
+
+    def nested_condition(self, depth):
+        if depth == 0:
+            return self.comparison()
+        op = self.rng.choice(["&&", "||"])
+        if self.rng.random() < 0.5:
+            return f"({self.nested_condition(depth - 1)} {op} {self.comparison()})"
+        return f"({self.comparison()} {op} {self.nested_condition(depth - 1)})"
+
+    def comment(self):
+        if self.rng.random() < 0.5:
+            return f"// note {self.rng.randint(0, 10**6)}: x = y + z;"
+        return (
+            f"/* block comment {self.rng.randint(0, 10**6)}\n"
+            f"       int ignored = 1; */"
+        )
+
+    # -----------------------
+    # Statement emitters
+    # -----------------------
+    def emit(self, line):
+        self.lines.append("    " + line)
+
+    def emit_declaration(self):
+        value = self.rng.randint(0, 1000)
+        self.emit(f"int {self.new_var()} = {value};")
+
+    def emit_binary(self):
+        lhs = self.rng.choice(self.declared)
+        op = self.rng.choice(OPERATORS)
+        self.emit(f"{lhs} = {self.operand()} {op} {self.operand()};")
+
+    def emit_nested(self):
+        self.emit(f"if ({self.nested_condition(self.nesting_depth)}) {{")
+        self.emit_body()
+        self.emit("}")
+
+    def emit_array_declaration(self):
+        name = f"arr{len(self.arrays)}"
+        self.arrays[name] = self.rng.choice([8, 64, 256])
+        self.emit(f"int {name}[{self.arrays[name]}];")
+
+    def element(self):
+        # a[3] or a[v7]: literal indices stay in range, variables are checked at run time
+        name = self.rng.choice(list(self.arrays))
+        if self.rng.random() < 0.5:
+            return f"{name}[{self.rng.randint(0, self.arrays[name] - 1)}]"
+        return f"{name}[{self.rng.choice(self.declared)}]"
+
+    def emit_array_store(self):
+        op = self.rng.choice(OPERATORS)
+        self.emit(f"{self.element()} = {self.operand()} {op} {self.operand()};")
+
+    def emit_array_load(self):
+        lhs = self.rng.choice(self.declared)
+        if self.rng.random() < 0.5:
+            self.emit(f"{lhs} = {self.element()};")
+        else:
+            op = self.rng.choice(OPERATORS)
+            self.emit(f"{lhs} = {self.element()} {op} {self.operand()};")
+
+    def condition(self, depth=2):
+        # a < b, joined with && / || and sometimes negated
+        if depth == 0 or self.rng.random() < 0.4:
+            return self.comparison()
+        x = self.rng.random()
+        if x < 0.45:
+            return f"{self.condition(depth - 1)} && {self.condition(depth - 1)}"
+        if x < 0.9:
+            return f"{self.condition(depth - 1)} || {self.condition(depth - 1)}"
+        return f"!({self.condition(depth - 1)})"
+
+    def emit_body(self):
+        self.emit_binary()
+        self.lines[-1] = "    " + self.lines[-1]
+
+    def emit_branch(self):
+        # if (...) { x = ...; } [else if (...) { ... }] [else { ... }]
+        self.emit(f"if ({self.condition()}) {{")
+        self.emit_body()
+        if self.rng.random() < 0.3:
+            self.emit(f"}} else if ({self.condition()}) {{")
+            self.emit_body()
+        if self.rng.random() < 0.5:
+            self.emit("} else {")
+            self.emit_body()
+        self.emit("}")
+
+    def emit_commented(self):
+        for _ in range(self.comment_ratio):
+            self.emit(self.comment())
+        self.emit_binary()
+
+    # -----------------------
+    # Program builder
+    # -----------------------
+    def generate(self, shape="mixed", size=100):
+        """
+        Build a program of `size` statements with the given shape.
+        Returns the program source as a string.
+        """
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape '{shape}'. Expected one of {SHAPES}")
+
+        self.declared = []
+        self.arrays = {}
+        self.lines = []
+
+        if shape == "declarations":
+            for _ in range(size):
+                self.emit_declaration()
+        else:
+            # A small pool of variables for the statements to work on
+            pool = max(1, min(size // 10, 50))
+            for _ in range(pool):
+                self.emit_declaration()
+            if shape == "arrays":
+                for _ in range(3):
+                    self.emit_array_declaration()
+
+            emitters = {
+                "nesting": [self.emit_nested],
+                "straight_line": [self.emit_binary],
+                "comments": [self.emit_commented],
+                "mixed": [
+                    self.emit_declaration,
+                    self.emit_binary,
+                    self.emit_nested,
+                    self.emit_commented,
+                ],
+                "arrays": [self.emit_array_store, self.emit_array_load],
+                "branches": [self.emit_branch, self.emit_binary],
+            }[shape]
+
+            for _ in range(size - pool):
+                self.rng.choice(emitters)()
+
+        body = "\n".join(self.lines)
+        return f"int main() {{\n{body}\n    return {self.declared[-1]};\n}}\n"
+
+
+def generate_program(shape="mixed", size=100, seed=0, **options):
+    # Convenience wrapper around ProgramGenerator
+    return ProgramGenerator(seed=seed, **options).generate(shape, size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic MiniLang program.")
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--size", type=int, default=100, help="number of statements")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=16, help="condition nesting depth")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    args = parser.parse_args()
+
+    program = generate_program(args.shape, args.size, args.seed, nesting_depth=args.depth)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(program)
+    else:
+        print(program, end="")
@@ -0,0 +1,248 @@
+# run_benchmarks.py
+# Times every compiler phase on synthetic programs of increasing size and
+# writes the results as JSON. Every program's target code also gets a
+# static performance estimate (perf_estimator.py), so code quality is
+# tracked next to compile time. When a baseline is given, each phase and
+# the loop-weighted cycle estimate are compared against it and the run
+# fails (exit code 1) on regressions.
+#
+# Wall-clock speed drifts on shared machines (1.5x within a minute is not
+# unusual), so every pipeline run is bracketed by a fixed reference loop and
+# phases are compared as multiples of that loop, not as raw seconds. Even
+# then single phases of the same code vary by up to ~1.8x between runs on a
+# busy VM, so the default gate only fails on a 2x slowdown (the algorithmic
+# regressions it exists to catch); use --threshold on a quiet machine. The
+# cycle estimate is deterministic and gated exactly.
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                       # run + compare with baseline.json
+#   python benchmarks/run_benchmarks.py --save-baseline       # record a new baseline
+#   python benchmarks/run_benchmarks.py --sizes 100,1000 --shapes mixed -o results.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from program_generator import SHAPES, generate_program
+from compiler import compile_source
+from perf_estimator import PerformanceEstimator
+from resource_governor import ResourceGovernor
+
+PHASES = ["tokenize", "semantic", "ir", "optimize", "allocate", "target", "schedule"]
+# compile_source phase → benchmark phase (baselines call lexing "tokenize")
+PHASE_NAMES = {"lex": "tokenize"}
+ESTIMATES = ["cycles", "weighted_cycles", "spills", "register_pressure"]
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+REFERENCE_ITERATIONS = 200_000
+
+
+# ---------------- MACHINE SPEED ----------------
+def reference_loop(runs=5):
+    """
+    Best-of-`runs` time of a fixed pure-Python loop. Phase times divided by
+    this are comparable across runs even when the machine speed drifts.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        total = 0
+        for k in range(REFERENCE_ITERATIONS):
+            total += k
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ---------------- PHASE TIMING ----------------
+def time_pipeline(code):
+    """
+    Run the whole pipeline once on `code`, timed per phase by the governor.
+    Returns ({phase: seconds}, scheduled target code).
+    """
+    governor = ResourceGovernor()
+    result = compile_source(code, governor=governor)
+    timings = {PHASE_NAMES.get(p["phase"], p["phase"]): p["seconds"] for p in governor.phases}
+    return timings, result["target_code"]
+
+
+def run_benchmarks(shapes, sizes, repeat, seed):
+    """
+    Time every (shape, size) combination, keeping the best of `repeat` runs
+    per phase (the minimum is the least noisy estimate). Each run is also
+    divided by the reference loop timed around it; the best of those ratios
+    is kept as "relative". The performance estimate is deterministic, so it
+    is taken once per program.
+    Returns a list of result records.
+    """
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            code = generate_program(shape, size, seed)
+            best = {phase: float("inf") for phase in PHASES}
+            relative = {phase: float("inf") for phase in PHASES}
+            calibration = float("inf")
+            for _ in range(repeat):
+                before = reference_loop()
+                timings, target_code = time_pipeline(code)
+                unit = min(before, reference_loop())
+                calibration = min(calibration, unit)
+                for phase, seconds in timings.items():
+                    best[phase] = min(best[phase], seconds)
+                    relative[phase] = min(relative[phase], seconds / unit)
+            best["total"] = sum(best[phase] for phase in PHASES)
+            totals = PerformanceEstimator(target_code).estimate()["totals"]
+            results.append({
+                "shape": shape,
+                "size": size,
+                "source_bytes": len(code),
+                "seconds": best,
+                "relative": relative,
+                "calibration": calibration,
+                "estimate": {key: totals[key] for key in ESTIMATES},
+            })
+            print(
+                f"{shape:<14} {size:>7}  total {best['total'] * 1000:9.2f} ms"
+                f"  est. {totals['weighted_cycles']:>10} cycles"
+            )
+    return results
+
+
+# ---------------- BASELINE COMPARISON ----------------
+def compare(results, baseline, threshold, min_delta, cycle_threshold=0.0):
+    """
+    Compare results against a baseline report.
+    A phase regresses when it is more than `threshold` (relative) slower
+    AND more than `min_delta` seconds slower, which filters timer noise.
+    When both records carry reference-loop ratios, those are compared
+    (scaled to seconds at the current machine speed) instead of raw times.
+    The generated code regresses when its loop-weighted cycle estimate
+    grows by more than `cycle_threshold` (relative; the estimate has no noise).
+    Returns a list of regression records.
+    """
+    reference = {(r["shape"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old_result = reference.get((r["shape"], r["size"]))
+        if old_result is None:
+            continue
+
+        # Baselines recorded before the estimator existed have no estimate
+        old_estimate = old_result.get("estimate")
+        if old_estimate:
+            before = old_estimate["weighted_cycles"]
+            current = r["estimate"]["weighted_cycles"]
+            if before and current > before * (1 + cycle_threshold):
+                regressions.append({
+                    "shape": r["shape"],
+                    "size": r["size"],
+                    "metric": "weighted_cycles",
+                    "baseline": before,
+                    "current": current,
+                    "ratio": current / before,
+                })
+
+        old, new = old_result["seconds"], r["seconds"]
+        if "relative" in old_result and "relative" in r:
+            unit = r["calibration"]
+            old = {p: t * unit for p, t in old_result["relative"].items()}
+            new = {p: t * unit for p, t in r["relative"].items()}
+        # Only phases both runs measured; "total" is recomputed over them so
+        # adding a new phase does not show up as a regression.
+        common = [p for p in PHASES if p in old and p in new]
+        current = {p: new[p] for p in common}
+        current["total"] = sum(current.values())
+        previous = {p: old[p] for p in common}
+        previous["total"] = sum(previous.values())
+        for phase, seconds in current.items():
+            before = previous[phase]
+            if not before:
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > min_delta:
+                regressions.append({
+                    "shape": r["shape"],
+                    "size": r["size"],
+                    "phase": phase,
+                    "baseline": before,
+                    "current": seconds,
+                    "ratio": seconds / before,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MiniLang compiler phases.")
+    parser.add_argument("--shapes", default=",".join(SHAPES),
+                        help="comma-separated program shapes")
+    parser.add_argument("--sizes", default="100,1000,5000",
+                        help="comma-separated statement counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=1.0,
+                        help="allowed relative slowdown per phase (1.0 = 2x)")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--cycle-threshold", type=float, default=0.0,
+                        help="allowed relative growth of the estimated loop-weighted cycles")
+    args = parser.parse_args()
+
+    shapes = [s for s in args.shapes.split(",") if s]
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    results = run_benchmarks(shapes, sizes, args.repeat, args.seed)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta,
+                              args.cycle_threshold)
+        report["baseline"] = args.baseline
+        report["threshold"] = args.threshold
+    report["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    for r in regressions:
+        if "metric" in r:
+            change = f"{r['baseline']} -> {r['current']} estimated cycles"
+            what = r["metric"]
+        else:
+            change = f"{r['baseline'] * 1000:.2f} ms -> {r['current'] * 1000:.2f} ms"
+            what = r["phase"]
+        print(
+            f"REGRESSION {r['shape']}/{r['size']} {what}: {change} ({r['ratio']:.2f}x)",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# stress_concurrent.py
+# Compiles many synthetic programs on a thread pool with compile_source()
+# and checks every result against a sequential compile of the same
+# program. Any shared state between compiles (e.g. a lexer whose line
+# counter keeps running, or errors collected into the wrong list) shows
+# up as a mismatch. Every mismatch is reported; the exit code is 1 if
+# there was any. tests/test_concurrent_compile.py runs a small version.
+#
+# Usage:
+#   python benchmarks/stress_concurrent.py
+#   python benchmarks/stress_concurrent.py --workers 16 --programs 64 --rounds 5
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from program_generator import SHAPES, generate_program
+from compiler import compile_source, PIPELINE_OBJECTS
+
+
+def make_programs(count, size, seed):
+    """
+    `count` programs cycling through every shape, each with its own seed.
+    Every third program gets an illegal character so that lexical errors
+    are exercised too.
+    """
+    programs = []
+    for n in range(count):
+        code = generate_program(SHAPES[n % len(SHAPES)], size, seed + n)
+        if n % 3 == 0:
+            code = code.replace("\n", f"\n    @{n}\n", 1)
+        programs.append(code)
+    return programs
+
+
+def check(n, expected, result):
+    """Describe the first difference between two compile results, or return None."""
+    for key, value in expected.items():
+        if key not in PIPELINE_OBJECTS and result[key] != value:
+            return f"'{key}' differs"
+    # Line numbers restart for every compile: "int main() {" is on line 1
+    if result["tokens"][0][2] != 1:
+        return f"first token on line {result['tokens'][0][2]}, expected 1"
+    errors = 1 if n % 3 == 0 else 0
+    if len(result["lexical_errors"]) != errors:
+        return f"{len(result['lexical_errors'])} lexical errors, expected {errors}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent compile_source stress test.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--programs", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--size", type=int, default=200, help="statements per program")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    programs = make_programs(args.programs, args.size, args.seed)
+
+    start = time.perf_counter()
+    expected = [compile_source(code) for code in programs]
+    sequential = time.perf_counter() - start
+
+    failures = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for round_no in range(1, args.rounds + 1):
+            # Every program several times per round, interleaved across threads
+            jobs = list(range(len(programs))) * 2
+            results = pool.map(lambda n: (n, compile_source(programs[n])), jobs)
+            for n, result in results:
+                problem = check(n, expected[n], result)
+                if problem:
+                    failures += 1
+                    print(f"MISMATCH round {round_no} program {n}: {problem}", file=sys.stderr)
+    concurrent = time.perf_counter() - start
+
+    compiles = args.rounds * len(programs) * 2
+    print(f"{len(programs)} programs, {compiles} concurrent compiles on {args.workers} threads")
+    print(f"sequential: {sequential * 1000:.1f} ms for {len(programs)} compiles")
+    print(f"concurrent: {concurrent * 1000:.1f} ms for {compiles} compiles")
+    print("OK" if not failures else f"{failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
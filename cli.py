@@ -1,4 +1,340 @@
+import argparse
 import os
+import re
+import struct
+import sys
+from array import array
+from collections import deque
+
+from artifacts import is_artifact, open_artifact, TokenArtifactReader
+from xref_index import XrefIndex, KINDS
+
+# Subcommand → (default file, title)
+ARTIFACTS = {
+    "tokens": ("tokens.txt", "TOKEN STREAM"),
+    "symbols": ("symbol_table.txt", "SYMBOL TABLE"),
+    "stats": ("token_stats.txt", "TOKEN STATISTICS"),
+    "source": ("clean_source.mini", "CLEANED SOURCE CODE"),
+    "errors": ("lexical_errors.txt", "LEXICAL ERRORS"),
+    "semantic": ("semantic_analysis.txt", "SEMANTIC ANALYSIS"),
+    "ir": ("ir.txt", "INTERMEDIATE CODE"),
+    "optimized": ("optimized_ir.txt", "OPTIMIZED IR"),
+    "target": ("target_code.txt", "TARGET CODE"),
+}
+
+# Binary artifacts used when the text file is missing
+BINARY_FALLBACK = {
+    "tokens": "tokens.bin",
+    "ir": "ir.bin",
+    "optimized": "optimized_ir.bin",
+}
+
+# Exit codes (grep-style)
+EXIT_OK = 0          # at least one line shown
+EXIT_NO_MATCH = 1    # nothing selected
+EXIT_ERROR = 2       # missing file, bad arguments
+
+INDEX_HEADER = struct.Struct("<4sQQ")   # magic, file size, mtime_ns
+INDEX_MAGIC = b"MLIX"
+CHUNK = 1 << 20
+
+
+# -----------------------
+# Line sources
+# -----------------------
+class TextSource:
+    """
+    Streams a text artifact line by line. Random access (tail, range) uses
+    an index of line start offsets, built on first use and cached next to
+    the file as <file>.idx until the file changes.
+    """
+
+    def __init__(self, path, use_index=True):
+        self.path = path
+        self.use_index = use_index
+        self._offsets = None
+
+    def _index_path(self):
+        return self.path + ".idx"
+
+    def _load_index(self, st):
+        try:
+            with open(self._index_path(), "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                if len(header) < INDEX_HEADER.size:
+                    return None
+                magic, size, mtime = INDEX_HEADER.unpack(header)
+                if magic != INDEX_MAGIC or size != st.st_size or mtime != st.st_mtime_ns:
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                return offsets
+        except OSError:
+            return None
+
+    def _build_index(self, st):
+        # One pass over the file in 1 MiB chunks, recording where lines start
+        offsets = array("Q")
+        pos = 0
+        pending = True   # a line starts at the current position
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK)
+                if not chunk:
+                    break
+                if pending:
+                    offsets.append(pos)
+                    pending = False
+                i = chunk.find(b"\n")
+                while i != -1:
+                    if i + 1 < len(chunk):
+                        offsets.append(pos + i + 1)
+                    else:
+                        pending = True
+                    i = chunk.find(b"\n", i + 1)
+                pos += len(chunk)
+        try:
+            data = array("Q", offsets)
+            if sys.byteorder != "little":
+                data.byteswap()
+            with open(self._index_path(), "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, st.st_size, st.st_mtime_ns))
+                f.write(data.tobytes())
+        except OSError:
+            pass  # read-only location: keep the index in memory only
+        return offsets
+
+    def offsets(self):
+        if self._offsets is None:
+            st = os.stat(self.path)
+            self._offsets = (self.use_index and self._load_index(st)) or self._build_index(st)
+        return self._offsets
+
+    def count(self):
+        return len(self.offsets())
+
+    def lines(self, start=1, stop=None):
+        """Yield (line number, text) for lines start..stop (1-based, inclusive)."""
+        offset = 0
+        if start > 1:
+            offs = self.offsets()
+            if start > len(offs):
+                return
+            offset = offs[start - 1]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            lineno = start
+            for raw in f:
+                if stop is not None and lineno > stop:
+                    break
+                yield lineno, raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                lineno += 1
+
+
+class ArtifactSource:
+    """Line view over a binary artifact (tokens.bin / ir.bin); records are read by index."""
+
+    def __init__(self, path):
+        self.reader = open_artifact(path)
+
+    def count(self):
+        return len(self.reader)
+
+    def format(self, record):
+        if isinstance(self.reader, TokenArtifactReader):
+            tok_type, value, line, col = record
+            return f"<{line}, {col}> <{tok_type}, {value}>"
+        return record
+
+    def lines(self, start=1, stop=None):
+        stop = self.count() if stop is None else min(stop, self.count())
+        for i in range(start, stop + 1):
+            yield i, self.format(self.reader[i - 1])
+
+    def close(self):
+        self.reader.close()
+
+
+def open_source(path, use_index=True):
+    if is_artifact(path):
+        return ArtifactSource(path)
+    return TextSource(path, use_index)
+
+
+# -----------------------
+# Selection
+# -----------------------
+def parse_range(text):
+    """'10:20' → (10, 20); '10:' → (10, None); ':20' → (1, 20)."""
+    m = re.fullmatch(r"(\d*):(\d*)", text)
+    if not m:
+        raise argparse.ArgumentTypeError(f"invalid range '{text}', expected START:END")
+    start = int(m.group(1)) if m.group(1) else 1
+    stop = int(m.group(2)) if m.group(2) else None
+    if start < 1 or (stop is not None and stop < start):
+        raise argparse.ArgumentTypeError(f"invalid range '{text}'")
+    return start, stop
+
+
+def line_count(text):
+    """'20' → 20; negative counts are a usage error."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid line count '{text}'")
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"invalid line count '{text}', expected N >= 0")
+    return value
+
+
+def select_lines(source, args):
+    """
+    Apply --range, then --grep, then --head/--tail.
+    Yields (line number, text).
+    """
+    start, stop = args.range or (1, None)
+    pattern = None
+    if args.grep:
+        pattern = re.compile(args.grep, re.IGNORECASE if args.ignore_case else 0)
+
+    # --tail without a filter: jump straight to the last lines
+    if args.tail is not None and pattern is None:
+        last = source.count() if stop is None else min(stop, source.count())
+        first = max(start, last - args.tail + 1)
+        if args.tail > 0 and first <= last:
+            yield from source.lines(first, last)
+        return
+
+    selected = source.lines(start, stop)
+    if pattern is not None:
+        selected = (
+            (n, text) for n, text in selected
+            if bool(pattern.search(text)) != args.invert_match
+        )
+
+    if args.tail is not None:
+        yield from deque(selected, maxlen=args.tail)
+    elif args.head is not None:
+        for i, item in enumerate(selected):
+            if i >= args.head:
+                break
+            yield item
+    else:
+        yield from selected
+
+
+def page_break(args):
+    # Wait for the user between pages; only when talking to a terminal
+    if not (args.page and sys.stdout.isatty() and sys.stdin.isatty()):
+        return True
+    reply = input("-- more (Enter to continue, q to quit) --")
+    return reply.strip().lower() != "q"
+
+
+def view(args):
+    default_file, _ = ARTIFACTS[args.command]
+    path = args.file or default_file
+    if args.file is None and not os.path.exists(path):
+        fallback = BINARY_FALLBACK.get(args.command)
+        if fallback and os.path.exists(fallback):
+            path = fallback
+    if not os.path.exists(path):
+        print(f"cli: {path}: file not found", file=sys.stderr)
+        return EXIT_ERROR
+    if args.grep:
+        # select_lines compiles it lazily, outside the error handling below
+        try:
+            re.compile(args.grep, re.IGNORECASE if args.ignore_case else 0)
+        except re.error as e:
+            print(f"cli: invalid --grep pattern '{args.grep}': {e}", file=sys.stderr)
+            return EXIT_ERROR
+
+    try:
+        source = open_source(path, use_index=not args.no_index)
+    except Exception as e:
+        print(f"cli: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    shown = 0
+    try:
+        for lineno, text in select_lines(source, args):
+            shown += 1
+            if not args.count:
+                print(f"{lineno}:{text}" if args.line_numbers else text)
+                if args.page and shown % args.page == 0 and not page_break(args):
+                    break
+        if args.count:
+            print(shown)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Downstream closed the pipe (e.g. `| head`); not an error
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        if isinstance(source, ArtifactSource):
+            source.close()
+
+    return EXIT_OK if shown else EXIT_NO_MATCH
+
+
+def xref(args):
+    """Where is a name declared / assigned / read, or what does a statement touch."""
+    path = args.file or "xref.json"
+    if not os.path.exists(path):
+        print(f"cli: {path}: file not found", file=sys.stderr)
+        return EXIT_ERROR
+    try:
+        index = XrefIndex.read(path)
+    except Exception as e:
+        print(f"cli: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    if args.stmt is not None:
+        refs = index.statement(args.stmt)
+    elif args.name:
+        refs = index.references(args.name, args.kind)
+    else:
+        print("cli: xref needs a NAME or --stmt", file=sys.stderr)
+        return EXIT_ERROR
+    if args.stmt is not None and args.kind:
+        refs = [r for r in refs if r[1] == args.kind]
+
+    for name, kind, line, col, stmt in refs:
+        print(f"{line}:{col}\t{kind}\t{name}\tstmt {stmt}")
+    return EXIT_OK if refs else EXIT_NO_MATCH
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="View MiniLang compiler artifacts. Run without arguments for the interactive menu.",
+    )
+    sub = parser.add_subparsers(dest="command")
+    for name, (filename, title) in ARTIFACTS.items():
+        p = sub.add_parser(name, help=f"{title.lower()} ({filename})")
+        p.add_argument("--file", help=f"read this file instead of {filename}")
+        where = p.add_mutually_exclusive_group()
+        where.add_argument("--head", type=line_count, metavar="N", help="first N selected lines")
+        where.add_argument("--tail", type=line_count, metavar="N", help="last N selected lines")
+        p.add_argument("--range", type=parse_range, metavar="START:END",
+                       help="only lines START..END (1-based, inclusive)")
+        p.add_argument("-g", "--grep", metavar="REGEX", help="only lines matching REGEX")
+        p.add_argument("-i", "--ignore-case", action="store_true")
+        p.add_argument("-v", "--invert-match", action="store_true",
+                       help="only lines NOT matching --grep")
+        p.add_argument("-c", "--count", action="store_true", help="print the number of selected lines")
+        p.add_argument("-n", "--line-numbers", action="store_true")
+        p.add_argument("--page", type=int, metavar="N", help="pause every N lines on a terminal")
+        p.add_argument("--no-index", action="store_true", help="rebuild the line index instead of using the cached one")
+
+    p = sub.add_parser("xref", help="declarations, definitions and uses of a name (xref.json)")
+    p.add_argument("name", nargs="?", help="variable to look up")
+    p.add_argument("--kind", choices=KINDS, help="only references of this kind")
+    p.add_argument("--stmt", type=int, metavar="ID", help="every reference in statement ID instead")
+    p.add_argument("--file", help="read this file instead of xref.json")
+    return parser
+
 
 def show_file(filename, title):
     """Helper to display file contents nicely."""
@@ -6,9 +342,22 @@ def show_file(filename, title):
     print(f" {title}")
     print("="*50)
     if os.path.exists(filename):
+        # Stream line by line; leading and trailing blank lines are dropped
+        empty = True
+        blank = 0
         with open(filename, "r") as f:
-            content = f.read().strip()
-            print(content if content else "[Empty File]")
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip():
+                    blank += 1
+                    continue
+                if not empty:
+                    print("\n" * blank, end="")
+                empty = False
+                blank = 0
+                print(line)
+        if empty:
+            print("[Empty File]")
     else:
         print("[File not found!]")
     print("="*50 + "\n")
@@ -25,7 +374,7 @@ def cli_menu():
         print("5. View Lexical Errors")
         print("6. View Semantic Analysis Report")
         print("0. Exit")
-        
+
         choice = input("Enter your choice: ")
 
         if choice == '1':
@@ -46,6 +395,18 @@ def cli_menu():
         else:
             print("Invalid choice. Please try again.")
 
-# Call CLI menu at the end
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        cli_menu()
+        return EXIT_OK
+    if args.command == "xref":
+        return xref(args)
+    return view(args)
+
+# Subcommand mode when arguments are given, interactive menu otherwise:
+#   python cli.py tokens --grep IDENTIFIER --head 20
+#   python cli.py ir --tail 50 -n
+#   python cli.py xref x --kind use
 if __name__ == "__main__":
-    cli_menu()
+    sys.exit(main())
@@ -9,7 +9,31 @@ class CodeGenerator:
     def generate_assignment(self, lhs, rhs):
         self.ir.append(f"{lhs} = {rhs}")
 
-    def write_output(self):
-        with open("ir.txt", "w") as f:
+    def generate_array(self, name, size):
+        self.ir.append(f"ARRAY {name}[{size}]")
+
+    def generate_bounds_check(self, index, size):
+        self.ir.append(f"BOUNDS_CHECK {index} {size}")
+
+    def generate_load(self, lhs, array, index):
+        self.ir.append(f"{lhs} = {array}[{index}]")
+
+    def generate_store(self, array, index, value):
+        self.ir.append(f"{array}[{index}] = {value}")
+
+    def generate_label(self, label):
+        self.ir.append(f"{label}:")
+
+    def generate_goto(self, label):
+        self.ir.append(f"GOTO {label}")
+
+    def generate_conditional_jump(self, cond, label):
+        self.ir.append(f"IF {cond} GOTO {label}")
+
+    def generate_return(self, value=None):
+        self.ir.append(f"RETURN {value}" if value is not None else "RETURN")
+
+    def write_output(self, filename="ir.txt"):
+        with open(filename, "w") as f:
             for line in self.ir:
                 f.write(line + "\n")
\ No newline at end of file
@@ -1,15 +1,25 @@
+import argparse
+import sys
 from collections import Counter
+from artifacts import write_token_artifact, write_ir_artifact, export_tokens_text
 from lexer import tokenize, token_patterns
 from semantic_analyzer import SemanticAnalyzer
 from code_generator import CodeGenerator
 from optimizer import CodeOptimizer
 from register_allocator import RegisterAllocator
 from target_codegen import TargetCodeGenerator
+from instruction_scheduler import InstructionScheduler, load_latencies
+from x86_backend import X86Backend, assemble
+from perf_estimator import PerformanceEstimator, DEFAULT_MACHINE, load_machine
+from control_flow import label_blocks, NEGATE
+from profile_guided import InstrumentedBuild, load_profile
+from resource_governor import ResourceGovernor, BudgetExceeded, CHECK_INTERVAL
 
 # ---------------- FILE PATHS ----------------
 input_file = "test.mini"
 tokens_file = "tokens.txt"
 symbol_table_file = "symbol_table.txt"
+xref_file = "xref.json"
 reg_file = "reg.txt"
 semantic_file = "semantic_analysis.txt"
 ir_file = "ir.txt"
@@ -17,31 +27,809 @@ python_file = "output.py"
 lexical_errors_file = "lexical_errors.txt"
 clean_source_file = "clean_source.mini"
 token_stats_file = "token_stats.txt"
+tokens_bin_file = "tokens.bin"
+ir_bin_file = "ir.bin"
+optimized_ir_bin_file = "optimized_ir.bin"
+asm_file = "output.s"
+native_file = "output_native"
+profile_file = "profile.json"
+performance_file = "performance.json"
+
+
+# ---------------- OPERANDS ----------------
+# Binary operators of return expressions (assignments take the same ones)
+BINARY_OPS = {"+", "-", "*", "/", "%"} | set(NEGATE)
+
+
+def parse_operand(tokens_list, pos, stop, where):
+    """
+    Parse an operand starting at token pos (but before stop):
+        operand  → variable | literal | a [ i ]
+    where: what is being parsed, for the error messages
+    Returns the index of the token after the operand.
+    """
+    line = tokens_list[pos - 1][2]
+    if pos >= stop or tokens_list[pos][0] not in (
+        "IDENTIFIER", "INTEGER_LITERAL", "FLOAT_LITERAL"
+    ):
+        found = tokens_list[pos][1] if pos < stop else f"end of {where}"
+        raise Exception(f"Syntax Error (line {line}): Expected an operand in {where}, got '{found}'.")
+    pos += 1
+    if pos < stop and tokens_list[pos][1] == "[":
+        # The index is a single variable or literal, as in assignments
+        if (
+            pos + 2 >= stop
+            or tokens_list[pos + 1][0] not in ("IDENTIFIER", "INTEGER_LITERAL")
+            or tokens_list[pos + 2][1] != "]"
+        ):
+            raise Exception(f"Syntax Error (line {line}): Array index in {where} must be a variable or an integer literal.")
+        pos += 3
+    return pos
+
+
+def parse_return(tokens_list, start, stop):
+    """
+    Parse the expression tokens_list[start:stop] of a return statement:
+        expr → [ operand [ binop operand ] ]
+    Returns (operands, operator): operands as token indexes, operator None
+    unless there are two of them.
+    """
+    where = "return statement"
+    if start == stop:
+        return [], None
+    operands = [start]
+    pos = parse_operand(tokens_list, start, stop, where)
+    operator = None
+    if pos < stop and tokens_list[pos][1] in BINARY_OPS:
+        operator = tokens_list[pos][1]
+        operands.append(pos + 1)
+        pos = parse_operand(tokens_list, pos + 1, stop, where)
+    if pos != stop:
+        line = tokens_list[start - 1][2]
+        raise Exception(
+            f"Syntax Error (line {line}): Unsupported return expression at '{tokens_list[pos][1]}'; "
+            f"return a variable, a literal, an array element or one binary operation."
+        )
+    return operands, operator
+
+
+# ---------------- CONDITIONS ----------------
+# Parentheses deeper than this in one condition are rejected; && and ||
+# chains of any length are fine (see parse_condition)
+MAX_CONDITION_DEPTH = 100
+
+
+def condition_end(tokens_list, i):
+    """
+    Index of the ')' closing the condition of the if at token i.
+    """
+    line = tokens_list[i][2]
+    if i + 1 >= len(tokens_list) or tokens_list[i + 1][1] != "(":
+        raise Exception(f"Syntax Error (line {line}): Expected '(' after 'if'.")
+    depth = 0
+    for j in range(i + 1, len(tokens_list)):
+        value = tokens_list[j][1]
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            depth -= 1
+            if depth == 0:
+                return j
+        elif value in ("{", "}", ";") or tokens_list[j][0] == "IF":
+            break
+    raise Exception(f"Syntax Error (line {line}): Unbalanced parentheses in if condition.")
+
+
+def parse_condition(tokens_list, start, stop):
+    """
+    Parse the condition tokens_list[start:stop] of an if statement.
+        cond     → and { || and }
+        and      → not { && not }
+        not      → ! not | ( cond ) | operand [ relop operand ]
+        operand  → variable | literal | a [ i ]
+    Returns a tree of tuples, operands given as token indexes:
+        ("or", [cond, ...])   ("and", [cond, ...])   ("not", cond)
+        ("rel", op, left, right)   ("value", operand)
+    Runs of the same operator become one list, so only parentheses nest.
+    """
+    pos = start
+    line = tokens_list[start - 1][2]
+    depth = 0
+
+    def peek():
+        return tokens_list[pos][1] if pos < stop else None
+
+    def expect(value):
+        nonlocal pos
+        if peek() != value:
+            found = peek() or "end of condition"
+            raise Exception(f"Syntax Error (line {line}): Expected '{value}' in if condition, got '{found}'.")
+        pos += 1
+
+    def operand():
+        nonlocal pos
+        j = pos
+        pos = parse_operand(tokens_list, pos, stop, "if condition")
+        return j
+
+    def chain(kind, parse_term, separator):
+        nonlocal pos
+        terms = []
+        while True:
+            term = parse_term()
+            # (a && b) && c is the same chain as a && b && c
+            terms.extend(term[1] if term[0] == kind else [term])
+            if peek() != separator:
+                break
+            pos += 1
+        return terms[0] if len(terms) == 1 else (kind, terms)
+
+    def parse_or():
+        return chain("or", parse_and, "||")
+
+    def parse_and():
+        return chain("and", parse_not, "&&")
+
+    def parse_not():
+        nonlocal pos, depth
+        nots = 0
+        while peek() == "!":
+            pos += 1
+            nots += 1
+        if peek() == "(":
+            depth += 1
+            if depth > MAX_CONDITION_DEPTH:
+                raise Exception(
+                    f"Syntax Error (line {line}): If condition nested more than "
+                    f"{MAX_CONDITION_DEPTH} parentheses deep."
+                )
+            pos += 1
+            cond = parse_or()
+            expect(")")
+            depth -= 1
+        else:
+            left = operand()
+            if peek() in NEGATE:
+                op = peek()
+                pos += 1
+                cond = ("rel", op, left, operand())
+            else:
+                cond = ("value", left)
+        # !!x is x
+        return ("not", cond) if nots % 2 else cond
 
-# ---------------- READ SOURCE ----------------
-with open(input_file, "r") as f:
-    code = f.read()
+    cond = parse_or()
+    if pos != stop:
+        raise Exception(f"Syntax Error (line {line}): Unexpected '{peek()}' in if condition.")
+    return cond
 
-# ---------------- LEXICAL ANALYSIS ----------------
-tokens_list, lexical_errors, clean_code = tokenize(code)
 
-with open(clean_source_file, "w") as f:
-    f.write(clean_code)
+def opens_block(tokens_list, j):
+    # The bodies of if and else are always blocks: { ... }
+    return j < len(tokens_list) and tokens_list[j][1] == "{"
 
-with open(lexical_errors_file, "w") as f:
-    if lexical_errors:
-        f.write("Lexical Errors:\n")
-        f.write("\n".join(lexical_errors))
-    else:
-        f.write("No lexical errors detected.\n")
 
-# ---------------- TOKEN STREAM & SYMBOL TABLE ----------------
-symbol_table = {}
+# ---------------- SEMANTIC ANALYSIS ----------------
+def semantic_analysis(tokens_list, governor=None):
+    """
+    Walk the token stream, declaring variables and checking assignments.
+    Every declaration, definition and use is recorded in analyzer.xref.
+    governor: optional ResourceGovernor, polled every CHECK_INTERVAL steps
+    Returns:
+        analyzer: SemanticAnalyzer holding the symbol table
+        semantic_errors: list of semantic error messages
+    """
+    analyzer = SemanticAnalyzer()
+    semantic_errors = []
+    stmt = 0        # statement id for the cross-reference index
+
+    def record_uses(start, stop):
+        # Every identifier in tokens_list[start:stop] is read
+        analyzer.xref.add_tokens(tokens_list, start, stop, "use", stmt)
+
+    i = 0
+    steps = 0
+    while i < len(tokens_list):
+
+        steps += 1
+        if governor is not None and steps % CHECK_INTERVAL == 0:
+            governor.check()
+
+        tok_type, tok_value, tok_line, _ = tokens_list[i]
+
+        # ---------------- STATEMENT BOUNDARIES ----------------
+        if tok_value == ";" and tok_type == "SYMBOL":
+            stmt += 1
+            i += 1
+            continue
+
+        # ---------------- IF CONDITIONS ----------------
+        # The condition counts as a statement of its own
+        if tok_type == "IF":
+            try:
+                j = condition_end(tokens_list, i)
+                parse_condition(tokens_list, i + 2, j)
+                if not opens_block(tokens_list, j + 1):
+                    raise Exception(f"Syntax Error (line {tok_line}): Expected '{{' after the if condition.")
+            except Exception as e:
+                semantic_errors.append(f"Line {tok_line}: {e}")
+                i += 1
+                continue
+            record_uses(i + 2, j)
+            for k in range(i + 2, j - 3):
+                if tokens_list[k + 1][1] == "[" and tokens_list[k + 3][1] == "]":
+                    try:
+                        analyzer.check_index(tokens_list[k][1], tokens_list[k + 2][1], tok_line)
+                    except Exception as e:
+                        semantic_errors.append(f"Line {tok_line}: {e}")
+            stmt += 1
+            i = j + 1
+            continue
+
+        # ---------------- ELSE ----------------
+        if tok_type == "ELSE":
+            if i == 0 or tokens_list[i - 1][1] != "}":
+                semantic_errors.append(
+                    f"Line {tok_line}: Syntax Error (line {tok_line}): 'else' without a matching 'if'."
+                )
+            elif not (
+                opens_block(tokens_list, i + 1)
+                or i + 1 < len(tokens_list) and tokens_list[i + 1][0] == "IF"
+            ):
+                semantic_errors.append(
+                    f"Line {tok_line}: Syntax Error (line {tok_line}): Expected '{{' or 'if' after 'else'."
+                )
+            i += 1
+            continue
+
+        # ---------------- RETURN ----------------
+        if tok_type == "RETURN":
+            j = i + 1
+            while j < len(tokens_list) and tokens_list[j][1] != ";":
+                j += 1
+            record_uses(i + 1, j)
+            try:
+                if j == len(tokens_list):
+                    raise Exception(f"Syntax Error (line {tok_line}): Expected ';' after return.")
+                operands, _ = parse_return(tokens_list, i + 1, j)
+                for k in operands:
+                    if tokens_list[k + 1][1] == "[":
+                        analyzer.check_index(tokens_list[k][1], tokens_list[k + 2][1], tok_line)
+            except Exception as e:
+                semantic_errors.append(f"Line {tok_line}: {e}")
+            i = j
+            continue
+
+        # ---------------- DECLARATIONS ----------------
+        if tok_type in ["INT", "FLOAT", "CHAR"] and i + 1 < len(tokens_list):
+            next_type, next_value, next_line, next_col = tokens_list[i + 1]
+
+            # Ignore function declaration like: int main()
+            if next_type == "IDENTIFIER":
+                # Check if next next token is '(' → function
+                if i + 2 < len(tokens_list) and tokens_list[i + 2][1] == "(":
+                    i += 1
+                    continue
+
+                # Array declaration: int a[10];
+                if i + 2 < len(tokens_list) and tokens_list[i + 2][1] == "[":
+                    try:
+                        if tok_type == "CHAR":
+                            raise Exception(
+                                f"Semantic Error (line {next_line}): Only int and float "
+                                f"arrays are supported ('{next_value}')."
+                            )
+                        if (
+                            i + 4 >= len(tokens_list)
+                            or tokens_list[i + 3][0] != "INTEGER_LITERAL"
+                            or tokens_list[i + 4][1] != "]"
+                        ):
+                            raise Exception(
+                                f"Semantic Error (line {next_line}): Size of array "
+                                f"'{next_value}' must be an integer constant."
+                            )
+                        analyzer.declare_array(
+                            next_value, tok_type.lower(), tokens_list[i + 3][1], next_line
+                        )
+                        analyzer.reference(next_value, "decl", next_line, next_col, stmt)
+                    except Exception as e:
+                        semantic_errors.append(f"Line {next_line}: {e}")
+                    i += 5
+                    continue
+
+                try:
+                    analyzer.declare(next_value, tok_type.lower(), next_line)
+                    analyzer.reference(next_value, "decl", next_line, next_col, stmt)
+                except Exception as e:
+                    semantic_errors.append(f"Line {next_line}: {e}")
+
+        # ---------------- ASSIGNMENTS ----------------
+        if tok_type == "OPERATOR" and tok_value == "=":
+
+            lhs = tokens_list[i - 1][1]
+
+            # Element assignment: a[i] = ...
+            target = None
+            if lhs == "]" and i >= 4 and tokens_list[i - 3][1] == "[":
+                target = (tokens_list[i - 4][1], tokens_list[i - 2][1])
+                _, _, def_line, def_col = tokens_list[i - 4]
+                analyzer.reference(target[0], "def", def_line, def_col, stmt)
+                record_uses(i - 2, i - 1)
+            elif tokens_list[i - 1][0] == "IDENTIFIER":
+                _, _, def_line, def_col = tokens_list[i - 1]
+                analyzer.reference(lhs, "def", def_line, def_col, stmt)
+
+            # Collect full RHS expression until ';'
+            expr_tokens = []
+            j = i + 1
+            while j < len(tokens_list) and tokens_list[j][1] != ";":
+                expr_tokens.append(tokens_list[j][1])
+                j += 1
+            record_uses(i + 1, j)
+
+            # Array reads in the expression: a [ i ]
+            for k in range(len(expr_tokens) - 3):
+                if expr_tokens[k + 1] == "[" and expr_tokens[k + 3] == "]":
+                    try:
+                        analyzer.check_index(expr_tokens[k], expr_tokens[k + 2], tok_line)
+                    except Exception as e:
+                        semantic_errors.append(f"Line {tok_line}: {e}")
+
+            expr_str = " ".join(expr_tokens)
+
+            # Determine type only if single literal
+            type_map = {
+                "INTEGER_LITERAL": "int",
+                "FLOAT_LITERAL": "float",
+                "CHAR_LITERAL": "char",
+                "STRING_LITERAL": "string",
+            }
+
+            rhs_type = (
+                type_map.get(tokens_list[i + 1][0])
+                if len(expr_tokens) == 1
+                else None
+            )
+
+            try:
+                if target:
+                    analyzer.assign_element(target[0], target[1], expr_str, rhs_type, tok_line)
+                else:
+                    analyzer.assign(lhs, expr_str, rhs_type, tok_line)
+            except Exception as e:
+                semantic_errors.append(f"Line {tok_line}: {e}")
 
-with open(tokens_file, "w") as tf:
-    for tok_type, tok_value, tok_line, tok_col in tokens_list:
-        tf.write(f"<{tok_line}, {tok_col}> <{tok_type}, {tok_value}>\n")
+            i = j
+            continue
+
+        i += 1
+
+    # Every '{' needs its '}'
+    depth = 0
+    for tok_type, tok_value, tok_line, _ in tokens_list:
+        if tok_type == "SYMBOL" and tok_value in ("{", "}"):
+            depth += 1 if tok_value == "{" else -1
+            if depth < 0:
+                semantic_errors.append(f"Line {tok_line}: Syntax Error (line {tok_line}): Unmatched '}}'.")
+                depth = 0
+    if depth:
+        semantic_errors.append(f"Syntax Error: {depth} unclosed '{{' at end of file.")
+
+    return analyzer, semantic_errors
+
+
+# ---------------- IR GENERATION ----------------
+def generate_ir(tokens_list, symbols, governor=None):
+    """
+    Translate declarations, assignments, if / else and return statements in
+    the token stream into three-address code. Array accesses get a
+    BOUNDS_CHECK. Conditions become jumping code: && and || skip their
+    right operand once the left one decides, and no 0/1 temporaries are
+    built for comparisons.
+    symbols: symbol table from semantic_analysis, which holds the parsed
+    array sizes; declarations it rejected are skipped
+    governor: optional ResourceGovernor, polled every CHECK_INTERVAL tokens
+    Returns the CodeGenerator holding the IR lines.
+    """
+    codegen = CodeGenerator()
+    temp_count = 1
+    label_count = 0
+    arrays = {}     # array name → size
+    blocks = []     # one entry per open '{': ("if", false_label, end_label), ("else", end_label) or None
+    opening = None  # what the next '{' opens
+
+    def new_temp():
+        nonlocal temp_count
+        temp = f"t{temp_count}"
+        temp_count += 1
+        return temp
+
+    def new_label():
+        nonlocal label_count
+        label_count += 1
+        return f"L{label_count}"
+
+    def is_element(j):
+        # a [ i ] starting at token j
+        return (
+            j + 3 < len(tokens_list)
+            and tokens_list[j][1] in arrays
+            and tokens_list[j + 1][1] == "["
+            and tokens_list[j + 3][1] == "]"
+        )
+
+    def operand(j):
+        """
+        IR operand starting at token j; array elements are loaded into a temp.
+        Returns (operand, index of the next token).
+        """
+        if is_element(j):
+            name, index = tokens_list[j][1], tokens_list[j + 2][1]
+            temp = new_temp()
+            codegen.generate_bounds_check(index, arrays[name])
+            codegen.generate_load(temp, name, index)
+            return temp, j + 4
+        return tokens_list[j][1], j + 1
+
+    def branch(cond, true_label, false_label):
+        """
+        Jumping code for a parsed condition: go to true_label when it holds,
+        to false_label when it does not. One of the two may be None, meaning
+        fall through to the code that follows.
+        """
+        kind = cond[0]
+        if kind == "not":
+            branch(cond[1], false_label, true_label)
+        elif kind == "and":
+            # The first false term decides: skip the rest
+            skip = false_label or new_label()
+            for term in cond[1][:-1]:
+                branch(term, None, skip)
+            branch(cond[1][-1], true_label, false_label)
+            if false_label is None:
+                codegen.generate_label(skip)
+        elif kind == "or":
+            # The first true term decides: skip the rest
+            skip = true_label or new_label()
+            for term in cond[1][:-1]:
+                branch(term, skip, None)
+            branch(cond[1][-1], true_label, false_label)
+            if true_label is None:
+                codegen.generate_label(skip)
+        else:
+            if kind == "rel":
+                op = cond[1]
+                left, _ = operand(cond[2])
+                right, _ = operand(cond[3])
+            else:
+                op, right = "!=", "0"
+                left, _ = operand(cond[1])
+            if true_label is None:
+                codegen.generate_conditional_jump(f"{left} {NEGATE[op]} {right}", false_label)
+            else:
+                codegen.generate_conditional_jump(f"{left} {op} {right}", true_label)
+                if false_label is not None:
+                    codegen.generate_goto(false_label)
+
+    # Index of the first ';' at or after every token, so that each
+    # return statement finds its end without scanning ahead
+    next_semicolon = [len(tokens_list)] * (len(tokens_list) + 1)
+    for k in reversed(range(len(tokens_list))):
+        next_semicolon[k] = k if tokens_list[k][1] == ";" else next_semicolon[k + 1]
+
+    end_label = None    # end of an if / else if chain, while its else is pending
+    for i, (tok_type, tok_value, _, _) in enumerate(tokens_list):
+
+        if governor is not None and i % CHECK_INTERVAL == 0:
+            governor.check()
+
+        # if (cond) { ... }: fall into the body, jump past it when cond is false
+        if tok_type == "IF":
+            try:
+                j = condition_end(tokens_list, i)
+                cond = parse_condition(tokens_list, i + 2, j)
+            except Exception:
+                j, cond = i, None
+            if cond is None or not opens_block(tokens_list, j + 1):
+                # Malformed if, already reported by semantic_analysis: its
+                # statements run unconditionally and any pending chain ends here
+                if end_label:
+                    codegen.generate_label(end_label)
+                    end_label = None
+                continue
+            false_label = new_label()
+            branch(cond, None, false_label)
+            opening = ("if", false_label, end_label)
+            end_label = None
+
+        # else { ... } / else if: the chain's end label was made by the closing '}'
+        elif tok_type == "ELSE":
+            if end_label and opens_block(tokens_list, i + 1):
+                opening = ("else", end_label)
+                end_label = None
+
+        elif tok_value == "{" and tok_type == "SYMBOL":
+            blocks.append(opening)
+            opening = None
+
+        elif tok_value == "}" and tok_type == "SYMBOL":
+            block = blocks.pop() if blocks else None
+            if block is None:
+                continue
+            if block[0] == "if":
+                _, false_label, chain_end = block
+                if (
+                    i + 2 < len(tokens_list) and tokens_list[i + 1][0] == "ELSE"
+                    and (opens_block(tokens_list, i + 2) or tokens_list[i + 2][0] == "IF")
+                ):
+                    # The then-branch jumps over the else-branch
+                    end_label = chain_end or new_label()
+                    codegen.generate_goto(end_label)
+                    codegen.generate_label(false_label)
+                else:
+                    codegen.generate_label(false_label)
+                    if chain_end:
+                        codegen.generate_label(chain_end)
+            else:
+                codegen.generate_label(block[1])
+
+        # Array declaration: int a[10];
+        elif (
+            tok_type in ["INT", "FLOAT"]
+            and i + 4 < len(tokens_list)
+            and tokens_list[i + 1][0] == "IDENTIFIER"
+            and tokens_list[i + 2][1] == "["
+            and tokens_list[i + 3][0] == "INTEGER_LITERAL"
+        ):
+            name = tokens_list[i + 1][1]
+            size = symbols.get(name, {}).get("size")
+            if size is not None and name not in arrays:
+                arrays[name] = size
+                codegen.generate_array(name, size)
+
+        elif tok_type == "OPERATOR" and tok_value == "=":
+            lhs = tokens_list[i - 1][1]
+
+            # Element assignment: a[i] = ...
+            target = None
+            if lhs == "]" and i >= 4 and is_element(i - 4):
+                target = (tokens_list[i - 4][1], tokens_list[i - 2][1])
+
+            # x = a[i]: load straight into x
+            if (
+                target is None and is_element(i + 1)
+                and i + 5 < len(tokens_list) and tokens_list[i + 5][1] == ";"
+            ):
+                name, index = tokens_list[i + 1][1], tokens_list[i + 3][1]
+                codegen.generate_bounds_check(index, arrays[name])
+                codegen.generate_load(lhs, name, index)
+                continue
+
+            op1, j = operand(i + 1)
+
+            # Arithmetic expression
+            if j + 1 < len(tokens_list) and tokens_list[j][0] == "OPERATOR":
+                operator = tokens_list[j][1]
+                op2, _ = operand(j + 1)
+
+                rhs = new_temp()
+                codegen.generate_expression(rhs, op1, operator, op2)
+
+            else:
+                rhs = op1
+
+            if target:
+                name, index = target
+                codegen.generate_bounds_check(index, arrays[name])
+                codegen.generate_store(name, index, rhs)
+            else:
+                codegen.generate_assignment(lhs, rhs)
+
+        # return;  /  return x;  /  return a[i];  /  return a + b;
+        elif tok_type == "RETURN":
+            j = next_semicolon[i + 1]
+            try:
+                if j == len(tokens_list):
+                    raise Exception("missing ';'")
+                operands, operator = parse_return(tokens_list, i + 1, j)
+            except Exception:
+                continue    # malformed return, already reported by semantic_analysis
+            values = [operand(k)[0] for k in operands]
+            if operator is not None:
+                temp = new_temp()
+                codegen.generate_expression(temp, values[0], operator, values[1])
+                codegen.generate_return(temp)
+            else:
+                codegen.generate_return(*values)
+
+    # Blocks left open by a missing '}' (reported by semantic_analysis) still
+    # define their labels, so every jump has a target
+    for block in reversed(blocks):
+        if block is not None:
+            codegen.generate_label(block[1])
+            if block[0] == "if" and block[2]:
+                codegen.generate_label(block[2])
+
+    return codegen
+
+
+# ---------------- IN-PROCESS COMPILATION ----------------
+def compile_source(code, opt_level="1", schedule=True, latencies=None, profile=None,
+                   governor=None):
+    """
+    Compile MiniLang source held in memory, without touching any file.
+    Every call builds its own lexer, analyzer and pipeline objects, so
+    several threads can compile at once.
+    profile: optional profile (profile_guided.load_profile) for
+    profile-guided optimisation and register priority.
+    governor: optional ResourceGovernor; a breached budget raises BudgetExceeded.
+    Returns a dict with the tokens, errors, symbol table and the code of
+    every stage (ir, optimized_ir, reg_ir, target_code), plus the pipeline
+    objects behind them (see PIPELINE_OBJECTS) for writing artifacts and reports.
+    """
+    governor = governor or ResourceGovernor()
+    with governor:
+        governor.begin_phase("lex")
+        tokens_list, lexical_errors, clean_code = tokenize(code, governor)
+
+        governor.begin_phase("semantic")
+        analyzer, semantic_errors = semantic_analysis(tokens_list, governor)
+
+        governor.begin_phase("ir")
+        codegen = generate_ir(tokens_list, analyzer.symbols, governor)
+        governor.check_ir(len(codegen.ir))
+
+        governor.begin_phase("optimize")
+        optimizer = CodeOptimizer(opt_level=opt_level, profile=profile, governor=governor)
+        optimizer.optimize(codegen.ir)
+
+        governor.begin_phase("allocate")
+        # Profiled builds hand out registers to the hottest variables first
+        allocator = RegisterAllocator(priorities=optimizer.weights)
+        allocator.allocate(optimizer.optimized_lines)
+
+        governor.begin_phase("target")
+        target = TargetCodeGenerator(ir_file=None, target_file=None)
+        target.generate(optimizer.optimized_lines)
+        scheduler = None
+        if schedule:
+            governor.begin_phase("schedule")
+            scheduler = InstructionScheduler(target.target_code, latencies, governor=governor)
+            target.target_code = scheduler.schedule()
+        governor.check()
+
+    return {
+        "tokens": tokens_list,
+        "lexical_errors": lexical_errors,
+        "semantic_errors": semantic_errors,
+        "symbols": analyzer.symbols,
+        "clean_code": clean_code,
+        "ir": codegen.ir,
+        "optimized_ir": optimizer.optimized_lines,
+        "reg_ir": allocator.reg_ir,
+        "target_code": target.target_code,
+        "analyzer": analyzer,
+        "optimizer": optimizer,
+        "allocator": allocator,
+        "target": target,
+        "scheduler": scheduler,
+    }
+
+
+# Entries of the compile_source result that are pipeline objects, not code
+PIPELINE_OBJECTS = ("analyzer", "optimizer", "allocator", "target", "scheduler")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MiniLang compiler")
+    parser.add_argument(
+        "--binary-artifacts", action="store_true",
+        help=f"also write {tokens_bin_file}, {ir_bin_file} and {optimized_ir_bin_file}; "
+             f"{tokens_file} is then exported from {tokens_bin_file}",
+    )
+    parser.add_argument(
+        "-O", dest="opt_level", choices=["0", "1", "2"], default="1",
+        help="optimisation level: -O0 none, -O1 one round of passes (default), "
+             "-O2 repeat passes until the IR stops changing",
+    )
+    parser.add_argument(
+        "--pass-stats", action="store_true",
+        help="print time and instructions removed per optimisation pass",
+    )
+    parser.add_argument(
+        "--no-schedule", action="store_true",
+        help="emit target code in IR order, without instruction scheduling",
+    )
+    parser.add_argument(
+        "--latency-table", metavar="JSON",
+        help="instruction latencies for the scheduler, e.g. {\"LOAD\": 4, \"MUL\": 5}",
+    )
+    parser.add_argument(
+        "--asm", action="store_true",
+        help=f"also emit x86-64 assembly (GNU as syntax) to {asm_file}",
+    )
+    parser.add_argument(
+        "--native", action="store_true",
+        help=f"emit {asm_file} and build {native_file} with the system as / cc; "
+             "its exit status is main's return value",
+    )
+    parser.add_argument(
+        "--instrument", action="store_true",
+        help=f"write an instrumented {python_file}; running it adds block and branch "
+             f"execution counts to {profile_file}",
+    )
+    parser.add_argument(
+        "--profile-use", metavar="FILE",
+        help="optimise with a profile from an instrumented run: hot-path block layout, "
+             "loop unrolling and register priority",
+    )
+    parser.add_argument(
+        "--estimate", action="store_true",
+        help=f"write a static performance estimate of the target code to {performance_file}: "
+             "cycles per block, loop-weighted totals, spills and register pressure",
+    )
+    parser.add_argument(
+        "--machine", metavar="JSON",
+        help="machine description for --estimate (instruction latencies, register count, ...)",
+    )
+    parser.add_argument("--max-source-bytes", type=int, help="reject larger sources")
+    parser.add_argument("--max-tokens", type=int, help="abort lexing after this many tokens")
+    parser.add_argument("--max-ir", type=int, help="abort when the IR grows past this many instructions")
+    parser.add_argument("--phase-timeout", type=float, metavar="SECONDS",
+                        help="wall-clock budget for every compiler phase")
+    parser.add_argument("--max-memory", type=float, metavar="MB",
+                        help="memory ceiling for the compile (measured with tracemalloc)")
+    args = parser.parse_args(argv)
+
+    governor = ResourceGovernor(
+        max_source_bytes=args.max_source_bytes,
+        max_tokens=args.max_tokens,
+        max_ir_instructions=args.max_ir,
+        phase_deadline=args.phase_timeout,
+        max_memory=int(args.max_memory * 1024 * 1024) if args.max_memory else None,
+    )
+
+    # ---------------- READ SOURCE ----------------
+    with open(input_file, "r") as f:
+        code = f.read()
+
+    # ---------------- COMPILE ----------------
+    latencies = load_latencies(args.latency_table) if args.latency_table else None
+    profile = load_profile(args.profile_use) if args.profile_use else None
+    result = compile_source(
+        code, opt_level=args.opt_level, schedule=not args.no_schedule,
+        latencies=latencies, profile=profile, governor=governor,
+    )
+    tokens_list, clean_code = result["tokens"], result["clean_code"]
+    optimizer, target = result["optimizer"], result["target"]
+
+    # ---------------- LEXICAL ANALYSIS ----------------
+    lexical_errors = result["lexical_errors"]
+    with open(clean_source_file, "w") as f:
+        f.write(clean_code)
+
+    with open(lexical_errors_file, "w") as f:
+        if lexical_errors:
+            f.write("Lexical Errors:\n")
+            f.write("\n".join(lexical_errors))
+        else:
+            f.write("No lexical errors detected.\n")
+
+    # ---------------- TOKEN STREAM & SYMBOL TABLE ----------------
+    symbol_table = {}
 
+    if args.binary_artifacts:
+        # Binary artifact is the primary copy; tokens.txt is its text export
+        write_token_artifact(tokens_list, tokens_bin_file)
+        export_tokens_text(tokens_bin_file, tokens_file)
+    else:
+        with open(tokens_file, "w") as tf:
+            tf.writelines(
+                f"<{tok_line}, {tok_col}> <{tok_type}, {tok_value}>\n"
+                for tok_type, tok_value, tok_line, tok_col in tokens_list
+            )
+
+    for tok_type, tok_value, tok_line, tok_col in tokens_list:
         if tok_type in [
             "IDENTIFIER",
             "INTEGER_LITERAL",
@@ -57,170 +845,142 @@ with open(tokens_file, "w") as tf:
                     "column": tok_col,
                 }
 
-# ---------------- TOKEN STATISTICS ----------------
-counts = Counter(t[0] for t in tokens_list)
-
-with open(token_stats_file, "w") as f:
-    f.write("Token Type           Count\n")
-    f.write("-------------------------\n")
-    for token, count in counts.items():
-        f.write(f"{token.ljust(20)} {count}\n")
-
-# ---------------- SEMANTIC ANALYSIS ----------------
-analyzer = SemanticAnalyzer()
-semantic_errors = []
-
-i = 0
-while i < len(tokens_list):
-
-    tok_type, tok_value, tok_line, _ = tokens_list[i]
-
-    # ---------------- DECLARATIONS ----------------
-    if tok_type in ["INT", "FLOAT", "CHAR"] and i + 1 < len(tokens_list):
-        next_type, next_value, next_line, _ = tokens_list[i + 1]
-
-        # Ignore function declaration like: int main()
-        if next_type == "IDENTIFIER":
-            # Check if next next token is '(' → function
-            if i + 2 < len(tokens_list) and tokens_list[i + 2][1] == "(":
-                i += 1
-                continue
+    # ---------------- TOKEN STATISTICS ----------------
+    counts = Counter(t[0] for t in tokens_list)
+
+    with open(token_stats_file, "w") as f:
+        f.write("Token Type           Count\n")
+        f.write("-------------------------\n")
+        for token, count in counts.items():
+            f.write(f"{token.ljust(20)} {count}\n")
+
+    # ---------------- SEMANTIC ANALYSIS ----------------
+    analyzer, semantic_errors = result["analyzer"], result["semantic_errors"]
+    with open(semantic_file, "w") as f:
+        if semantic_errors:
+            f.write("Semantic Errors:\n")
+            f.write("\n".join(semantic_errors))
+        else:
+            f.write("No semantic errors detected.\n")
 
-            try:
-                analyzer.declare(next_value, tok_type.lower(), next_line)
-            except Exception as e:
-                semantic_errors.append(f"Line {next_line}: {e}")
-
-    # ---------------- ASSIGNMENTS ----------------
-    if tok_type == "OPERATOR" and tok_value == "=":
-
-        lhs = tokens_list[i - 1][1]
-
-        # Collect full RHS expression until ';'
-        expr_tokens = []
-        j = i + 1
-        while j < len(tokens_list) and tokens_list[j][1] != ";":
-            expr_tokens.append(tokens_list[j][1])
-            j += 1
-
-        expr_str = " ".join(expr_tokens)
-
-        # Determine type only if single literal
-        type_map = {
-            "INTEGER_LITERAL": "int",
-            "FLOAT_LITERAL": "float",
-            "CHAR_LITERAL": "char",
-            "STRING_LITERAL": "string",
-        }
-
-        rhs_type = (
-            type_map.get(tokens_list[i + 1][0])
-            if len(expr_tokens) == 1
-            else None
-        )
+    analyzer.write_symbol_table(symbol_table_file)
+    analyzer.xref.write(xref_file)
 
-        try:
-            analyzer.assign(lhs, expr_str, rhs_type, tok_line)
-        except Exception as e:
-            semantic_errors.append(f"Line {tok_line}: {e}")
 
-        i = j
-        continue
+    # ---------------- REGEX / TOKEN PATTERNS ----------------
+    examples = {
+        "IDENTIFIER": "counter, _var2",
+        "INTEGER_LITERAL": "123",
+        "FLOAT_LITERAL": "3.14",
+        "CHAR_LITERAL": "'a'",
+        "STRING_LITERAL": '"hello"',
+        "OPERATOR": "+, -, *, /, =",
+        "SYMBOL": ";, (, )",
+        "KEYWORD": "int, float, char",
+    }
 
-    i += 1
+    token_col_width = max(len(k) for k in token_patterns) + 4
+    pattern_col_width = max(len(v) for v in token_patterns.values()) + 4
 
-# ---------------- WRITE SEMANTIC OUTPUT ----------------
-with open(semantic_file, "w") as f:
-    if semantic_errors:
-        f.write("Semantic Errors:\n")
-        f.write("\n".join(semantic_errors))
-    else:
-        f.write("No semantic errors detected.\n")
-
-analyzer.write_symbol_table(symbol_table_file)
-
-
-# ---------------- REGEX / TOKEN PATTERNS ----------------
-examples = {
-    "IDENTIFIER": "counter, _var2",
-    "INTEGER_LITERAL": "123",
-    "FLOAT_LITERAL": "3.14",
-    "CHAR_LITERAL": "'a'",
-    "STRING_LITERAL": '"hello"',
-    "OPERATOR": "+, -, *, /, =",
-    "SYMBOL": ";, (, )",
-    "KEYWORD": "int, float, char",
-}
-
-token_col_width = max(len(k) for k in token_patterns) + 4
-pattern_col_width = max(len(v) for v in token_patterns.values()) + 4
-
-with open(reg_file, "w") as rf:
-    rf.write(
-        f"{'Token Type'.ljust(token_col_width)}"
-        f"{'Regex / Pattern'.ljust(pattern_col_width)}"
-        f"Example\n"
-    )
-    for tok, pat in token_patterns.items():
+    with open(reg_file, "w") as rf:
         rf.write(
-            f"{tok.ljust(token_col_width)}"
-            f"{pat.ljust(pattern_col_width)}"
-            f"{examples.get(tok, '')}\n"
+            f"{'Token Type'.ljust(token_col_width)}"
+            f"{'Regex / Pattern'.ljust(pattern_col_width)}"
+            f"Example\n"
         )
-
-# ---------------- IR GENERATION ----------------
-codegen = CodeGenerator()
-temp_count = 1
-
-for i, (tok_type, tok_value, _, _) in enumerate(tokens_list):
-
-    if tok_type == "OPERATOR" and tok_value == "=":
-        lhs = tokens_list[i - 1][1]
-
-        # Arithmetic expression
-        if i + 3 < len(tokens_list) and tokens_list[i + 2][0] == "OPERATOR":
-            op1 = tokens_list[i + 1][1]
-            operator = tokens_list[i + 2][1]
-            op2 = tokens_list[i + 3][1]
-
-            temp = f"t{temp_count}"
-            temp_count += 1
-
-            codegen.generate_expression(temp, op1, operator, op2)
-            codegen.generate_assignment(lhs, temp)
-
+        for tok, pat in token_patterns.items():
+            rf.write(
+                f"{tok.ljust(token_col_width)}"
+                f"{pat.ljust(pattern_col_width)}"
+                f"{examples.get(tok, '')}\n"
+            )
+
+    # ---------------- IR GENERATION ----------------
+    with open(ir_file, "w") as f:
+        f.writelines(line + "\n" for line in result["ir"])
+    if args.binary_artifacts:
+        write_ir_artifact(result["ir"], ir_bin_file)
+
+    # ---------------- OPTIMIZATION ----------------
+    optimizer.write_optimized_ir()
+    if args.pass_stats:
+        print(optimizer.report())
+    if optimizer.pgo_stats:
+        print(f"Profile-guided optimisation: {optimizer.pgo_stats}")
+    if args.binary_artifacts:
+        write_ir_artifact(optimizer.optimized_lines, optimized_ir_bin_file)
+
+    # ---------------- INSTRUMENTED BUILD ----------------
+    if args.instrument:
+        InstrumentedBuild(label_blocks(optimizer.optimized_lines), profile_file).write(python_file)
+
+    # ---------------- REGISTER ALLOCATION ----------------
+    result["allocator"].write_register_ir()
+
+    # ---------------- TARGET CODE GENERATION ----------------
+    if result["scheduler"] is not None:
+        print(result["scheduler"].report())
+    target.target_file = "target_code.txt"
+    target.write_target_code()
+
+    # Profile weights of the variables, by the registers that hold them
+    weights = {target.registers[v]: w for v, w in optimizer.weights.items()
+               if v in target.registers}
+
+    # ---------------- PERFORMANCE ESTIMATE ----------------
+    if args.estimate:
+        governor.begin_phase("estimate")
+        if args.machine:
+            machine = load_machine(args.machine)
         else:
-            rhs = tokens_list[i + 1][1]
-            codegen.generate_assignment(lhs, rhs)
-
-codegen.write_output()
-
-# ---------------- OPTIMIZATION ----------------
-optimizer = CodeOptimizer(ir_file="ir.txt", optimized_file="optimized_ir.txt")
-optimizer.optimize()
-optimizer.write_optimized_ir()
-
-# ---------------- REGISTER ALLOCATION ----------------
-allocator = RegisterAllocator(ir_file="optimized_ir.txt", reg_file="reg_ir.txt")
-allocator.allocate()
-allocator.write_register_ir()
-
-# ---------------- TARGET CODE GENERATION ----------------
-target = TargetCodeGenerator(
-    ir_file="optimized_ir.txt",
-    target_file="target_code.txt",
-)
-target.generate()
-target.write_target_code()
-
-# ---------------- FINAL OUTPUT ----------------
-print("Lexical, semantic analysis, and code generation completed!")
-print(f"Tokens saved to {tokens_file}")
-print(f"Symbol table saved to {symbol_table_file}")
-print(f"Semantic analysis saved to {semantic_file}")
-print(f"Lexical errors saved to {lexical_errors_file}")
-print(f"Clean source saved to {clean_source_file}")
-print(f"Regular expressions saved to {reg_file}")
-print(f"Token statistics saved to {token_stats_file}")
-print(f"IR code saved to {ir_file} and Python code saved to {python_file}")
-print("Target code generation completed!")
+            # Same latencies the scheduler used
+            machine = dict(DEFAULT_MACHINE, latencies=latencies or DEFAULT_MACHINE["latencies"])
+        estimator = PerformanceEstimator(
+            target.target_code, machine, weights=weights, governor=governor,
+        )
+        estimator.write(performance_file)
+        print(estimator.report())
+
+    # ---------------- NATIVE CODE (x86-64) ----------------
+    if args.asm or args.native:
+        governor.begin_phase("native")
+        backend = X86Backend(target.target_code, weights=weights, governor=governor)
+        backend.generate()
+        backend.write_assembly(asm_file)
+        print(backend.report())
+        if args.native:
+            assemble(asm_file, native_file)
+
+    governor.check()
+    governor.stop()
+
+    # ---------------- FINAL OUTPUT ----------------
+    print("Lexical, semantic analysis, and code generation completed!")
+    print(f"Tokens saved to {tokens_file}")
+    print(f"Symbol table saved to {symbol_table_file} (cross-references in {xref_file})")
+    print(f"Semantic analysis saved to {semantic_file}")
+    print(f"Lexical errors saved to {lexical_errors_file}")
+    print(f"Clean source saved to {clean_source_file}")
+    print(f"Regular expressions saved to {reg_file}")
+    print(f"Token statistics saved to {token_stats_file}")
+    print(f"IR code saved to {ir_file} and Python code saved to {python_file}")
+    if args.binary_artifacts:
+        print(f"Binary artifacts saved to {tokens_bin_file}, {ir_bin_file} and {optimized_ir_bin_file}")
+    if args.asm or args.native:
+        print(f"x86-64 assembly saved to {asm_file}")
+    if args.native:
+        print(f"Native executable saved to {native_file}")
+    if args.instrument:
+        print(f"Instrumented program saved to {python_file}; run it to record {profile_file}")
+    if args.estimate:
+        print(f"Performance estimate saved to {performance_file}")
+    print("Target code generation completed!")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BudgetExceeded as e:
+        # Structured budget errors end the compile without a traceback
+        print(e, file=sys.stderr)
+        sys.exit(1)
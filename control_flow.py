@@ -0,0 +1,380 @@
+# control_flow.py
+# Control-flow graph helpers and CFG cleanup for three-address IR.
+#
+# IR control-flow instructions:
+#   L1:                 label
+#   GOTO L1             unconditional jump
+#   IF cond GOTO L1     conditional jump (cond: "x", "a < b", ...)
+#   RETURN [x]          leave the function
+#
+# CFGSimplifier cleans the IR up before the later passes run:
+#   - validates that every jump target is a defined label
+#   - folds branches whose condition is a constant
+#   - threads jumps to jumps (GOTO L1 → L1: GOTO L2 becomes GOTO L2)
+#   - drops jumps to the very next instruction
+#   - merges a block into its only predecessor when that predecessor jumps to it
+#   - drops unreachable blocks and labels nobody jumps to
+
+import re
+
+# Numeric literal tokens: 12, -3, 0.5, .5 (names such as "inf" are variables)
+LITERAL = re.compile(r"-?\d+(\.\d+)?$|-?\.\d+$")
+
+RELATIONAL_OPS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "&&": lambda a, b: bool(a) and bool(b),
+    "||": lambda a, b: bool(a) or bool(b),
+}
+
+# Comparison that holds exactly when the original one does not
+NEGATE = {"<": ">=", "<=": ">", ">": "<=", ">=": "<", "==": "!=", "!=": "=="}
+
+
+# -----------------------
+# Instruction helpers
+# -----------------------
+def is_label(line):
+    return line.endswith(":") and " " not in line
+
+
+def label_name(line):
+    return line[:-1]
+
+
+def is_goto(line):
+    return line.startswith("GOTO ")
+
+
+def is_conditional(line):
+    return line.startswith("IF ") and " GOTO " in line
+
+
+def is_return(line):
+    return line == "RETURN" or line.startswith("RETURN ")
+
+
+def is_terminator(line):
+    # Control never falls through these
+    return is_goto(line) or is_return(line)
+
+
+def jump_target(line):
+    if is_goto(line) or is_conditional(line):
+        return line.rsplit(" ", 1)[1]
+    return None
+
+
+def condition(line):
+    # "IF a < b GOTO L1" → "a < b"
+    return line[3:line.rindex(" GOTO ")]
+
+
+def retarget(line, label):
+    return line.rsplit(" ", 1)[0] + " " + label
+
+
+def literal_value(token):
+    """Numeric value of an int/float literal token, or None."""
+    if not LITERAL.match(token):
+        return None
+    return float(token) if "." in token else int(token)
+
+
+def constant_condition(cond):
+    """
+    Evaluate a branch condition made only of literals.
+    Returns True / False, or None when the condition is not constant.
+    """
+    parts = cond.split()
+    if len(parts) == 1:
+        value = literal_value(parts[0])
+        return None if value is None else value != 0
+    if len(parts) == 3 and parts[1] in RELATIONAL_OPS:
+        a, b = literal_value(parts[0]), literal_value(parts[2])
+        if a is None or b is None:
+            return None
+        return RELATIONAL_OPS[parts[1]](a, b)
+    return None
+
+
+# -----------------------
+# Basic blocks
+# -----------------------
+class BasicBlock:
+    def __init__(self, index, label=None):
+        self.index = index
+        self.label = label          # label name without ':' (None for unlabeled blocks)
+        self.instrs = []            # instructions after the label
+        self.succs = []             # successor block indexes
+        self.preds = []             # predecessor block indexes
+
+    @property
+    def name(self):
+        return self.label or f"B{self.index}"
+
+    def lines(self):
+        return ([f"{self.label}:"] if self.label else []) + self.instrs
+
+    def falls_through(self):
+        return not (self.instrs and is_terminator(self.instrs[-1]))
+
+
+def build_blocks(ir_lines):
+    """
+    Split IR into basic blocks: every label starts a block, every jump or
+    return ends one. Successors and predecessors are filled in.
+    """
+    blocks = []
+    current = None
+    for line in ir_lines:
+        if is_label(line):
+            current = BasicBlock(len(blocks), label_name(line))
+            blocks.append(current)
+            continue
+        if current is None:
+            current = BasicBlock(len(blocks))
+            blocks.append(current)
+        current.instrs.append(line)
+        if is_terminator(line) or is_conditional(line):
+            current = None
+
+    by_label = {b.label: b.index for b in blocks if b.label}
+    for b in blocks:
+        last = b.instrs[-1] if b.instrs else None
+        if last is not None and (is_goto(last) or is_conditional(last)):
+            target = jump_target(last)
+            if target in by_label:
+                b.succs.append(by_label[target])
+        if b.falls_through() and b.index + 1 < len(blocks):
+            b.succs.append(b.index + 1)
+    for b in blocks:
+        for s in b.succs:
+            if b.index not in blocks[s].preds:
+                blocks[s].preds.append(b.index)
+    return blocks
+
+
+def flatten(blocks):
+    return [line for b in blocks for line in b.lines()]
+
+
+def label_blocks(ir_lines):
+    """
+    Give every unlabeled block a label equal to its name (B0, B3, ...), so
+    blocks keep a stable identity when they are reordered.
+    """
+    blocks = build_blocks(ir_lines)
+    for b in blocks:
+        if b.label is None:
+            b.label = b.name
+    return flatten(blocks)
+
+
+def has_control_flow(ir_lines):
+    """
+    False for straight-line IR: no labels, no jumps and nothing after a
+    RETURN. There is nothing for the CFG cleanup to do in that case.
+    """
+    last = len(ir_lines) - 1
+    for n, line in enumerate(ir_lines):
+        if line.endswith(":") or line.startswith(("GOTO ", "IF ", "RETURN")) and n != last:
+            return True
+    return False
+
+
+def validate_jumps(ir_lines):
+    """Raise if any GOTO / IF jumps to a label that is never defined."""
+    defined = {label_name(line) for line in ir_lines if is_label(line)}
+    for n, line in enumerate(ir_lines, 1):
+        target = jump_target(line)
+        if target is not None and target not in defined:
+            raise Exception(
+                f"IR Error (instruction {n}): jump to undefined label '{target}' in '{line}'"
+            )
+
+
+# -----------------------
+# CFG simplification
+# -----------------------
+class CFGSimplifier:
+    def __init__(self, ir_lines):
+        self.ir_lines = list(ir_lines)
+        self.stats = {
+            "branches_folded": 0,
+            "jumps_threaded": 0,
+            "jumps_removed": 0,
+            "blocks_merged": 0,
+            "blocks_removed": 0,
+            "labels_removed": 0,
+        }
+
+    def simplify(self):
+        """
+        Run every cleanup until nothing changes.
+        Returns the simplified IR lines.
+        """
+        lines = self.ir_lines
+        if not has_control_flow(lines):
+            return lines
+        validate_jumps(lines)
+        while True:
+            before = lines
+            lines = self.fold_branches(lines)
+            lines = self.thread_jumps(lines)
+            lines = self.remove_redundant_jumps(lines)
+            lines = self.remove_unreachable(lines)
+            lines = self.merge_blocks(lines)
+            lines = self.remove_unused_labels(lines)
+            if lines == before:
+                break
+        self.ir_lines = lines
+        return lines
+
+    def fold_branches(self, lines):
+        # IF <constant> GOTO L → GOTO L (true) or nothing (false)
+        result = []
+        for line in lines:
+            if is_conditional(line):
+                value = constant_condition(condition(line))
+                if value is not None:
+                    self.stats["branches_folded"] += 1
+                    if value:
+                        result.append(f"GOTO {jump_target(line)}")
+                    continue
+            result.append(line)
+        return result
+
+    def thread_jumps(self, lines):
+        # Where does a jump to each label really end up?
+        forward = {}
+        for i, line in enumerate(lines):
+            if is_label(line):
+                j = i + 1
+                while j < len(lines) and is_label(lines[j]):
+                    j += 1
+                if j < len(lines) and is_goto(lines[j]):
+                    forward[label_name(line)] = jump_target(lines[j])
+                elif j < len(lines) and j > i + 1:
+                    # L1: L2: x = ...  → L1 is an alias of the last label
+                    forward[label_name(line)] = label_name(lines[j - 1])
+
+        def final(label):
+            seen = set()
+            while label in forward and label not in seen:
+                seen.add(label)
+                label = forward[label]
+            return label
+
+        result = []
+        for line in lines:
+            target = jump_target(line)
+            if target is not None:
+                new_target = final(target)
+                if new_target != target:
+                    self.stats["jumps_threaded"] += 1
+                    line = retarget(line, new_target)
+            result.append(line)
+        return result
+
+    def remove_redundant_jumps(self, lines):
+        # GOTO L / IF c GOTO L immediately followed by L: is a no-op
+        result = []
+        for i, line in enumerate(lines):
+            target = jump_target(line)
+            if target is not None:
+                j = i + 1
+                following = set()
+                while j < len(lines) and is_label(lines[j]):
+                    following.add(label_name(lines[j]))
+                    j += 1
+                if target in following:
+                    self.stats["jumps_removed"] += 1
+                    continue
+            result.append(line)
+        return result
+
+    def remove_unreachable(self, lines):
+        blocks = build_blocks(lines)
+        if not blocks:
+            return lines
+        reachable = set()
+        stack = [0]
+        while stack:
+            b = stack.pop()
+            if b in reachable:
+                continue
+            reachable.add(b)
+            stack.extend(blocks[b].succs)
+        kept = [b for b in blocks if b.index in reachable]
+        self.stats["blocks_removed"] += len(blocks) - len(kept)
+        return flatten(kept)
+
+    def merge_blocks(self, lines):
+        """
+        A: ... GOTO L        where L's block has A as its only predecessor
+        ...                  and ends in GOTO / RETURN
+        L: ... GOTO M
+        → the L block is moved up to replace A's jump.
+        """
+        blocks = build_blocks(lines)
+        by_label = {b.label: b for b in blocks if b.label}
+        moved = set()
+        order = []
+        for a in blocks:
+            if a.index in moved:
+                continue
+            order.append(a)
+            while a.instrs and is_goto(a.instrs[-1]):
+                b = by_label.get(jump_target(a.instrs[-1]))
+                if (
+                    b is None or b is a or b.index in moved or b.index == 0
+                    or b.preds != [a.index] or b.falls_through()
+                    or any(x is b for x in order)
+                ):
+                    break
+                a.instrs.pop()
+                moved.add(b.index)
+                order.append(b)
+                self.stats["blocks_merged"] += 1
+                a = b
+        return flatten(order)
+
+    def remove_unused_labels(self, lines):
+        used = {jump_target(line) for line in lines if jump_target(line) is not None}
+        result = []
+        for line in lines:
+            if is_label(line) and label_name(line) not in used:
+                self.stats["labels_removed"] += 1
+                continue
+            result.append(line)
+        return result
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    ir = [
+        "x = 1",
+        "IF 1 < 2 GOTO L1",
+        "GOTO L2",
+        "L1:",
+        "GOTO L3",
+        "L2:",
+        "x = 2",
+        "L3:",
+        "y = x",
+        "IF y GOTO L4",
+        "GOTO L5",
+        "L4:",
+        "y = 0",
+        "L5:",
+        "RETURN y",
+        "z = 9",
+    ]
+    simplifier = CFGSimplifier(ir)
+    print("\n".join(simplifier.simplify()))
+    print(simplifier.stats)
@@ -0,0 +1,294 @@
+# instruction_scheduler.py
+# Post-allocation list scheduler for target code.
+#
+# For every basic block a dependency DAG is built over the instructions:
+#   RAW (read after write)  : consumer waits for the producer's latency
+#   WAR (write after read)  : the write may not move above the read
+#   WAW (write after write) : the writes keep their order
+# CMP writes a FLAGS pseudo-register that conditional jumps read, and the
+# block terminator (JMP / Jcc / RET) always stays last. Array memory is
+# modelled the same way: STOREX writes a MEM:<array> pseudo-register that
+# LOADX reads, and BOUND writes a BOUNDS pseudo-register that both read,
+# so no access moves above its bounds check.
+#
+# Instructions are then list-scheduled: each cycle the ready instruction
+# with the longest latency-weighted path to the end of the block is
+# issued. Cycle estimates come from a simple in-order, single-issue
+# pipeline model with the latencies below.
+
+import heapq
+import json
+import re
+
+from resource_governor import CHECK_INTERVAL
+
+DEFAULT_LATENCIES = {
+    "LOAD": 3,
+    "MOV": 1,
+    "ADD": 1,
+    "SUB": 1,
+    "MUL": 3,
+    "DIV": 12,
+    "MOD": 12,
+    "LOADX": 3,
+    "STOREX": 1,
+    "BOUND": 1,
+    "CMP": 1,
+    "SET": 1,
+    "BRANCH": 1,
+}
+
+REGISTER = re.compile(r"R\d+$")
+FLAGS = "FLAGS"
+BOUNDS = "BOUNDS"
+
+
+def load_latencies(path):
+    """Read a JSON latency table; missing opcodes keep their default latency."""
+    with open(path, "r") as f:
+        table = json.load(f)
+    latencies = dict(DEFAULT_LATENCIES)
+    latencies.update({op.upper(): int(cycles) for op, cycles in table.items()})
+    return latencies
+
+
+class Instruction:
+    def __init__(self, text):
+        self.text = text
+        parts = text.replace(",", " ").split()
+        self.opcode = parts[0] if parts else ""
+        self.operands = parts[1:]
+        self.is_label = text.endswith(":") and len(parts) == 1
+        self.is_branch = self.opcode.startswith("J") or self.opcode == "RET"
+
+        regs = [op for op in self.operands if REGISTER.match(op)]
+        if self.is_branch:
+            self.defs = []
+            self.uses = regs + ([FLAGS] if self.opcode not in ("JMP", "RET") else [])
+        elif self.opcode == "CMP":
+            self.defs = [FLAGS]
+            self.uses = regs
+        elif self.opcode == "ARRAY":
+            self.defs = [f"MEM:{self.operands[0]}"]
+            self.uses = []
+        elif self.opcode == "BOUND":
+            self.defs = [BOUNDS]
+            self.uses = regs
+        elif self.opcode == "STOREX":
+            # STOREX a, Ri, Rs
+            self.defs = [f"MEM:{self.operands[0]}"]
+            self.uses = regs + [f"MEM:{self.operands[0]}", BOUNDS]
+        elif self.opcode == "LOADX":
+            # LOADX Rd, a, Ri
+            self.defs = self.operands[:1]
+            self.uses = regs[1:] + [f"MEM:{self.operands[1]}", BOUNDS]
+        else:
+            # LOAD / MOV / arithmetic: first operand is the destination
+            self.defs = self.operands[:1] if regs[:1] == self.operands[:1] else []
+            self.uses = [op for op in self.operands[1:] if REGISTER.match(op)]
+
+    def latency_class(self):
+        if self.is_branch:
+            return "BRANCH"
+        if self.opcode.startswith("SET"):
+            return "SET"
+        return self.opcode
+
+
+class InstructionScheduler:
+    def __init__(self, target_code, latencies=None, issue_width=1, governor=None):
+        self.target_code = list(target_code)
+        self.latencies = dict(DEFAULT_LATENCIES)
+        if latencies:
+            self.latencies.update(latencies)
+        self.issue_width = issue_width
+        self.governor = governor    # optional ResourceGovernor, polled in the long loops
+        self.scheduled_code = []
+        self.cycles_before = 0
+        self.cycles_after = 0
+
+    def latency(self, instr):
+        return self.latencies.get(instr.latency_class(), 1)
+
+    def poll(self, step):
+        if self.governor is not None and step % CHECK_INTERVAL == 0:
+            self.governor.check()
+
+    # -----------------------
+    # Basic blocks
+    # -----------------------
+    def basic_blocks(self):
+        """
+        Split the program into (label, body) pairs. A label starts a new
+        block; a branch ends the current one.
+        """
+        blocks = []
+        label, body = None, []
+        for text in self.target_code:
+            instr = Instruction(text)
+            if instr.is_label:
+                if label is not None or body:
+                    blocks.append((label, body))
+                label, body = text, []
+                continue
+            body.append(instr)
+            if instr.is_branch:
+                blocks.append((label, body))
+                label, body = None, []
+        if label is not None or body:
+            blocks.append((label, body))
+        return blocks
+
+    # -----------------------
+    # Dependency DAG
+    # -----------------------
+    def build_dag(self, body, lat):
+        """
+        lat: latency of every instruction in body.
+        Returns preds: list of {pred index: latency} per instruction.
+        """
+        preds = [dict() for _ in body]
+        last_def = {}      # register → index of the last writer
+        readers = {}       # register → readers since the last write
+
+        def add_edge(src, dst, lat):
+            preds[dst][src] = max(preds[dst].get(src, 0), lat)
+
+        for i, instr in enumerate(body):
+            self.poll(i)
+            for reg in instr.uses:
+                if reg in last_def:
+                    add_edge(last_def[reg], i, lat[last_def[reg]])                       # RAW
+            for reg in instr.defs:
+                for r in readers.get(reg, []):
+                    if r != i:
+                        add_edge(r, i, 0)                                               # WAR
+                if reg in last_def:
+                    add_edge(last_def[reg], i, 1)                                       # WAW
+            for reg in instr.uses:
+                readers.setdefault(reg, []).append(i)
+            for reg in instr.defs:
+                last_def[reg] = i
+                readers[reg] = []
+            if instr.is_branch:
+                # Terminator stays after everything else in the block
+                for j in range(i):
+                    add_edge(j, i, 0)
+        return preds
+
+    # -----------------------
+    # Cycle model
+    # -----------------------
+    def estimate_cycles(self, lat, order, preds):
+        """
+        In-order issue of `order` (block indexes): an instruction issues
+        once its operands are ready and an issue slot is free.
+        Returns the cycle count until the last result is available.
+        """
+        issue_at = {}
+        cycle, used = 0, 0
+        finish = 0
+        for i in order:
+            ready = max((issue_at[p] + d for p, d in preds[i].items()), default=0)
+            if ready > cycle:
+                cycle, used = ready, 0
+            if used == self.issue_width:
+                cycle, used = cycle + 1, 0
+            issue_at[i] = cycle
+            used += 1
+            finish = max(finish, cycle + lat[i])
+        return finish
+
+    # -----------------------
+    # List scheduling
+    # -----------------------
+    def schedule_block(self, body):
+        n = len(body)
+        lat = [self.latency(instr) for instr in body]
+        preds = self.build_dag(body, lat)
+        succs = [[] for _ in body]
+        for i, p in enumerate(preds):
+            for j, d in p.items():
+                succs[j].append((i, d))
+
+        # Priority: latency-weighted longest path to the end of the block
+        priority = [0] * n
+        for i in reversed(range(n)):
+            priority[i] = max(
+                (d + priority[s] for s, d in succs[i]),
+                default=lat[i],
+            )
+
+        remaining = [len(p) for p in preds]
+        earliest = [0] * n
+        waiting = [(0, i) for i in range(n) if remaining[i] == 0]   # (earliest cycle, index)
+        available = []                                               # (-priority, index)
+        order = []
+        cycle = 0
+        while len(order) < n:
+            self.poll(cycle)
+            while waiting and waiting[0][0] <= cycle:
+                _, i = heapq.heappop(waiting)
+                heapq.heappush(available, (-priority[i], i))
+            if not available:
+                # Nothing can issue: stall until the next operand is ready
+                cycle = waiting[0][0]
+                continue
+            for _ in range(self.issue_width):
+                if not available:
+                    break
+                # Highest priority first; original position breaks ties
+                _, best = heapq.heappop(available)
+                order.append(best)
+                for s, d in succs[best]:
+                    earliest[s] = max(earliest[s], cycle + d)
+                    remaining[s] -= 1
+                    if remaining[s] == 0:
+                        heapq.heappush(waiting, (earliest[s], s))
+            cycle += 1
+
+        before = self.estimate_cycles(lat, range(n), preds)
+        after = self.estimate_cycles(lat, order, preds)
+        if after > before:
+            # Never make a block slower than its original order
+            order, after = list(range(n)), before
+        return [body[i] for i in order], before, after
+
+    def schedule(self):
+        """
+        Schedule every basic block.
+        Returns the rescheduled target code (list of instruction strings).
+        """
+        self.scheduled_code = []
+        self.cycles_before = 0
+        self.cycles_after = 0
+        for label, body in self.basic_blocks():
+            if label is not None:
+                self.scheduled_code.append(label)
+            ordered, before, after = self.schedule_block(body)
+            self.scheduled_code.extend(instr.text for instr in ordered)
+            self.cycles_before += before
+            self.cycles_after += after
+        return self.scheduled_code
+
+    def report(self):
+        saved = self.cycles_before - self.cycles_after
+        return (
+            f"Instruction scheduling: estimated cycles {self.cycles_before} → "
+            f"{self.cycles_after} ({saved} saved)"
+        )
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    code = [
+        "LOAD R1, 5",
+        "MUL R2, R1, R1",
+        "LOAD R3, 7",
+        "ADD R4, R3, 1",
+        "ADD R5, R2, R4",
+        "RET R5",
+    ]
+    scheduler = InstructionScheduler(code)
+    print("\n".join(scheduler.schedule()))
+    print(scheduler.report())
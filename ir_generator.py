@@ -106,15 +106,14 @@ class IRGenerator:
         true_body_lines and false_body_lines are lists of IR strings or python lines.
         """
         L_true = self.new_label()
-        L_end = self.new_label() if false_body_lines else L_true + "_end"
+        L_end = self.new_label()
         
-        # IF cond GOTO L_true
+        # IF cond GOTO L_true, otherwise jump to the false branch (or past the if)
         if false_body_lines:
             L_false = self.new_label()
             self.generate_conditional_jump(cond, L_true, L_false)
         else:
-            # If no explicit false label, we only jump to true and continue (typical structure differs)
-            self.generate_conditional_jump(cond, L_true)
+            self.generate_conditional_jump(cond, L_true, L_end)
         
         # False branch (if present)
         if false_body_lines:
@@ -133,9 +132,8 @@ class IRGenerator:
             self.emit(instr)
             self.emit_python(f"# {instr}")
         
-        # End label if we used one
-        if false_body_lines:
-            self.generate_label(L_end)
+        # Both branches continue here
+        self.generate_label(L_end)
     
     def generate_return(self, value=None):
         # Generate IR for return
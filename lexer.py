@@ -65,38 +65,121 @@ def find_column(lexpos, code):
         last_cr = -1
     return lexpos - last_cr
 # Build lexer
+# Master lexer: built once, never fed input. Every scan works on its own
+# clone, so concurrent tokenize() calls share no mutable state.
 lexer = lex.lex()
 #For Recognizing Pattern
 import re
+from token_array import TokenArray
+from resource_governor import CHECK_INTERVAL
+# Fresh lexer for one scan: cloned from the master, line numbers start at 1
+def new_lexer(error_rule=None):
+    scanner = lexer.clone()
+    scanner.lineno = 1
+    if error_rule is not None:
+        scanner.lexerrorf = error_rule
+    return scanner
+# Error rule that records illegal characters in `errors` instead of printing them
+def _error_collector(errors, text):
+    def collect(t):
+        char = t.value[0]
+        if "\udc80" <= char <= "\udcff":
+            char = f"\\x{ord(char) - 0xdc00:02x}"     # undecodable byte (see tokenize_array)
+        errors.append(
+            f"Lexical Error (line {t.lineno}, col {find_column(t.lexpos, text)}): Illegal character '{char}'"
+        )
+        t.lexer.skip(1)
+    return collect
+# Run a fresh lexer over text, yielding PLY tokens
+# A ResourceGovernor, when given, is consulted every CHECK_INTERVAL tokens
+def _scan(text, error_rule=None, governor=None):
+    scanner = new_lexer(error_rule)
+    scanner.input(text)
+    count = 0
+    while True:
+        tok = scanner.token()
+        if not tok:
+            break
+        count += 1
+        if governor is not None and count % CHECK_INTERVAL == 0:
+            governor.check_tokens(count)
+        yield tok
+    if governor is not None:
+        governor.check_tokens(count)
+# Remove /* ... */ comments from code (str or bytes), as the regex
+# /\*[\s\S]*?\*/ would, but finding every '*/' only once: once a '/*' has
+# no closing '*/', no later one has either (the regex retries every one)
+def _strip_block_comments(code):
+    opening, closing = ("/*", "*/") if isinstance(code, str) else (b"/*", b"*/")
+    parts = []
+    pos = 0
+    while True:
+        start = code.find(opening, pos)
+        if start < 0:
+            break
+        end = code.find(closing, start + 2)
+        if end < 0:
+            break
+        parts.append(code[pos:start])
+        pos = end + 2
+    parts.append(code[pos:])
+    return code[:0].join(parts)
 # Define tokenize function to compile
-def tokenize(code):
+def tokenize(code, governor=None):
     """
     Tokenize the input code.
+    governor: optional ResourceGovernor enforcing source / token budgets
     Returns:
         tokens_list: list of (type, value, line, column)
         lexical_errors: list of lexical error messages
         clean_code: input code with comments removed
     """
+    if governor is not None:
+        governor.check_source(code)
     # Remove comments to generate clean source code
     clean_code = re.sub(r"//.*", "", code)                   # single-line comments
-    clean_code = re.sub(r"/\*[\s\S]*?\*/", "", clean_code)  # multi-line comments
-    lexer.input(clean_code)
+    clean_code = _strip_block_comments(clean_code)          # multi-line comments
     tokens_list = []
     lexical_errors = []
-    while True:
-        tok = lexer.token()
-        if not tok:
-            break
+    # Collect errors instead of printing them (this scan's lexer only)
+    for tok in _scan(clean_code, _error_collector(lexical_errors, clean_code), governor):
         col = find_column(tok.lexpos, clean_code)
         tokens_list.append((tok.type, tok.value, tok.lineno, col))
-    # Redefine t_error temporarily to collect errors instead of printing
-    def t_error_collect(t):
-        lexical_errors.append(
-            f"Lexical Error (line {t.lineno}, col {find_column(t.lexpos, clean_code)}): Illegal character '{t.value[0]}'"
-        )
-        t.lexer.skip(1)
-    lexer.errorfunc = t_error_collect  # override default error function
     return tokens_list, lexical_errors, clean_code
+# Columnar variant of tokenize for large inputs
+def tokenize_array(source, governor=None):
+    """
+    Tokenize source (str, bytes or mmap) into a TokenArray.
+    Token values are not copied: the TokenArray slices them out of the
+    comment-free source buffer on demand. Offsets count bytes; lines and
+    columns are the same as tokenize() gives.
+    Returns:
+        token_array: TokenArray (iterates/indexes as (type, value, line, column))
+        lexical_errors: list of lexical error messages
+        clean_code: comment-free source as bytes (the TokenArray's buffer)
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if governor is not None:
+        governor.check_source(source)
+    clean_code = re.sub(rb"//.*", b"", source)                   # single-line comments
+    clean_code = _strip_block_comments(clean_code)              # multi-line comments
+    # Lex the decoded text, as tokenize() does; bytes that are not UTF-8
+    # become lone surrogates and are reported as illegal characters
+    text = clean_code.decode("utf-8", "surrogateescape")
+    ascii_only = len(text) == len(clean_code)
+    token_array = TokenArray(clean_code, tokens)
+    lexical_errors = []
+    char_pos = byte_pos = 0     # PLY's lexpos counts characters: map it to bytes
+    for tok in _scan(text, _error_collector(lexical_errors, text), governor):
+        start, end = tok.lexpos, tok.lexpos + len(tok.value)
+        if not ascii_only:
+            # Tokens arrive in order, so the mapping only ever moves forward
+            byte_pos += len(text[char_pos:start].encode("utf-8", "surrogateescape"))
+            char_pos = start
+            start, end = byte_pos, byte_pos + len(tok.value.encode("utf-8", "surrogateescape"))
+        token_array.append(tok.type, start, end, tok.lineno, find_column(tok.lexpos, text))
+    return token_array, lexical_errors, clean_code
 #example for testing
 if __name__ == "__main__":
     code = """
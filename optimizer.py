@@ -1,71 +1,294 @@
 # optimizer.py
+import re
+
+from control_flow import CFGSimplifier, condition, jump_target, has_control_flow, label_blocks
+from pass_manager import PassManager, ALL
+from profile_guided import BlockLayout, LoopUnroller, variable_weights
+from range_analysis import (
+    BoundsCheckEliminator, element, is_bounds_check, is_array_declaration, has_bounds_checks,
+    truncate_div, INT_MIN, INT_MAX,
+)
+
+TEMP = re.compile(r"t\d+$")
+
+# Folded values must fit the target's 64-bit registers (INT_MIN..INT_MAX);
+# anything larger is left for run time. Longer literals are not even parsed.
+MAX_LITERAL_DIGITS = 19
+
+# Integer semantics as at run time: / and % truncate toward zero,
+# relational and logical operators give 1 / 0
+FOLD_OPS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": truncate_div,
+    "%": lambda a, b: a - truncate_div(a, b) * b,
+    "<": lambda a, b: int(a < b),
+    "<=": lambda a, b: int(a <= b),
+    ">": lambda a, b: int(a > b),
+    ">=": lambda a, b: int(a >= b),
+    "==": lambda a, b: int(a == b),
+    "!=": lambda a, b: int(a != b),
+    "&&": lambda a, b: int(bool(a) and bool(b)),
+    "||": lambda a, b: int(bool(a) or bool(b)),
+}
+
+
+def evaluate(a, op, b):
+    """
+    Fold "a op b" for two integer literal tokens without eval().
+    Returns the result as an int, or None when it must not be folded:
+    unknown operator, division by zero, or a value outside 64 bits.
+    """
+    if op not in FOLD_OPS or len(a) > MAX_LITERAL_DIGITS or len(b) > MAX_LITERAL_DIGITS:
+        return None
+    a, b = int(a), int(b)
+    if op in ("/", "%") and b == 0:
+        return None
+    value = FOLD_OPS[op](a, b)
+    if not INT_MIN <= value <= INT_MAX:
+        return None
+    return value
+
+
+def used_names(ir_lines):
+    """Every token read by some instruction (right-hand sides, conditions, returns)."""
+    used = set()
+    for line in ir_lines:
+        if "[" in line:
+            # a[i] = x / x = a[i]: the index is read on either side
+            line = line.replace("[", " ").replace("]", " ")
+            lhs, sep, rhs = line.partition(" = ")
+            used.update(lhs.split()[1:])
+        else:
+            lhs, sep, rhs = line.partition(" = ")
+        if sep:
+            used.update(rhs.split())
+        else:
+            # IF / RETURN / GOTO / BOUNDS_CHECK / labels: every token is a potential use
+            used.update(line.split())
+    return used
+
+
+def propagate_index(token, constants):
+    # a[i] → a[3] when i is known to be 3
+    access = element(token)
+    if access is None:
+        return token
+    name, index = access
+    return f"{name}[{constants.get(index, index)}]"
+
 
 class CodeOptimizer:
-    def __init__(self, ir_file="ir.txt", optimized_file="optimized_ir.txt"):
+    def __init__(self, ir_file="ir.txt", optimized_file="optimized_ir.txt", opt_level="O1",
+                 profile=None, governor=None):
         self.ir_file = ir_file
         self.optimized_file = optimized_file
+        self.opt_level = opt_level if str(opt_level).startswith("O") else f"O{opt_level}"
         self.ir_lines = []
         self.optimized_lines = []
         self.constants = {}
+        self.cfg_stats = {}
+        self.bounds_stats = {}
+        self.profile = profile          # profile_guided.Profile from an instrumented run
+        self.pgo_stats = {}
+        self.weights = {}               # variable → profiled executions
+        self.governor = governor        # resource_governor.ResourceGovernor (optional)
+        self.pass_manager = self.build_pass_manager()
+
+    def build_pass_manager(self):
+        pm = PassManager()
+
+        pm.register_analysis("has_control_flow", has_control_flow)
+        pm.register_analysis("has_bounds_checks", has_bounds_checks)
+        pm.register_analysis("used_names", used_names)
+
+        pm.register_pass("fold_constants", self.fold_constants,
+                         invalidates=["used_names"])
+        pm.register_pass("simplify_cfg", self.simplify_cfg,
+                         requires=["has_control_flow"], depends_on=["fold_constants"],
+                         invalidates=ALL)
+        pm.register_pass("eliminate_bounds_checks", self.eliminate_bounds_checks,
+                         requires=["has_bounds_checks"], depends_on=["fold_constants"],
+                         invalidates=["used_names", "has_bounds_checks"])
+        pm.register_pass("remove_dead_temporaries", self.remove_dead_temporaries,
+                         requires=["used_names"], depends_on=["fold_constants"],
+                         invalidates=["used_names"])
+        pm.register_pass("layout_blocks", self.layout_blocks)
+        pm.register_pass("unroll_loops", self.unroll_loops, depends_on=["layout_blocks"])
+
+        # -O0: no optimisation (fast debug builds)
+        # -O1: one round of every pass
+        # -O2: repeat the passes until the IR stops changing
+        passes = ["fold_constants", "simplify_cfg", "eliminate_bounds_checks",
+                  "remove_dead_temporaries"]
+        pm.register_pipeline("O0", [])
+        pm.register_pipeline("O1", passes)
+        pm.register_pipeline("O2", passes, fixpoint=True)
+        # Run after the -O pipeline when a profile is given (--profile-use)
+        pm.register_pipeline("pgo", ["layout_blocks", "unroll_loops", "simplify_cfg"])
+        return pm
 
     def read_ir(self):
         with open(self.ir_file, "r") as f:
             self.ir_lines = [line.strip() for line in f if line.strip()]
 
-    def optimize(self):
-        self.read_ir()
+    def optimize(self, ir_lines=None):
+        # IR comes from ir_file unless the caller already holds it in memory
+        if ir_lines is None:
+            self.read_ir()
+        else:
+            self.ir_lines = [line.strip() for line in ir_lines if line.strip()]
+        self.optimized_lines = self.pass_manager.run(self.ir_lines, self.opt_level, self.governor)
+        if self.profile is not None:
+            self.apply_profile()
+
+    def apply_profile(self):
+        # The profile names blocks by label, as the instrumented build saw them
+        lines = label_blocks(self.optimized_lines)
+        if not self.profile.matches(lines):
+            print("Warning: profile does not match this program; ignoring it")
+            return
+        self.weights = variable_weights(lines, self.profile)
+        stats = self.pass_manager.stats
+        self.optimized_lines = self.pass_manager.run(lines, "pgo", self.governor)
+        self.pass_manager.stats = stats + self.pass_manager.stats
+
+    # -----------------------
+    # Passes: fn(lines, analyses) -> new lines
+    # -----------------------
+    def fold_constants(self, lines, analyses):
+        # Constant folding and propagation
+        constants = {}
+        optimized = []
+
+        # Labels, jumps or code after a RETURN give the CFG cleanup work to do
+        control_flow = False
+        bounds_checks = False
+        last = len(lines) - 1
+
+        for n, line in enumerate(lines):
+            # Labels are join points: values known on one path may differ on another
+            if line.endswith(":"):
+                control_flow = True
+                constants = {}
+                optimized.append(line)
+                continue
+
+            # Propagate constants into branch conditions so they can be folded
+            if line.startswith("IF "):
+                control_flow = True
+                cond = " ".join(constants.get(tok, tok) for tok in condition(line).split())
+                optimized.append(f"IF {cond} GOTO {jump_target(line)}")
+                continue
 
-        for line in self.ir_lines:
             if "=" in line and not line.startswith("RETURN"):
-                lhs, rhs = map(str.strip, line.split("="))
+                lhs, rhs = map(str.strip, line.split("=", 1))
+
+                # Array load / store: only the index and the stored value can
+                # be propagated; array elements are never tracked as constants
+                if "[" in line:
+                    lhs, rhs = propagate_index(lhs, constants), propagate_index(rhs, constants)
+                    if "[" in lhs:
+                        rhs = constants.get(rhs, rhs)
+                    else:
+                        constants.pop(lhs, None)
+                    optimized.append(f"{lhs} = {rhs}")
+                    continue
 
                 # Constant assignment
                 if rhs.isdigit():
-                    self.constants[lhs] = rhs
-                    self.optimized_lines.append(f"{lhs} = {rhs}")
+                    constants[lhs] = rhs
+                    optimized.append(f"{lhs} = {rhs}")
                     continue
 
                 # Constant folding: a = 2 + 3
                 parts = rhs.split()
                 if len(parts) == 3 and parts[0].isdigit() and parts[2].isdigit():
-                    value = eval(rhs)
-                    self.constants[lhs] = str(value)
-                    self.optimized_lines.append(f"{lhs} = {value}")
-                    continue
+                    value = evaluate(*parts)
+                    if value is not None:
+                        constants[lhs] = str(value)
+                        optimized.append(f"{lhs} = {value}")
+                        continue
 
                 # Constant propagation
-                if rhs in self.constants:
-                    self.optimized_lines.append(f"{lhs} = {self.constants[rhs]}")
-                    self.constants[lhs] = self.constants[rhs]
+                if rhs in constants:
+                    optimized.append(f"{lhs} = {constants[rhs]}")
+                    constants[lhs] = constants[rhs]
                     continue
 
-                self.optimized_lines.append(line)
+                # lhs no longer holds a known constant
+                constants.pop(lhs, None)
+                optimized.append(line)
+
+            # Known indices make bounds checks provable
+            elif is_bounds_check(line):
+                bounds_checks = True
+                _, index, size = line.split()
+                optimized.append(f"BOUNDS_CHECK {constants.get(index, index)} {size}")
 
             else:
-                self.optimized_lines.append(line)
+                # GOTO / RETURN / ARRAY
+                if not is_array_declaration(line):
+                    control_flow = control_flow or n != last
+                optimized.append(line)
 
-        self.remove_dead_temporaries()
+        self.constants = constants
+        # Folding never adds or removes labels, jumps or bounds checks
+        analyses.provide("has_control_flow", control_flow)
+        analyses.provide("has_bounds_checks", bounds_checks)
+        return optimized
 
-    # 🔥 FIXED DEAD CODE ELIMINATION
-    def remove_dead_temporaries(self):
-        used = set()
+    def simplify_cfg(self, lines, analyses):
+        # Branch folding, jump threading, block merging, unreachable code removal
+        if not analyses.get("has_control_flow"):
+            return lines
+        simplifier = CFGSimplifier(lines)
+        lines = simplifier.simplify()
+        for key, count in simplifier.stats.items():
+            self.cfg_stats[key] = self.cfg_stats.get(key, 0) + count
+        return lines
+
+    def eliminate_bounds_checks(self, lines, analyses):
+        # Drop array bounds checks that range analysis proves can never fail
+        if not analyses.get("has_bounds_checks"):
+            return lines
+        eliminator = BoundsCheckEliminator(lines)
+        lines = eliminator.run()
+        for key, count in eliminator.stats.items():
+            self.bounds_stats[key] = self.bounds_stats.get(key, 0) + count
+        return lines
+
+    def layout_blocks(self, lines, analyses):
+        # Hot successors fall through (profile-guided)
+        layout = BlockLayout(lines, self.profile)
+        lines = layout.run()
+        self.pgo_stats.update(layout.stats)
+        return lines
 
-        for line in self.optimized_lines:
-            if "=" in line:
-                _, rhs = line.split("=")
-                for tok in rhs.split():
-                    if tok.startswith("t"):
-                        used.add(tok)
+    def unroll_loops(self, lines, analyses):
+        # Hot loops with short bodies are unrolled 2x / 4x (profile-guided)
+        unroller = LoopUnroller(lines, self.profile)
+        lines = unroller.run()
+        self.pgo_stats.update(unroller.stats)
+        return lines
+
+    # 🔥 FIXED DEAD CODE ELIMINATION
+    def remove_dead_temporaries(self, lines, analyses):
+        used = analyses.get("used_names")
 
         final = []
-        for line in self.optimized_lines:
-            if "=" in line:
-                lhs = line.split("=")[0].strip()
-                if lhs.startswith("t") and lhs not in used:
+        for line in lines:
+            if line[0] == "t":
+                lhs = line.partition(" = ")[0]
+                if lhs not in used and TEMP.match(lhs):
                     continue  # remove dead temporary
             final.append(line)
 
-        self.optimized_lines = final
+        return final
+
+    def report(self):
+        return f"Optimization level -{self.opt_level}\n" + self.pass_manager.report()
 
     def write_optimized_ir(self):
         with open(self.optimized_file, "w") as f:
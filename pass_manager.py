@@ -0,0 +1,181 @@
+# pass_manager.py
+# A small pass manager for IR optimisation.
+#
+#  - Passes are functions  fn(ir_lines, analyses) -> new ir_lines
+#    registered with:
+#       requires    : analyses the pass reads (computed on demand, cached)
+#       depends_on  : passes that must run earlier in the same pipeline
+#       invalidates : analyses whose cached results the pass makes stale
+#                     (ALL by default)
+#  - Analyses are functions  fn(ir_lines) -> result, cached by the
+#    AnalysisManager until a pass invalidates them.
+#  - Pipelines map an optimisation level (-O0, -O1, -O2, ...) to a list of
+#    passes, optionally repeated until the IR stops changing.
+#
+# Every pass run is timed and records how many instructions it removed.
+
+import time
+
+ALL = "*"
+
+
+class AnalysisManager:
+    def __init__(self, analyses):
+        self.analyses = analyses      # name → fn(ir_lines)
+        self.cache = {}
+        self.lines = None
+
+    def reset(self, lines):
+        # Point the manager at a new IR list (drops everything cached)
+        self.lines = lines
+        self.cache = {}
+
+    def get(self, name):
+        """Result of analysis `name` for the current IR (computed once, then cached)."""
+        if name not in self.cache:
+            if name not in self.analyses:
+                raise Exception(f"Pass Manager Error: unknown analysis '{name}'")
+            self.cache[name] = self.analyses[name](self.lines)
+        return self.cache[name]
+
+    def provide(self, name, result):
+        # A pass that computed an analysis as a by-product can hand it over
+        self.cache[name] = result
+
+    def invalidate(self, names):
+        if names == ALL or ALL in names:
+            self.cache = {}
+        else:
+            for name in names:
+                self.cache.pop(name, None)
+
+
+class Pass:
+    def __init__(self, name, fn, requires=(), depends_on=(), invalidates=ALL):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+        self.depends_on = tuple(depends_on)
+        self.invalidates = invalidates if invalidates == ALL else tuple(invalidates)
+
+
+class Pipeline:
+    def __init__(self, name, passes, fixpoint=False, max_iterations=10):
+        self.name = name
+        self.passes = list(passes)
+        self.fixpoint = fixpoint
+        self.max_iterations = max_iterations
+
+
+class PassManager:
+    def __init__(self):
+        self.passes = {}
+        self.analyses = {}
+        self.pipelines = {}
+        self.stats = []
+
+    # -----------------------
+    # Registration
+    # -----------------------
+    def register_analysis(self, name, fn):
+        self.analyses[name] = fn
+
+    def register_pass(self, name, fn, requires=(), depends_on=(), invalidates=ALL):
+        self.passes[name] = Pass(name, fn, requires, depends_on, invalidates)
+
+    def register_pipeline(self, name, passes, fixpoint=False, max_iterations=10):
+        self.pipelines[name] = Pipeline(name, passes, fixpoint, max_iterations)
+
+    def resolve(self, names):
+        """
+        Order a list of pass names so every pass comes after the passes it
+        depends on, pulling in dependencies that were not listed.
+        """
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name not in self.passes:
+                raise Exception(f"Pass Manager Error: unknown pass '{name}'")
+            if name in visiting:
+                raise Exception(f"Pass Manager Error: dependency cycle at pass '{name}'")
+            visiting.add(name)
+            for dep in self.passes[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    # -----------------------
+    # Running
+    # -----------------------
+    def run(self, ir_lines, pipeline="O1", governor=None):
+        """
+        Run a registered pipeline over ir_lines.
+        A ResourceGovernor, when given, checks the IR size, the phase deadline
+        and the memory ceiling after every pass.
+        Returns the optimised IR lines; per-pass statistics end up in self.stats.
+        """
+        if pipeline not in self.pipelines:
+            raise Exception(
+                f"Pass Manager Error: unknown pipeline '{pipeline}'. "
+                f"Expected one of {sorted(self.pipelines)}"
+            )
+        spec = self.pipelines[pipeline]
+        order = self.resolve(spec.passes)
+        am = AnalysisManager(self.analyses)
+        lines = list(ir_lines)
+        am.reset(lines)
+        self.stats = []
+
+        iterations = spec.max_iterations if spec.fixpoint else 1
+        for iteration in range(1, iterations + 1):
+            changed = False
+            for name in order:
+                p = self.passes[name]
+                before = len(lines)
+                start = time.perf_counter()
+                for analysis in p.requires:
+                    am.get(analysis)
+                new_lines = p.fn(lines, am)
+                elapsed = time.perf_counter() - start
+
+                if new_lines != lines:
+                    changed = True
+                    am.invalidate(p.invalidates)
+                lines = new_lines
+                am.lines = lines
+                self.stats.append({
+                    "pass": name,
+                    "iteration": iteration,
+                    "seconds": elapsed,
+                    "instructions_before": before,
+                    "instructions_after": len(lines),
+                    "removed": before - len(lines),
+                })
+                if governor is not None:
+                    governor.check_ir(len(lines))
+            if not changed:
+                break
+        return lines
+
+    def report(self):
+        """Per-pass timing / instructions-removed table (passes summed over iterations)."""
+        totals = {}
+        for s in self.stats:
+            t = totals.setdefault(s["pass"], {"runs": 0, "seconds": 0.0, "removed": 0})
+            t["runs"] += 1
+            t["seconds"] += s["seconds"]
+            t["removed"] += s["removed"]
+        lines = [f"{'Pass'.ljust(26)}{'Runs':>5}{'Time (ms)':>12}{'Removed':>9}"]
+        lines.append("-" * 52)
+        for name, t in totals.items():
+            lines.append(
+                f"{name.ljust(26)}{t['runs']:>5}{t['seconds'] * 1000:>12.2f}{t['removed']:>9}"
+            )
+        return "\n".join(lines)
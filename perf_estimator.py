@@ -0,0 +1,293 @@
+# perf_estimator.py
+# Static performance estimate for target code (target_code.txt).
+#
+# The target program is a single function (main). For it the estimator
+# reports, as JSON:
+#   - estimated cycles per basic block, from the instruction scheduler's
+#     blocks, dependency DAG and in-order pipeline model
+#   - spills: virtual registers that do not fit in the machine's register
+#     file (ranked the way x86_backend.py hands out registers), with a
+#     reload per use and a store per definition added to the block's cost
+#   - register pressure: the most virtual registers live at once, from a
+#     liveness analysis over the block graph
+#   - loop-weighted totals: a block nested in d loops counts
+#     loop_iterations ** d times (loops are found from back edges)
+#
+# A machine description is a JSON object; missing keys keep the defaults:
+#   {"name": "small", "registers": 6, "issue_width": 1,
+#    "latencies": {"MUL": 4, "DIV": 20}, "spill_load": 3, "spill_store": 1,
+#    "loop_iterations": 10}
+#
+# The numbers are estimates for comparing builds of the same program, not
+# a prediction of wall-clock time.
+
+import argparse
+import json
+import re
+
+from instruction_scheduler import DEFAULT_LATENCIES, InstructionScheduler
+from resource_governor import CHECK_INTERVAL
+from x86_backend import ALLOCATABLE, rank_registers
+
+REGISTER = re.compile(r"R\d+$")
+
+DEFAULT_MACHINE = {
+    "name": "default",
+    "registers": len(ALLOCATABLE),  # hardware registers the x86 backend allocates
+    "issue_width": 1,
+    "latencies": DEFAULT_LATENCIES,
+    "spill_load": 3,                # reload of a spilled register
+    "spill_store": 1,               # store of a spilled register
+    "loop_iterations": 10,          # assumed trip count of every loop
+}
+
+
+def load_machine(path):
+    """Read a JSON machine description; missing keys keep their defaults."""
+    with open(path, "r") as f:
+        table = json.load(f)
+    machine = dict(DEFAULT_MACHINE)
+    for key, value in table.items():
+        if key not in DEFAULT_MACHINE:
+            raise Exception(f"Machine Error: unknown key '{key}' in {path}")
+        machine[key] = value
+    machine["latencies"] = dict(DEFAULT_LATENCIES)
+    machine["latencies"].update(
+        {op.upper(): int(cycles) for op, cycles in table.get("latencies", {}).items()}
+    )
+    for key in ("registers", "issue_width", "loop_iterations"):
+        if not isinstance(machine[key], int) or machine[key] < 1:
+            raise Exception(f"Machine Error: '{key}' must be a positive integer in {path}")
+    return machine
+
+
+class PerformanceEstimator:
+    def __init__(self, target_code, machine=None, function="main", weights=None, governor=None):
+        self.target_code = [line.strip() for line in target_code if line.strip()]
+        self.machine = dict(machine or DEFAULT_MACHINE)
+        self.function = function
+        self.weights = weights or {}    # virtual register → profile weight (as for the backend)
+        self.governor = governor        # optional ResourceGovernor, polled in the long loops
+        self.scheduler = InstructionScheduler(
+            self.target_code, self.machine["latencies"], self.machine["issue_width"],
+            governor=governor,
+        )
+        self.report_data = None
+
+    def poll(self, step):
+        if self.governor is not None and step % CHECK_INTERVAL == 0:
+            self.governor.check()
+
+    # -----------------------
+    # Block graph
+    # -----------------------
+    def block_graph(self, blocks):
+        """
+        Successor lists for the scheduler's blocks: a jump goes to its
+        label, everything but JMP / RET can also fall through.
+        """
+        by_label = {label[:-1]: n for n, (label, _) in enumerate(blocks) if label}
+        succs = []
+        for n, (_, body) in enumerate(blocks):
+            last = body[-1] if body else None
+            out = []
+            if last is not None and last.is_branch and last.opcode != "RET":
+                target = by_label.get(last.operands[-1])
+                if target is not None:
+                    out.append(target)
+            falls_through = last is None or last.opcode not in ("JMP", "RET")
+            if falls_through and n + 1 < len(blocks) and n + 1 not in out:
+                out.append(n + 1)
+            succs.append(out)
+        return succs
+
+    def loop_depths(self, succs):
+        """
+        Natural loops from the back edges of a depth-first walk from the
+        entry block. Returns (depth per block, {header: set of blocks}).
+        """
+        n = len(succs)
+        preds = [[] for _ in range(n)]
+        for b, out in enumerate(succs):
+            for s in out:
+                preds[s].append(b)
+
+        loops = {}
+        if n:
+            on_stack, visited = [False] * n, [False] * n
+            stack = [(0, iter(succs[0]))]
+            visited[0] = on_stack[0] = True
+            while stack:
+                b, it = stack[-1]
+                s = next(it, None)
+                if s is None:
+                    on_stack[b] = False
+                    stack.pop()
+                elif on_stack[s]:
+                    # Back edge b → s: s heads a loop containing everything
+                    # that reaches b without passing through s
+                    body = loops.setdefault(s, {s})
+                    work = [b]
+                    while work:
+                        self.poll(len(body))
+                        x = work.pop()
+                        if x not in body:
+                            body.add(x)
+                            work.extend(preds[x])
+                elif not visited[s]:
+                    visited[s] = on_stack[s] = True
+                    stack.append((s, iter(succs[s])))
+
+        depth = [0] * n
+        for body in loops.values():
+            for b in body:
+                depth[b] += 1
+        return depth, loops
+
+    def liveness(self, blocks, succs):
+        """
+        Virtual registers live into each block.
+        Returns (live_in, live_out) lists of sets.
+        """
+        gen, kill = [], []
+        for _, body in blocks:
+            g, k = set(), set()
+            for instr in body:
+                g.update(r for r in instr.uses if REGISTER.match(r) and r not in k)
+                k.update(r for r in instr.defs if REGISTER.match(r))
+            gen.append(g)
+            kill.append(k)
+
+        live_in = [set() for _ in blocks]
+        live_out = [set() for _ in blocks]
+        changed = True
+        while changed:
+            changed = False
+            for b in reversed(range(len(blocks))):
+                self.poll(b)
+                out = set().union(*(live_in[s] for s in succs[b]))
+                new_in = gen[b] | (out - kill[b])
+                if new_in != live_in[b] or out != live_out[b]:
+                    live_in[b], live_out[b] = new_in, out
+                    changed = True
+        return live_in, live_out
+
+    def pressure(self, body, live_out):
+        # Most registers live at once inside the block (walking backwards)
+        live = set(live_out)
+        peak = len(live)
+        for instr in reversed(body):
+            live.update(r for r in instr.defs if REGISTER.match(r))
+            peak = max(peak, len(live))
+            live.difference_update(r for r in instr.defs if REGISTER.match(r))
+            live.update(r for r in instr.uses if REGISTER.match(r))
+            peak = max(peak, len(live))
+        return peak
+
+    # -----------------------
+    # Estimate
+    # -----------------------
+    def estimate(self):
+        """
+        Estimate the program.
+        Returns the report as a dict (see write() for the JSON file).
+        """
+        machine = self.machine
+        blocks = self.scheduler.basic_blocks()
+        succs = self.block_graph(blocks)
+        depth, loops = self.loop_depths(succs)
+        _, live_out = self.liveness(blocks, succs)
+
+        ranked = rank_registers(self.target_code, self.weights)
+        spilled = set(ranked[machine["registers"]:])
+
+        block_reports = []
+        totals = {"cycles": 0, "weighted_cycles": 0, "spill_loads": 0, "spill_stores": 0}
+        for n, (label, body) in enumerate(blocks):
+            self.poll(n)
+            lat = [self.scheduler.latency(instr) for instr in body]
+            preds = self.scheduler.build_dag(body, lat)
+            cycles = self.scheduler.estimate_cycles(lat, range(len(body)), preds)
+
+            loads = sum(len({r for r in instr.uses if r in spilled}) for instr in body)
+            stores = sum(len({r for r in instr.defs if r in spilled}) for instr in body)
+            cycles += loads * machine["spill_load"] + stores * machine["spill_store"]
+
+            weight = machine["loop_iterations"] ** depth[n]
+            block_reports.append({
+                "block": label[:-1] if label else f"B{n}",
+                "instructions": len(body),
+                "cycles": cycles,
+                "loop_depth": depth[n],
+                "weighted_cycles": cycles * weight,
+                "spill_loads": loads,
+                "spill_stores": stores,
+                "register_pressure": self.pressure(body, live_out[n]),
+            })
+            totals["cycles"] += cycles
+            totals["weighted_cycles"] += cycles * weight
+            totals["spill_loads"] += loads
+            totals["spill_stores"] += stores
+
+        names = [b["block"] for b in block_reports]
+        peak = max(block_reports, key=lambda b: b["register_pressure"], default=None)
+        function = {
+            "name": self.function,
+            "instructions": sum(b["instructions"] for b in block_reports),
+            "blocks": block_reports,
+            "loops": [
+                {"header": names[h], "blocks": [names[b] for b in sorted(body)]}
+                for h, body in sorted(loops.items())
+            ],
+            **totals,
+            "virtual_registers": len(ranked),
+            "spilled_registers": [r for r in ranked if r in spilled],
+            "register_pressure": peak["register_pressure"] if peak else 0,
+            "peak_pressure_block": peak["block"] if peak else None,
+        }
+        self.report_data = {
+            "machine": machine,
+            "functions": [function],
+            "totals": {
+                **totals,
+                "spills": len(spilled),
+                "register_pressure": function["register_pressure"],
+            },
+        }
+        return self.report_data
+
+    def write(self, filename="performance.json"):
+        if self.report_data is None:
+            self.estimate()
+        with open(filename, "w") as f:
+            json.dump(self.report_data, f, indent=2)
+
+    def report(self):
+        if self.report_data is None:
+            self.estimate()
+        t = self.report_data["totals"]
+        return (
+            f"Performance estimate: {t['cycles']} cycles, {t['weighted_cycles']} loop-weighted, "
+            f"{t['spills']} spilled registers, register pressure {t['register_pressure']}"
+        )
+
+
+# Estimate an existing target_code.txt:
+#   python perf_estimator.py
+#   python perf_estimator.py target_code.txt --machine machine.json -o performance.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Static performance estimate for target code.")
+    parser.add_argument("target", nargs="?", default="target_code.txt")
+    parser.add_argument("--machine", metavar="JSON", help="machine description")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with open(args.target, "r") as f:
+        code = f.readlines()
+    machine = load_machine(args.machine) if args.machine else None
+    estimator = PerformanceEstimator(code, machine)
+    if args.output:
+        estimator.write(args.output)
+        print(estimator.report())
+    else:
+        print(json.dumps(estimator.estimate(), indent=2))
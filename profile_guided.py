@@ -0,0 +1,520 @@
+# profile_guided.py
+# Profile-guided optimisation (PGO).
+#
+#  1. Instrumented build: InstrumentedBuild turns the optimised IR into a
+#     Python program (output.py) that counts how often every basic block
+#     runs and how often every conditional jump is taken. When the program
+#     exits the counts are added to a JSON profile:
+#       {
+#         "version": 1,
+#         "fingerprint": "<sha1 of the profiled IR>",
+#         "runs": 3,
+#         "blocks":   {"B0": 3, "L1": 33, ...},
+#         "branches": {"L1": {"taken": 3, "not_taken": 30}, ...}
+#       }
+#  2. Profile use: a later compile of the same program loads the profile
+#     (the fingerprint must match) and
+#       - lays blocks out so the hottest successor of a block falls through
+#         (BlockLayout, inverting branches where that helps)
+#       - unrolls hot loops with short bodies (LoopUnroller)
+#       - ranks variables by how often they are executed (variable_weights),
+#         which the register allocator and the x86-64 backend use to keep
+#         the hottest variables in registers
+#
+# Blocks are identified by label: label_blocks() gives every unlabeled block
+# a label (B<index>) before instrumenting and before applying a profile.
+
+import hashlib
+import json
+import os
+
+from control_flow import (
+    NEGATE, build_blocks, is_conditional, is_goto, is_label, is_return,
+    condition, jump_target, literal_value,
+)
+from range_analysis import ELEMENT, element, is_bounds_check, is_array_declaration
+
+PROFILE_VERSION = 1
+
+RELATIONAL = {"<", "<=", ">", ">=", "==", "!="}
+ARITH = {"+", "-", "*"}
+
+# Loop unrolling limits
+HOT_LOOP_ITERATIONS = 64        # body must have run at least this often
+MAX_UNROLL_BODY = 16            # instructions per body copy
+MAX_UNROLL_FACTOR = 4
+
+
+def fingerprint(ir_lines):
+    return hashlib.sha1("\n".join(ir_lines).encode()).hexdigest()
+
+
+def negate(cond):
+    """Condition with the opposite outcome, or None when there is no simple one."""
+    parts = cond.split()
+    if len(parts) == 1:
+        return f"{parts[0]} == 0"
+    if len(parts) == 3 and parts[1] in NEGATE:
+        return f"{parts[0]} {NEGATE[parts[1]]} {parts[2]}"
+    return None
+
+
+# -----------------------
+# Profiles
+# -----------------------
+class Profile:
+    def __init__(self, fingerprint, blocks=None, branches=None, runs=0):
+        self.fingerprint = fingerprint
+        self.blocks = dict(blocks or {})        # block label → times executed
+        self.branches = dict(branches or {})    # block label → {"taken", "not_taken"}
+        self.runs = runs
+
+    def count(self, label):
+        return self.blocks.get(label, 0)
+
+    def taken(self, label):
+        return self.branches.get(label, {}).get("taken", 0)
+
+    def not_taken(self, label):
+        return self.branches.get(label, {}).get("not_taken", 0)
+
+    def matches(self, ir_lines):
+        return self.fingerprint == fingerprint(ir_lines)
+
+    def to_dict(self):
+        return {
+            "version": PROFILE_VERSION,
+            "fingerprint": self.fingerprint,
+            "runs": self.runs,
+            "blocks": self.blocks,
+            "branches": self.branches,
+        }
+
+
+def load_profile(path):
+    """Read a profile written by an instrumented build."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Profile Error: cannot read '{path}': {e}")
+    if data.get("version") != PROFILE_VERSION:
+        raise Exception(
+            f"Profile Error: '{path}' has version {data.get('version')}, "
+            f"expected {PROFILE_VERSION}"
+        )
+    return Profile(data["fingerprint"], data["blocks"], data["branches"], data.get("runs", 0))
+
+
+def variable_weights(ir_lines, profile):
+    """
+    Dynamic use count of every variable: how often an instruction mentioning
+    it was executed. Hot loop counters end up at the top. Arrays live in
+    memory and are not counted; their indices are.
+    """
+    weights = {}
+    for block in build_blocks(ir_lines):
+        count = profile.count(block.name)
+        if not count:
+            continue
+        for line in block.instrs:
+            if is_goto(line) or is_array_declaration(line):
+                continue
+            if is_conditional(line):
+                line = condition(line)
+            elif is_bounds_check(line) or is_return(line):
+                line = line.split(" ", 1)[1] if " " in line else ""
+            for tok in line.split():
+                access = element(tok)
+                if access is not None:
+                    tok = access[1]
+                if tok.isidentifier():
+                    weights[tok] = weights.get(tok, 0) + count
+    return weights
+
+
+# -----------------------
+# Instrumented build
+# -----------------------
+class InstrumentedBuild:
+    def __init__(self, ir_lines, profile_file="profile.json"):
+        # Labeled IR: the profile refers to blocks by label
+        self.ir_lines = [line for line in ir_lines if line]
+        self.profile_file = profile_file
+        self.blocks = build_blocks(self.ir_lines)
+        self.index = {b.label: b.index for b in self.blocks}
+        self.variables = []
+        self.arrays = {}
+        self.code = []
+
+    # ---- operands ----
+    def operand(self, tok):
+        if literal_value(tok) is not None:
+            return tok
+        if tok not in self.variables:
+            self.variables.append(tok)
+        return f"v_{tok}"
+
+    def element(self, tok):
+        name, index = ELEMENT.match(tok).groups()
+        return f"arr_{name}[{self.operand(index)}]"
+
+    def expression(self, rhs):
+        parts = rhs.split()
+        if len(parts) == 1:
+            return self.element(rhs) if "[" in rhs else self.operand(rhs)
+        if len(parts) != 3:
+            raise Exception(f"PGO Error: cannot instrument expression '{rhs}'")
+        a, op, b = self.operand(parts[0]), parts[1], self.operand(parts[2])
+        if op in ARITH:
+            return f"_wrap({a} {op} {b})"
+        if op == "/":
+            return f"_div({a}, {b})"
+        if op == "%":
+            return f"_mod({a}, {b})"
+        if op in RELATIONAL:
+            return f"int({a} {op} {b})"
+        if op == "&&":
+            return f"int(bool({a}) and bool({b}))"
+        if op == "||":
+            return f"int(bool({a}) or bool({b}))"
+        raise Exception(f"PGO Error: cannot instrument operator '{op}' in '{rhs}'")
+
+    def test(self, cond):
+        parts = cond.split()
+        if len(parts) == 1:
+            return f"{self.operand(parts[0])} != 0"
+        return self.expression(cond)
+
+    # ---- code ----
+    def emit(self, line, depth):
+        self.code.append("    " * depth + line)
+
+    def goto(self, label, depth):
+        self.emit(f"block = {self.index[label]}", depth)
+        self.emit("continue", depth)
+
+    def lower_block(self, b):
+        depth = 3
+        self.emit(f"{'if' if b.index == 0 else 'elif'} block == {b.index}:  # {b.name}", 2)
+        self.emit(f"counts[{b.index}] += 1", depth)
+        for line in b.instrs:
+            if is_array_declaration(line):
+                name, size = ELEMENT.match(line.split()[1]).groups()
+                self.arrays[name] = int(size)
+            elif is_bounds_check(line):
+                _, index, size = line.split()
+                self.emit(f"if not 0 <= {self.operand(index)} < {size}:", depth)
+                self.emit(
+                    f"raise IndexError(f\"index {{{self.operand(index)}}} out of bounds "
+                    f"for size {size}\")", depth + 1,
+                )
+            elif is_goto(line):
+                self.goto(jump_target(line), depth)
+                return
+            elif is_conditional(line):
+                self.emit(f"if {self.test(condition(line))}:", depth)
+                self.emit(f"taken[{b.index}] += 1", depth + 1)
+                self.goto(jump_target(line), depth + 1)
+            elif is_return(line):
+                value = line.split()[1] if " " in line else "0"
+                self.emit(f"return {self.operand(value)}", depth)
+                return
+            else:
+                lhs, sep, rhs = line.partition(" = ")
+                if not sep:
+                    raise Exception(f"PGO Error: cannot instrument '{line}'")
+                target = self.element(lhs) if "[" in lhs else self.operand(lhs)
+                self.emit(f"{target} = {self.expression(rhs)}", depth)
+        # Fall through to the next block (or off the end of main)
+        if b.index + 1 < len(self.blocks):
+            self.emit(f"block = {b.index + 1}", depth)
+            self.emit("continue", depth)
+        else:
+            self.emit("return 0", depth)
+
+    def generate(self):
+        """
+        Build the instrumented program.
+        Returns its source as a list of lines.
+        """
+        self.code = []
+        for b in self.blocks:
+            self.lower_block(b)
+        body = self.code
+
+        names = [b.name for b in self.blocks]
+        branches = [b.index for b in self.blocks if b.instrs and is_conditional(b.instrs[-1])]
+        header = [
+            "# Instrumented MiniLang program (python compiler.py --instrument).",
+            "# Running it adds per-block and per-branch execution counts to a profile:",
+            "#   python output.py [profile.json]",
+            "import json",
+            "import os",
+            "import sys",
+            "",
+            f"PROFILE_FILE = {self.profile_file!r}",
+            f"FINGERPRINT = {fingerprint(self.ir_lines)!r}",
+            f"BLOCKS = {names!r}",
+            f"BRANCHES = {branches!r}",
+            "",
+            "",
+            "def _wrap(x):",
+            "    # Integer results wrap to signed 64 bits, as on the target",
+            "    if isinstance(x, int) and not -2**63 <= x < 2**63:",
+            "        return (x + 2**63) % 2**64 - 2**63",
+            "    return x",
+            "",
+            "",
+            "def _div(a, b):",
+            "    # Integer division truncates toward zero, as in C",
+            "    if isinstance(a, int) and isinstance(b, int):",
+            "        q = abs(a) // abs(b)",
+            "        return _wrap(q if (a < 0) == (b < 0) else -q)",
+            "    return a / b",
+            "",
+            "",
+            "def _mod(a, b):",
+            "    return _wrap(a - _div(a, b) * b)",
+            "",
+            "",
+            "def main(counts, taken):",
+        ]
+        header += [f"    v_{name} = 0" for name in self.variables]
+        header += [f"    arr_{name} = [0] * {size}" for name, size in self.arrays.items()]
+        header += ["    block = 0", "    while True:"]
+        if not self.blocks:
+            header += ["        return 0"]
+        footer = [
+            "",
+            "",
+            "def write_profile(path, counts, taken):",
+            "    profile = {\"version\": %d, \"fingerprint\": FINGERPRINT, \"runs\": 0," % PROFILE_VERSION,
+            "               \"blocks\": {}, \"branches\": {}}",
+            "    if os.path.exists(path):",
+            "        with open(path) as f:",
+            "            old = json.load(f)",
+            "        if old.get(\"fingerprint\") == FINGERPRINT:",
+            "            profile = old      # same program: accumulate",
+            "    profile[\"runs\"] += 1",
+            "    for name, count in zip(BLOCKS, counts):",
+            "        profile[\"blocks\"][name] = profile[\"blocks\"].get(name, 0) + count",
+            "    for b in BRANCHES:",
+            "        branch = profile[\"branches\"].setdefault(BLOCKS[b], {\"taken\": 0, \"not_taken\": 0})",
+            "        branch[\"taken\"] += taken[b]",
+            "        branch[\"not_taken\"] += counts[b] - taken[b]",
+            "    with open(path, \"w\") as f:",
+            "        json.dump(profile, f, indent=2)",
+            "",
+            "",
+            "if __name__ == \"__main__\":",
+            "    path = sys.argv[1] if len(sys.argv) > 1 else PROFILE_FILE",
+            "    counts = [0] * len(BLOCKS)",
+            "    taken = [0] * len(BLOCKS)",
+            "    try:",
+            "        result = main(counts, taken)",
+            "    finally:",
+            "        write_profile(path, counts, taken)",
+            "    sys.exit(int(result) & 0xFF)",
+        ]
+        return header + body + footer
+
+    def write(self, filename="output.py"):
+        with open(filename, "w") as f:
+            f.write("\n".join(self.generate()) + "\n")
+
+
+# -----------------------
+# Block layout
+# -----------------------
+class BlockLayout:
+    def __init__(self, ir_lines, profile):
+        self.ir_lines = list(ir_lines)
+        self.profile = profile
+        self.stats = {"blocks_moved": 0, "branches_inverted": 0}
+
+    def edge_weights(self, b, blocks):
+        """{successor index: how often control went b → successor}"""
+        count = self.profile.count(b.name)
+        last = b.instrs[-1] if b.instrs else ""
+        weights = {}
+        if is_conditional(last):
+            target = self.by_label.get(jump_target(last))
+            if target is not None:
+                weights[target] = weights.get(target, 0) + self.profile.taken(b.name)
+            if b.index + 1 < len(blocks):
+                weights[b.index + 1] = weights.get(b.index + 1, 0) + self.profile.not_taken(b.name)
+        else:
+            for s in b.succs:
+                weights[s] = count
+        return weights
+
+    def run(self):
+        """
+        Reorder blocks so that hot successors follow their predecessor.
+        Returns the new IR lines (every block keeps its label).
+        """
+        blocks = build_blocks(self.ir_lines)
+        if len(blocks) < 2:
+            return self.ir_lines
+        self.by_label = {b.label: b.index for b in blocks if b.label}
+
+        # Greedy chains: follow the hottest unplaced successor; when there is
+        # none, continue with the hottest block not placed yet
+        order, placed = [], set()
+        current = 0
+        while current is not None:
+            order.append(current)
+            placed.add(current)
+            weights = self.edge_weights(blocks[current], blocks)
+            candidates = [(w, -s) for s, w in weights.items() if s not in placed and w > 0]
+            if candidates:
+                current = -max(candidates)[1]
+                continue
+            rest = [b.index for b in blocks if b.index not in placed]
+            current = max(rest, key=lambda i: (self.profile.count(blocks[i].name), -i)) if rest else None
+
+        self.stats["blocks_moved"] = sum(1 for pos, i in enumerate(order) if pos != i)
+        if order == list(range(len(blocks))):
+            return self.ir_lines
+
+        # Re-link fall-through edges broken by the new order
+        result = []
+        for pos, i in enumerate(order):
+            b = blocks[i]
+            nxt = order[pos + 1] if pos + 1 < len(order) else None
+            instrs = list(b.instrs)
+            if b.falls_through():
+                follow = i + 1 if i + 1 < len(blocks) else None
+                last = instrs[-1] if instrs else ""
+                if follow is None:
+                    # Fell off the end of main: return from wherever the block ends up
+                    if nxt is not None:
+                        instrs.append("RETURN")
+                elif follow != nxt:
+                    target = self.by_label.get(jump_target(last)) if is_conditional(last) else None
+                    inverted = negate(condition(last)) if target == nxt and target is not None else None
+                    if inverted is not None:
+                        # IF c GOTO next → IF !c GOTO follow; the taken side now falls through
+                        instrs[-1] = f"IF {inverted} GOTO {blocks[follow].label}"
+                        self.stats["branches_inverted"] += 1
+                    else:
+                        instrs.append(f"GOTO {blocks[follow].label}")
+            result.append(f"{b.label}:")
+            result.extend(instrs)
+        return result
+
+
+# -----------------------
+# Loop unrolling
+# -----------------------
+class LoopUnroller:
+    def __init__(self, ir_lines, profile):
+        self.ir_lines = list(ir_lines)
+        self.profile = profile
+        self.stats = {"loops_unrolled": 0}
+
+    def factor(self, body_count, entries, body_size):
+        # Average trip count decides how many copies pay off
+        if body_count < HOT_LOOP_ITERATIONS or entries <= 0 or body_size > MAX_UNROLL_BODY:
+            return 1
+        trips = body_count / entries
+        if trips >= 2 * MAX_UNROLL_FACTOR:
+            return MAX_UNROLL_FACTOR
+        return 2 if trips >= 2 else 1
+
+    def straight_line(self, instrs):
+        return not any(
+            is_label(line) or is_goto(line) or is_conditional(line) or is_return(line)
+            for line in instrs
+        )
+
+    def run(self):
+        """
+        Unroll hot loops of the two shapes the front end and layout produce:
+          top-tested     H: IF c GOTO X      F: body; GOTO H
+          bottom-tested  H: body; IF c GOTO H
+        Returns the new IR lines.
+        """
+        blocks = build_blocks(self.ir_lines)
+        lines_of = {b.index: b.lines() for b in blocks}
+        for h in blocks:
+            last = h.instrs[-1] if h.instrs else ""
+            if not is_conditional(last):
+                continue
+
+            # Top-tested: H holds only the exit test, F the body
+            if len(h.instrs) == 1 and h.index + 1 < len(blocks):
+                f = blocks[h.index + 1]
+                if (
+                    f.preds == [h.index] and f.instrs and is_goto(f.instrs[-1])
+                    and jump_target(f.instrs[-1]) == h.label
+                    and self.straight_line(f.instrs[:-1])
+                ):
+                    body = f.instrs[:-1]
+                    entries = self.profile.count(h.name) - self.profile.count(f.name)
+                    k = self.factor(self.profile.count(f.name), entries, len(body))
+                    if k > 1:
+                        unrolled = list(body)
+                        for _ in range(k - 1):
+                            unrolled += [last] + body
+                        lines_of[f.index] = [f"{f.label}:"] + unrolled + [f.instrs[-1]]
+                        self.stats["loops_unrolled"] += 1
+                    continue
+
+            # Bottom-tested: H jumps back to itself
+            if jump_target(last) == h.label and self.straight_line(h.instrs[:-1]):
+                body = h.instrs[:-1]
+                exit_test = negate(condition(last))
+                entries = self.profile.count(h.name) - self.profile.taken(h.name)
+                k = self.factor(self.profile.count(h.name), entries, len(body))
+                if k > 1 and exit_test is not None:
+                    exit_label = f"{h.label}_exit"
+                    unrolled = []
+                    for _ in range(k - 1):
+                        unrolled += body + [f"IF {exit_test} GOTO {exit_label}"]
+                    lines_of[h.index] = (
+                        [f"{h.label}:"] + unrolled + body + [last, f"{exit_label}:"]
+                    )
+                    self.stats["loops_unrolled"] += 1
+
+        if not self.stats["loops_unrolled"]:
+            return self.ir_lines
+        return [line for b in blocks for line in lines_of[b.index]]
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    from control_flow import label_blocks
+
+    # s = 0; for (i = 0; i < 100; i++) { if (i % 10 == 0) s = s + i; else s = s + 1; }
+    ir = label_blocks([
+        "i = 0",
+        "s = 0",
+        "L1:",
+        "IF i >= 100 GOTO L4",
+        "t1 = i % 10",
+        "IF t1 == 0 GOTO L2",
+        "s = s + 1",
+        "GOTO L3",
+        "L2:",
+        "s = s + i",
+        "L3:",
+        "i = i + 1",
+        "GOTO L1",
+        "L4:",
+        "RETURN s",
+    ])
+    InstrumentedBuild(ir, "demo_profile.json").write("demo_output.py")
+    status = subprocess.run([sys.executable, "demo_output.py"]).returncode
+    profile = load_profile("demo_profile.json")
+    print("exit status", status, "| blocks", profile.blocks)
+
+    layout = BlockLayout(ir, profile)
+    laid_out = layout.run()
+    print("\n".join(laid_out))
+    print(layout.stats, variable_weights(ir, profile))
+    os.remove("demo_output.py")
+    os.remove("demo_profile.json")
@@ -0,0 +1,386 @@
+# range_analysis.py
+# Array IR helpers, value-range analysis and bounds-check elimination.
+#
+# Array IR instructions:
+#   ARRAY a[10]           declares an array of 10 elements
+#   BOUNDS_CHECK i 10     aborts the program unless 0 <= i < 10
+#   x = a[i]              indexed load
+#   a[i] = x              indexed store
+#
+# RangeAnalysis computes an interval [lo, hi] for every variable at the
+# start of every basic block (forward dataflow over control_flow.build_blocks):
+#   - assignments evaluate their right-hand side with interval arithmetic
+#   - conditional jumps narrow intervals on each outgoing edge
+#     (IF i < n GOTO L: i < n when the jump is taken, i >= n otherwise)
+#   - once BOUNDS_CHECK i N has passed, i is known to be in [0, N-1]
+#   - at loop headers, bounds that keep growing are widened to infinity
+#     so the analysis terminates
+#   - registers are 64 bits wide and wrap around, so an interval with a
+#     bound outside [INT_MIN, INT_MAX] says nothing and becomes TOP
+# BoundsCheckEliminator then drops every check whose index is proven in range.
+
+import heapq
+import re
+
+from control_flow import (
+    NEGATE, build_blocks, is_conditional, condition, jump_target, literal_value,
+)
+
+ELEMENT = re.compile(r"(\w+)\[(\w+)\]$")
+
+TOP = (None, None)          # nothing known; None is -inf / +inf
+
+# Range of the target's 64-bit registers
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+SWAP = {"<": ">", "<=": ">=", ">": "<", ">=": "<=", "==": "==", "!=": "!="}
+BOOLEAN_OPS = {"<", "<=", ">", ">=", "==", "!=", "&&", "||"}
+
+
+# -----------------------
+# Array IR helpers
+# -----------------------
+def element(token):
+    """"a[i]" → ("a", "i"), anything else → None."""
+    m = ELEMENT.match(token)
+    return (m.group(1), m.group(2)) if m else None
+
+
+def is_bounds_check(line):
+    return line.startswith("BOUNDS_CHECK ")
+
+
+def bounds_check(line):
+    """"BOUNDS_CHECK i 10" → ("i", 10)."""
+    _, index, size = line.split()
+    return index, int(size)
+
+
+def is_array_declaration(line):
+    return line.startswith("ARRAY ")
+
+
+def has_bounds_checks(ir_lines):
+    return any(line.startswith("BOUNDS_CHECK ") for line in ir_lines)
+
+
+# -----------------------
+# Intervals
+# -----------------------
+def join(a, b):
+    lo = None if a[0] is None or b[0] is None else min(a[0], b[0])
+    hi = None if a[1] is None or b[1] is None else max(a[1], b[1])
+    return (lo, hi)
+
+
+def meet(a, b):
+    """Intersection; None when it is empty."""
+    lo = b[0] if a[0] is None else a[0] if b[0] is None else max(a[0], b[0])
+    hi = b[1] if a[1] is None else a[1] if b[1] is None else min(a[1], b[1])
+    if lo is not None and hi is not None and lo > hi:
+        return None
+    return (lo, hi)
+
+
+def widen(old, new):
+    # Keep a bound only while it is stable, otherwise give it up
+    lo = old[0] if old[0] is not None and new[0] is not None and new[0] >= old[0] else None
+    hi = old[1] if old[1] is not None and new[1] is not None and new[1] <= old[1] else None
+    return (lo, hi)
+
+
+def contains(outer, inner):
+    return (
+        outer[0] is None or (inner[0] is not None and inner[0] >= outer[0])
+    ) and (
+        outer[1] is None or (inner[1] is not None and inner[1] <= outer[1])
+    )
+
+
+def fits_machine(iv):
+    """iv itself, or TOP when a bound is outside 64 bits (the value may have wrapped)."""
+    lo, hi = iv
+    if (lo is not None and not INT_MIN <= lo <= INT_MAX) or (
+        hi is not None and not INT_MIN <= hi <= INT_MAX
+    ):
+        return TOP
+    return iv
+
+
+def truncate_div(a, b):
+    # Integer division rounding toward zero, as at run time
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def arithmetic(a, op, b):
+    return fits_machine(unbounded_arithmetic(a, op, b))
+
+
+def unbounded_arithmetic(a, op, b):
+    # Interval arithmetic on mathematical integers; see arithmetic()
+    if op in BOOLEAN_OPS:
+        return (0, 1)
+    if op == "+":
+        lo = None if a[0] is None or b[0] is None else a[0] + b[0]
+        hi = None if a[1] is None or b[1] is None else a[1] + b[1]
+        return (lo, hi)
+    if op == "-":
+        lo = None if a[0] is None or b[1] is None else a[0] - b[1]
+        hi = None if a[1] is None or b[0] is None else a[1] - b[0]
+        return (lo, hi)
+    if op == "*" and None not in a and None not in b:
+        products = [x * y for x in a for y in b]
+        return (min(products), max(products))
+    if op == "/" and b[0] == b[1] and b[0] is not None and b[0] > 0:
+        lo = None if a[0] is None else truncate_div(a[0], b[0])
+        hi = None if a[1] is None else truncate_div(a[1], b[0])
+        return (lo, hi)
+    if op == "%" and b[0] is not None and b[0] > 0 and b[1] is not None:
+        m = b[1] - 1
+        if a[0] is not None and a[0] >= 0:
+            return (0, m if a[1] is None else min(a[1], m))
+        return (-m, m)
+    return TOP
+
+
+# -----------------------
+# Range analysis
+# -----------------------
+class RangeAnalysis:
+    def __init__(self, ir_lines, widen_after=2):
+        self.blocks = build_blocks(ir_lines)
+        self.widen_after = widen_after
+        self.block_in = [None] * len(self.blocks)     # None: not (yet) reachable
+        by_label = {b.label: b.index for b in self.blocks if b.label}
+        self.jump_block = {}
+        for b in self.blocks:
+            if b.instrs and is_conditional(b.instrs[-1]):
+                self.jump_block[b.index] = by_label.get(jump_target(b.instrs[-1]))
+
+    def interval(self, state, token):
+        if token in state:
+            return state[token]
+        if token[0].isdigit() or token[0] in "-.":
+            value = literal_value(token)
+            if value is not None:
+                return fits_machine((value, value)) if isinstance(value, int) else TOP
+        return TOP
+
+    # ---- transfer functions ----
+    def step(self, state, line):
+        """Update state (in place) for one instruction."""
+        lhs, sep, rhs = line.partition(" = ")
+        if not sep:
+            if is_bounds_check(line):
+                index, size = bounds_check(line)
+                if literal_value(index) is None:
+                    state[index] = meet(self.interval(state, index), (0, size - 1)) or TOP
+            return
+        if "[" in lhs:
+            return
+        parts = rhs.split()
+        if len(parts) == 3:
+            state[lhs] = arithmetic(
+                self.interval(state, parts[0]), parts[1], self.interval(state, parts[2])
+            )
+        elif len(parts) == 1 and "[" not in rhs:
+            state[lhs] = self.interval(state, rhs)
+        else:
+            state[lhs] = TOP
+
+    def refine(self, state, cond, taken):
+        """
+        State on one edge of IF cond GOTO L.
+        Returns None when the edge can never be taken.
+        """
+        state = dict(state)
+        parts = cond.split()
+        if len(parts) == 1:
+            if literal_value(parts[0]) is not None:
+                return state
+            iv = self.interval(state, parts[0])
+            if not taken:
+                iv = meet(iv, (0, 0))
+            elif iv[0] == 0:
+                iv = meet(iv, (1, None))
+            elif iv[1] == 0:
+                iv = meet(iv, (None, -1))
+            if iv is None:
+                return None
+            state[parts[0]] = iv
+            return state
+        if len(parts) != 3 or parts[1] not in NEGATE:
+            return state
+
+        a, op, b = parts
+        if not taken:
+            op = NEGATE[op]
+        for name, rel, other in ((a, op, b), (b, SWAP[op], a)):
+            if literal_value(name) is not None:
+                continue
+            iv = self.interval(state, name)
+            o = self.interval(state, other)
+            if rel == "<" and o[1] is not None:
+                iv = meet(iv, (None, o[1] - 1))
+            elif rel == "<=":
+                iv = meet(iv, (None, o[1]))
+            elif rel == ">" and o[0] is not None:
+                iv = meet(iv, (o[0] + 1, None))
+            elif rel == ">=":
+                iv = meet(iv, (o[0], None))
+            elif rel == "==":
+                iv = meet(iv, o)
+            elif rel == "!=" and o[0] is not None and o[0] == o[1]:
+                if iv[0] == o[0]:
+                    iv = meet(iv, (o[0] + 1, None))
+                elif iv[1] == o[0]:
+                    iv = meet(iv, (None, o[0] - 1))
+            if iv is None:
+                return None
+            state[name] = iv
+        return state
+
+    def block_out(self, b, state):
+        state = dict(state)
+        for line in self.blocks[b].instrs:
+            self.step(state, line)
+        return state
+
+    def edge(self, p, s, out):
+        """State flowing along the CFG edge p → s."""
+        block = self.blocks[p]
+        if p not in self.jump_block:
+            return out
+        cond = condition(block.instrs[-1])
+        taken = self.jump_block[p] == s
+        falls = s == p + 1
+        if taken and falls:
+            return out      # both edges lead here: nothing learned
+        return self.refine(out, cond, taken)
+
+    def merge(self, states):
+        merged = None
+        for state in states:
+            if state is None:
+                continue
+            if merged is None:
+                merged = dict(state)
+                continue
+            # A variable missing on either side is unknown (TOP) after the join
+            merged = {
+                name: join(iv, state[name]) for name, iv in merged.items() if name in state
+            }
+        return merged
+
+    def analyze(self):
+        """
+        Compute the state at the start of every block.
+        Returns the list of per-block states (None for unreachable blocks).
+        """
+        if not self.blocks:
+            return self.block_in
+        headers = {
+            b.index for b in self.blocks if any(p >= b.index for p in b.preds)
+        }
+        visits = [0] * len(self.blocks)
+        block_out = [None] * len(self.blocks)
+        self.block_in[0] = {}
+        worklist = [0]          # heap of block indexes, visited in program order
+        queued = {0}
+        while worklist:
+            b = heapq.heappop(worklist)
+            queued.discard(b)
+            if b == 0:
+                new_in = self.merge(
+                    [{}] + [self.edge(p, 0, block_out[p]) for p in self.blocks[0].preds
+                            if block_out[p] is not None]
+                )
+            else:
+                new_in = self.merge(
+                    self.edge(p, b, block_out[p]) for p in self.blocks[b].preds
+                    if block_out[p] is not None
+                )
+            if new_in is None:
+                continue
+            old_in = self.block_in[b]
+            if b in headers and old_in is not None and visits[b] >= self.widen_after:
+                new_in = {
+                    name: widen(iv, new_in[name]) for name, iv in old_in.items() if name in new_in
+                }
+            if old_in == new_in and block_out[b] is not None:
+                continue
+            visits[b] += 1
+            self.block_in[b] = new_in
+            block_out[b] = self.block_out(b, new_in)
+            for s in self.blocks[b].succs:
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(worklist, s)
+        return self.block_in
+
+
+# -----------------------
+# Bounds-check elimination
+# -----------------------
+class BoundsCheckEliminator:
+    def __init__(self, ir_lines):
+        self.ir_lines = list(ir_lines)
+        self.stats = {"checks_removed": 0, "checks_kept": 0}
+
+    def run(self):
+        """
+        Remove every BOUNDS_CHECK whose index is proven to be in range.
+        Returns the new IR lines.
+        """
+        lines = self.ir_lines
+        if not has_bounds_checks(lines):
+            return lines
+        analysis = RangeAnalysis(lines)
+        # Straight-line code is a single block: the walk below is the analysis
+        states = analysis.analyze() if len(analysis.blocks) > 1 else [{}]
+        result = []
+        for block, state in zip(analysis.blocks, states):
+            if block.label:
+                result.append(f"{block.label}:")
+            state = dict(state) if state is not None else None
+            for line in block.instrs:
+                if state is not None and is_bounds_check(line):
+                    index, size = bounds_check(line)
+                    if contains((0, size - 1), analysis.interval(state, index)):
+                        self.stats["checks_removed"] += 1
+                        analysis.step(state, line)
+                        continue
+                    self.stats["checks_kept"] += 1
+                if state is not None:
+                    analysis.step(state, line)
+                result.append(line)
+        self.ir_lines = result
+        return result
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    ir = [
+        "ARRAY a[10]",
+        "ARRAY b[10]",
+        "i = 0",
+        "L1:",
+        "IF i >= 10 GOTO L2",
+        "BOUNDS_CHECK i 10",        # removed: i in [0, 9] inside the loop
+        "t1 = a[i]",
+        "t2 = i + 1",
+        "BOUNDS_CHECK t2 10",       # kept: t2 can be 10
+        "b[t2] = t1",
+        "BOUNDS_CHECK i 10",        # removed: same index as the first check
+        "b[i] = t1",
+        "i = t2",
+        "GOTO L1",
+        "L2:",
+        "BOUNDS_CHECK 3 10",        # removed: constant index
+        "x = a[3]",
+        "RETURN x",
+    ]
+    eliminator = BoundsCheckEliminator(ir)
+    print("\n".join(eliminator.run()))
+    print(eliminator.stats)
@@ -1,13 +1,18 @@
 # register_allocator.py
+from control_flow import is_conditional, condition, jump_target
+from range_analysis import element, is_bounds_check
 
 class RegisterAllocator:
-    def __init__(self, ir_file="optimized_ir.txt", reg_file="reg_ir.txt"):
+    def __init__(self, ir_file="optimized_ir.txt", reg_file="reg_ir.txt", priorities=None):
         self.ir_file = ir_file
         self.reg_file = reg_file
         self.ir_lines = []
         self.register_map = {}
         self.register_count = 0
         self.reg_ir = []
+        # Variable → weight (e.g. executions from a profile); heavier variables
+        # are numbered first so a backend with few registers keeps them
+        self.priorities = priorities or {}
 
     def new_register(self):
         self.register_count += 1
@@ -17,15 +22,61 @@ class RegisterAllocator:
         with open(self.ir_file, "r") as f:
             self.ir_lines = [line.strip() for line in f if line.strip()]
 
-    def allocate(self):
-        self.read_ir()
+    def map_operand(self, tok):
+        # Variables and temporaries get registers; literals and operators stay as-is
+        if tok.isidentifier():
+            if tok not in self.register_map:
+                self.register_map[tok] = self.new_register()
+            return self.register_map[tok]
+        return tok
+
+    def map_access(self, tok):
+        # Arrays stay in memory: only the index of a[i] gets a register
+        access = element(tok)
+        if access is None:
+            return self.map_operand(tok)
+        name, index = access
+        return f"{name}[{self.map_operand(index)}]"
+
+    def allocate(self, ir_lines=None):
+        if ir_lines is None:
+            self.read_ir()
+        else:
+            self.ir_lines = [line.strip() for line in ir_lines if line.strip()]
+
+        for var in sorted(self.priorities, key=lambda v: -self.priorities[v]):
+            self.map_operand(var)
 
         for line in self.ir_lines:
+            if line.startswith(("IF ", "RETURN ")):
+                # Branch: IF a < b GOTO L1 → IF R1 < R2 GOTO L1
+                if is_conditional(line):
+                    cond = " ".join(self.map_operand(tok) for tok in condition(line).split())
+                    self.reg_ir.append(f"IF {cond} GOTO {jump_target(line)}")
+                    continue
+
+                # Return: RETURN x → RETURN R1
+                if line.startswith("RETURN "):
+                    self.reg_ir.append(f"RETURN {self.map_operand(line.split()[1])}")
+                    continue
+
+            # Bounds check: BOUNDS_CHECK i 10 → BOUNDS_CHECK R1 10
+            if is_bounds_check(line):
+                _, index, size = line.split()
+                self.reg_ir.append(f"BOUNDS_CHECK {self.map_operand(index)} {size}")
+                continue
+
             if "=" not in line:
                 self.reg_ir.append(line)
                 continue
 
-            lhs, rhs = map(str.strip, line.split("="))
+            lhs, rhs = map(str.strip, line.split("=", 1))
+
+            # Array access: a[i] = x → a[R1] = R2,  x = a[i] → R2 = a[R1]
+            if "[" in line:
+                lhs, rhs = self.map_access(lhs), self.map_access(rhs)
+                self.reg_ir.append(f"{lhs} = {rhs}")
+                continue
 
             # Assign register to lhs if not exists
             if lhs not in self.register_map:
@@ -0,0 +1,188 @@
+# resource_governor.py
+# Budgets for compiling untrusted sources.
+#
+# A ResourceGovernor carries the limits for one compile:
+#   max_source_bytes     size of the source text
+#   max_tokens           tokens produced by the lexer
+#   max_ir_instructions  IR lines after IR generation and after every pass
+#   phase_deadline       wall-clock seconds per compiler phase
+#   max_memory           bytes allocated since the compile started (tracemalloc)
+# Any limit left as None is not enforced.
+#
+# The checks are cooperative: the loops of the lexer, semantic analysis,
+# IR generation, the scheduler, the x86 backend and the performance
+# estimator poll the governor every CHECK_INTERVAL steps, and the pass
+# manager (after every pass) and the compiler driver call into it. A breach raises
+# BudgetExceeded, which says which phase, which resource, the limit and
+# the value that broke it.
+#
+# tracemalloc is process-wide: with several compiles running in one
+# process the memory figure covers all of them, so the ceiling is a
+# limit for the worker rather than for a single request.
+
+import threading
+import time
+import tracemalloc
+
+# Long loops look at the clock / memory once per this many steps
+CHECK_INTERVAL = 1024
+
+# tracemalloc is shared by every governor in the process
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, phase, resource, limit, actual):
+        self.phase = phase
+        self.resource = resource
+        self.limit = limit
+        self.actual = actual
+        super().__init__(
+            f"Resource Error (phase {phase}): {resource} {actual} exceeds the limit of {limit}"
+        )
+
+    def to_dict(self):
+        return {
+            "phase": self.phase,
+            "resource": self.resource,
+            "limit": self.limit,
+            "actual": self.actual,
+        }
+
+
+class ResourceGovernor:
+    def __init__(self, max_source_bytes=None, max_tokens=None, max_ir_instructions=None,
+                 phase_deadline=None, max_memory=None):
+        self.max_source_bytes = max_source_bytes
+        self.max_tokens = max_tokens
+        self.max_ir_instructions = max_ir_instructions
+        self.phase_deadline = phase_deadline
+        self.max_memory = max_memory
+
+        self.phase = None
+        self.deadline = None
+        self.phase_started = None
+        self.memory_base = 0
+        self.tracing = False
+        self.phases = []            # [{"phase", "seconds"}] for finished phases
+
+    # -----------------------
+    # Lifetime
+    # -----------------------
+    def start(self):
+        """Start measuring memory (only when a memory ceiling is set)."""
+        global _tracing_users
+        if self.max_memory is None or self.tracing:
+            return
+        with _tracing_lock:
+            if _tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracing_users += 1
+        self.tracing = True
+        self.memory_base = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        global _tracing_users
+        self.end_phase()
+        if not self.tracing:
+            return
+        with _tracing_lock:
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+        self.tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # -----------------------
+    # Phases
+    # -----------------------
+    def begin_phase(self, name):
+        """Finish the current phase and start the clock for the next one."""
+        if self.phase is not None:
+            self.check()        # the phase that just ran must have kept its budget
+        self.end_phase()
+        self.start()
+        self.phase = name
+        self.phase_started = time.perf_counter()
+        if self.phase_deadline is not None:
+            self.deadline = self.phase_started + self.phase_deadline
+
+    def end_phase(self):
+        if self.phase is None:
+            return
+        self.phases.append({
+            "phase": self.phase,
+            "seconds": time.perf_counter() - self.phase_started,
+        })
+        self.phase = None
+        self.deadline = None
+
+    # -----------------------
+    # Checks
+    # -----------------------
+    def exceeded(self, resource, limit, actual):
+        raise BudgetExceeded(self.phase or "setup", resource, limit, actual)
+
+    def check(self):
+        """Deadline and memory ceiling; cheap enough to call from inner loops."""
+        if self.deadline is not None:
+            now = time.perf_counter()
+            if now > self.deadline:
+                self.exceeded(
+                    "wall-clock seconds", self.phase_deadline,
+                    round(now - self.phase_started, 4),
+                )
+        if self.tracing:
+            used = tracemalloc.get_traced_memory()[0] - self.memory_base
+            if used > self.max_memory:
+                self.exceeded("memory bytes", self.max_memory, used)
+
+    def check_source(self, code):
+        size = len(code.encode("utf-8")) if isinstance(code, str) else len(code)
+        if self.max_source_bytes is not None and size > self.max_source_bytes:
+            self.exceeded("source bytes", self.max_source_bytes, size)
+
+    def check_tokens(self, count):
+        if self.max_tokens is not None and count > self.max_tokens:
+            self.exceeded("tokens", self.max_tokens, count)
+        self.check()
+
+    def check_ir(self, count):
+        if self.max_ir_instructions is not None and count > self.max_ir_instructions:
+            self.exceeded("IR instructions", self.max_ir_instructions, count)
+        self.check()
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    governor = ResourceGovernor(max_tokens=100, phase_deadline=0.05, max_memory=1 << 20)
+    with governor:
+        governor.begin_phase("lex")
+        governor.check_tokens(50)
+        try:
+            governor.check_tokens(500)
+        except BudgetExceeded as e:
+            print(e, e.to_dict())
+
+        governor.begin_phase("optimize")
+        try:
+            while True:
+                governor.check()
+        except BudgetExceeded as e:
+            print(e)
+
+        governor.begin_phase("allocate")
+        try:
+            hog = [bytearray(1024) for _ in range(4096)]
+            governor.check()
+        except BudgetExceeded as e:
+            print(e)
+    print(governor.phases)
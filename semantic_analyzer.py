@@ -1,4 +1,11 @@
 # semantic_analyzer.py
+from xref_index import XrefIndex
+
+# .bss is addressed %rip-relative, so all arrays together stay well inside
+# its 2 GiB reach; sizes and offsets then always fit in an imm32
+MAX_ARRAY_BYTES = 2**30
+
+
 class SemanticAnalyzer:
     def __init__(self):
         """
@@ -9,10 +16,14 @@ class SemanticAnalyzer:
             value: assigned value / temp register
             declared_at: declaration line number
             last_updated: last assignment line number
+            size: number of elements (arrays only)
         }
         """
         self.symbols = {}
         self.current_scope = "main"
+        self.array_bytes = 0    # storage of the arrays declared so far
+        # Every declaration, definition and use site (see xref_index.py)
+        self.xref = XrefIndex()
 
     def declare(self, name, vtype, lineno):
         """
@@ -31,6 +42,71 @@ class SemanticAnalyzer:
             "last_updated": None
         }
 
+    def declare_array(self, name, vtype, size, lineno):
+        """
+        Declare a fixed-size array: int a[10];
+        size is the text of the integer literal. All arrays together must
+        fit in MAX_ARRAY_BYTES (8 bytes per element).
+        """
+        # Compare digit counts first: int() refuses very long literals
+        digits = size.lstrip("0") or "0"
+        limit = (MAX_ARRAY_BYTES - self.array_bytes) // 8
+        if len(digits) > len(str(limit)) or int(digits) > limit:
+            raise Exception(
+                f"Semantic Error (line {lineno}): Array '{name}' is too large "
+                f"(at most {limit} more elements fit)."
+            )
+        size = int(digits)
+        if size <= 0:
+            raise Exception(
+                f"Semantic Error (line {lineno}): Array '{name}' must have a positive size."
+            )
+        self.declare(name, vtype, lineno)
+        self.symbols[name]["size"] = size
+        self.array_bytes += 8 * size
+
+    def is_array(self, name):
+        return "size" in self.symbols.get(name, {})
+
+    def check_index(self, name, index, lineno=None):
+        """
+        Check an indexed access a[index]. Constant indices are range-checked
+        here; variable indices are checked at run time.
+        """
+        info = self.lookup(name, lineno)
+        if "size" not in info:
+            raise Exception(
+                f"Semantic Error (line {lineno}): '{name}' is not an array."
+            )
+        if str(index).isdigit():
+            if int(index) >= info["size"]:
+                raise Exception(
+                    f"Semantic Error (line {lineno}): Index {index} out of bounds "
+                    f"for array '{name}' of size {info['size']}."
+                )
+        elif str(index).isidentifier():
+            self.lookup(index, lineno)
+        else:
+            raise Exception(
+                f"Semantic Error (line {lineno}): Array index must be a variable "
+                f"or an integer literal, got '{index}'."
+            )
+        return info
+
+    def assign_element(self, name, index, value=None, vtype=None, lineno=None):
+        """
+        Assign a value to an array element: a[index] = value.
+        """
+        info = self.check_index(name, index, lineno)
+
+        if vtype and info["type"] != vtype:
+            raise Exception(
+                f"Semantic Error (line {lineno}): Type mismatch for '{name}[{index}]'. "
+                f"Expected '{info['type']}', got '{vtype}'."
+            )
+
+        info["last_updated"] = lineno
+
     def assign(self, name, value=None, vtype=None, lineno=None):
         """
         Assign a value to a variable.
@@ -40,6 +116,12 @@ class SemanticAnalyzer:
                 f"Semantic Error (line {lineno}): Variable '{name}' not declared."
             )
 
+        if "size" in self.symbols[name]:
+            raise Exception(
+                f"Semantic Error (line {lineno}): Cannot assign to array '{name}' "
+                f"as a whole; assign its elements instead."
+            )
+
         # Type checking
         if vtype and self.symbols[name]["type"] != vtype:
             raise Exception(
@@ -50,6 +132,13 @@ class SemanticAnalyzer:
         self.symbols[name]["value"] = value
         self.symbols[name]["last_updated"] = lineno
 
+    def reference(self, name, kind, lineno, col, stmt):
+        """
+        Record a reference to name: kind is "decl", "def" or "use",
+        stmt the id of the statement it appears in.
+        """
+        self.xref.add(name, kind, lineno, col, stmt)
+
     def lookup(self, name, lineno=None):
         """
         Lookup a variable in the symbol table.
@@ -70,8 +159,9 @@ class SemanticAnalyzer:
             )
             f.write("-" * 70 + "\n")
             for name, info in self.symbols.items():
+                vtype = f"{info['type']}[{info['size']}]" if "size" in info else info["type"]
                 f.write(
-                    f"{name}\t{info['type']}\t{info['scope']}\t"
+                    f"{name}\t{vtype}\t{info['scope']}\t"
                     f"{info['value']}\t{info['declared_at']}\t"
                     f"{info['last_updated']}\n"
                 )
@@ -84,7 +174,11 @@ if __name__ == "__main__":
         analyzer.declare("y", "float", 2)     # Declare variable y of type float at line 2
         analyzer.assign("x", 10, "int", 3)    # Assign value 10 to x at line 3
         analyzer.assign("y", 3.14, "float", 4) # Assign value 3.14 to y at line 4
+        analyzer.declare_array("a", "int", "10", 5)    # int a[10]; at line 5
+        analyzer.assign_element("a", "x", 1, "int", 6)  # a[x] = 1; at line 6
         analyzer.lookup("x")                  # Check info of variable x
+        analyzer.reference("x", "use", 6, 3, 5)  # x read in a[x] at line 6
+        print(analyzer.xref.uses("x"))
         analyzer.write_symbol_table()         # Save the symbol table to a file
         print("Semantic analysis completed successfully!")
     except Exception as e:
@@ -1,3 +1,11 @@
+from control_flow import LITERAL
+from range_analysis import element
+
+# IR operator → target opcode
+ARITH_OPS = {"+": "ADD", "-": "SUB", "*": "MUL", "/": "DIV", "%": "MOD"}
+COMPARE_OPS = {"<": "LT", "<=": "LE", ">": "GT", ">=": "GE", "==": "EQ", "!=": "NE"}
+
+
 class TargetCodeGenerator:
     def __init__(self, ir_file, target_file):
         self.ir_file = ir_file
@@ -15,21 +23,97 @@ class TargetCodeGenerator:
             self.registers[var] = self.new_register()
         return self.registers[var]
 
-    def generate(self):
-        with open(self.ir_file, "r") as f:
-            lines = f.readlines()
+    def operand(self, value):
+        # Literals are used as immediates, everything else lives in a register
+        return value if LITERAL.match(value) else self.get_register(value)
+
+    def generate(self, ir_lines=None):
+        if ir_lines is None:
+            with open(self.ir_file, "r") as f:
+                ir_lines = f.readlines()
+        lines = ir_lines
 
         for line in lines:
             line = line.strip()
-            if not line or "=" not in line:
+            if not line:
+                continue
+
+            parts = line.split()
+
+            # Label: L1:
+            if len(parts) == 1 and line.endswith(":"):
+                self.target_code.append(line)
+                continue
+
+            # Unconditional jump: GOTO L1
+            if parts[0] == "GOTO":
+                self.target_code.append(f"JMP {parts[1]}")
+                continue
+
+            # Conditional jump: IF a < b GOTO L1  /  IF t1 GOTO L1
+            if parts[0] == "IF" and parts[-2] == "GOTO":
+                cond, label = parts[1:-2], parts[-1]
+                if len(cond) == 3 and cond[1] in COMPARE_OPS:
+                    self.target_code.append(f"CMP {self.operand(cond[0])}, {self.operand(cond[2])}")
+                    self.target_code.append(f"J{COMPARE_OPS[cond[1]]} {label}")
+                else:
+                    self.target_code.append(f"CMP {self.operand(' '.join(cond))}, 0")
+                    self.target_code.append(f"JNE {label}")
+                continue
+
+            # Array declaration: ARRAY a[10]
+            if parts[0] == "ARRAY":
+                name, size = element(parts[1])
+                self.target_code.append(f"ARRAY {name}, {size}")
+                continue
+
+            # Bounds check: BOUNDS_CHECK i 10
+            if parts[0] == "BOUNDS_CHECK":
+                self.target_code.append(f"BOUND {self.operand(parts[1])}, {parts[2]}")
+                continue
+
+            # Return: RETURN x
+            if parts[0] == "RETURN":
+                if len(parts) > 1:
+                    self.target_code.append(f"RET {self.operand(parts[1])}")
+                else:
+                    self.target_code.append("RET")
+                continue
+
+            if "=" not in line:
                 continue
 
-            lhs, rhs = map(str.strip, line.split("="))
+            lhs, rhs = map(str.strip, line.split("=", 1))
+
+            # Indexed store: a[i] = x
+            store = element(lhs)
+            if store:
+                name, index = store
+                self.target_code.append(
+                    f"STOREX {name}, {self.operand(index)}, {self.operand(rhs)}"
+                )
+                continue
 
             lhs_reg = self.get_register(lhs)
 
+            # Indexed load: x = a[i]
+            load = element(rhs)
+            if load:
+                name, index = load
+                self.target_code.append(f"LOADX {lhs_reg}, {name}, {self.operand(index)}")
+                continue
+            rhs_parts = rhs.split()
+
+            # Binary operation: x = a + b  /  x = a < b
+            if len(rhs_parts) == 3 and (rhs_parts[1] in ARITH_OPS or rhs_parts[1] in COMPARE_OPS):
+                a, op, b = rhs_parts
+                opcode = ARITH_OPS.get(op) or f"SET{COMPARE_OPS[op]}"
+                self.target_code.append(
+                    f"{opcode} {lhs_reg}, {self.operand(a)}, {self.operand(b)}"
+                )
+
             # Constant assignment
-            if rhs.isdigit():
+            elif LITERAL.match(rhs):
                 self.target_code.append(f"LOAD {lhs_reg}, {rhs}")
 
             # Variable assignment
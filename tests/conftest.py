@@ -0,0 +1,29 @@
+import os
+import sys
+
+# The compiler modules live at the top of the repository
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+
+from control_flow import label_blocks
+from profile_guided import InstrumentedBuild
+
+
+def execute(ir_lines):
+    """
+    Run IR through the instrumented Python build (no profile is written).
+    Returns main's return value; a failed bounds check raises IndexError.
+    """
+    build = InstrumentedBuild(label_blocks(ir_lines), profile_file=None)
+    namespace = {"__name__": "ir_program"}
+    exec("\n".join(build.generate()), namespace)
+    blocks = len(namespace["BLOCKS"])
+    return namespace["main"]([0] * blocks, [0] * blocks)
+
+
+@pytest.fixture
+def run_ir():
+    return execute
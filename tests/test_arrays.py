@@ -0,0 +1,28 @@
+import pytest
+
+from compiler import compile_source
+from semantic_analyzer import MAX_ARRAY_BYTES
+from x86_backend import X86Backend
+
+
+@pytest.mark.parametrize("size", ["9" * 5000, "3000000000", "100000000"])
+def test_oversized_array_is_a_semantic_error(size):
+    # Too many digits for int(), too large for an imm32, two arrays past .bss
+    source = f"int main() {{ int b[100000000]; int a[{size}]; return 0; }}"
+    result = compile_source(source)
+    assert any("Array 'a' is too large" in e for e in result["semantic_errors"])
+    assert not any(line.startswith("ARRAY a") for line in result["ir"])
+
+
+def test_array_size_comes_from_semantic_analysis(run_ir):
+    result = compile_source("int main() { int a[007]; a[6] = 5; return a[6]; }")
+    assert result["semantic_errors"] == []
+    assert result["ir"][:2] == ["ARRAY a[7]", "BOUNDS_CHECK 6 7"]
+    assert run_ir(result["optimized_ir"]) == 5
+
+
+def test_backend_rejects_arrays_past_the_limit():
+    elements = MAX_ARRAY_BYTES // 8
+    backend = X86Backend([f"ARRAY a, {elements}", "ARRAY b, 1", "RET 0"])
+    with pytest.raises(Exception, match="x86 Backend Error \\(instruction 2\\)"):
+        backend.generate()
@@ -0,0 +1,51 @@
+import pytest
+
+from artifacts import (
+    IR_RAW, IRArtifactReader, TokenArtifactReader, encode_ir_line, export_ir_text,
+    is_artifact, open_artifact, write_ir_artifact, write_token_artifact,
+)
+from compiler import compile_source
+from program_generator import generate_program
+
+
+def test_token_stream_round_trips(tmp_path):
+    tokens = compile_source(generate_program("mixed", 200, 3))["tokens"]
+    tokens.append(("STRING_LITERAL", "\"héllo ✓\"", 99, 7))
+    path = str(tmp_path / "tokens.bin")
+    write_token_artifact(tokens, path)
+    assert is_artifact(path)
+    with open_artifact(path) as reader:
+        assert isinstance(reader, TokenArtifactReader)
+        assert len(reader) == len(tokens)
+        assert list(reader) == tokens
+        # Random access decodes single records
+        assert reader[len(tokens) // 2] == tokens[len(tokens) // 2]
+        assert reader[-1] == tokens[-1]
+        assert reader[3:6] == tokens[3:6]
+        with pytest.raises(IndexError):
+            reader[len(tokens)]
+
+
+def test_ir_round_trips_including_lines_it_cannot_split(tmp_path):
+    ir = compile_source(generate_program("branches", 200, 3))["optimized_ir"]
+    odd = ["ARRAY a[10]", "BOUNDS_CHECK i 10", "x  =  y", "RETURN", "t1 = a[i]", ""]
+    assert encode_ir_line("x  =  y")[0] == IR_RAW
+    lines = ir + odd
+    path = tmp_path / "ir.bin"
+    write_ir_artifact(lines, str(path))
+    with IRArtifactReader(str(path)) as reader:
+        assert list(reader) == lines
+    export_ir_text(str(path), str(tmp_path / "ir.txt"))
+    assert (tmp_path / "ir.txt").read_text().split("\n")[:-1] == lines
+
+
+def test_reader_checks_the_artifact_kind(tmp_path):
+    path = str(tmp_path / "ir.bin")
+    write_ir_artifact(["RETURN"], path)
+    with pytest.raises(Exception, match="expected 1"):
+        TokenArtifactReader(path)
+    text = tmp_path / "ir.txt"
+    text.write_text("RETURN\n")
+    assert not is_artifact(str(text))
+    with pytest.raises(Exception, match="not a MiniLang artifact"):
+        open_artifact(str(text))
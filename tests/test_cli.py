@@ -0,0 +1,91 @@
+import pytest
+
+from artifacts import write_token_artifact
+from cli import EXIT_ERROR, EXIT_NO_MATCH, EXIT_OK, TextSource, main
+from compiler import compile_source
+
+
+def test_invalid_grep_pattern_is_a_usage_error(tmp_path, capsys):
+    artifact = tmp_path / "ir.txt"
+    artifact.write_text("x = 1\n")
+    assert main(["ir", "--file", str(artifact), "--grep", "("]) == EXIT_ERROR
+    err = capsys.readouterr().err
+    assert err.startswith("cli: invalid --grep pattern") and err.count("\n") == 1
+
+
+@pytest.mark.parametrize("option", ["--head", "--tail"])
+def test_negative_line_count_is_a_usage_error(tmp_path, capsys, option):
+    artifact = tmp_path / "ir.txt"
+    artifact.write_text("x = 1\n")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["ir", "--file", str(artifact), option, "-1"])
+    assert exit_info.value.code == EXIT_ERROR
+    assert "invalid line count '-1'" in capsys.readouterr().err
+
+
+def write_lines(path, count):
+    path.write_text("".join(f"line {n}\n" for n in range(1, count + 1)))
+
+
+def test_tail_and_range_use_the_cached_line_index(tmp_path, capsys, monkeypatch):
+    artifact = tmp_path / "ir.txt"
+    write_lines(artifact, 1000)
+    assert main(["ir", "--file", str(artifact), "--tail", "2", "-n"]) == EXIT_OK
+    assert capsys.readouterr().out == "999:line 999\n1000:line 1000\n"
+    assert (tmp_path / "ir.txt.idx").exists()
+
+    # A second run reads the index instead of scanning the file again
+    def rebuild(self, st):
+        raise AssertionError("index rebuilt")
+    monkeypatch.setattr(TextSource, "_build_index", rebuild)
+    assert main(["ir", "--file", str(artifact), "--range", "500:501"]) == EXIT_OK
+    assert capsys.readouterr().out == "line 500\nline 501\n"
+    monkeypatch.undo()
+
+    # Changing the file invalidates the index
+    write_lines(artifact, 1200)
+    assert main(["ir", "--file", str(artifact), "--tail", "1"]) == EXIT_OK
+    assert capsys.readouterr().out == "line 1200\n"
+    source = TextSource(str(artifact))
+    assert source.count() == 1200 and list(source.lines(1200)) == [(1200, "line 1200")]
+
+
+def test_filters_and_counts(tmp_path, capsys):
+    artifact = tmp_path / "ir.txt"
+    write_lines(artifact, 30)
+    assert main(["ir", "--file", str(artifact), "-g", "LINE 2", "-i", "--head", "3"]) == EXIT_OK
+    assert capsys.readouterr().out == "line 2\nline 20\nline 21\n"
+    assert main(["ir", "--file", str(artifact), "-g", "2", "-v", "-c"]) == EXIT_OK
+    assert capsys.readouterr().out == "18\n"
+    assert main(["ir", "--file", str(artifact), "-g", "nothing"]) == EXIT_NO_MATCH
+    assert main(["ir", "--file", str(tmp_path / "missing.txt")]) == EXIT_ERROR
+
+
+def test_binary_artifacts_are_viewed_record_by_record(tmp_path, capsys):
+    tokens = [("INT", "int", 1, 1), ("IDENTIFIER", "main", 1, 5), ("SYMBOL", "(", 1, 9)]
+    artifact = str(tmp_path / "tokens.bin")
+    write_token_artifact(tokens, artifact)
+    assert main(["tokens", "--file", artifact, "--tail", "2"]) == EXIT_OK
+    assert capsys.readouterr().out == "<1, 5> <IDENTIFIER, main>\n<1, 9> <SYMBOL, (>\n"
+
+
+def test_xref_subcommand(tmp_path, capsys):
+    source = "int main() {\n    int x = 5;\n    int y = x + 1;\n    x = y;\n    return x;\n}\n"
+    path = str(tmp_path / "xref.json")
+    compile_source(source)["analyzer"].xref.write(path)
+
+    assert main(["xref", "x", "--file", path]) == EXIT_OK
+    assert capsys.readouterr().out.splitlines() == [
+        "2:9\tdecl\tx\tstmt 0",
+        "2:9\tdef\tx\tstmt 0",
+        "3:13\tuse\tx\tstmt 1",
+        "4:5\tdef\tx\tstmt 2",
+        "5:12\tuse\tx\tstmt 3",
+    ]
+    assert main(["xref", "x", "--kind", "def", "--file", path]) == EXIT_OK
+    assert capsys.readouterr().out == "2:9\tdef\tx\tstmt 0\n4:5\tdef\tx\tstmt 2\n"
+    assert main(["xref", "--stmt", "1", "--kind", "use", "--file", path]) == EXIT_OK
+    assert capsys.readouterr().out == "3:13\tuse\tx\tstmt 1\n"
+    assert main(["xref", "z", "--file", path]) == EXIT_NO_MATCH
+    assert main(["xref", "--file", path]) == EXIT_ERROR
+    assert main(["xref", "x", "--file", str(tmp_path / "missing.json")]) == EXIT_ERROR
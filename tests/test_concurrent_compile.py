@@ -0,0 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from compiler import compile_source
+from stress_concurrent import check, make_programs
+
+
+def test_concurrent_compiles_match_sequential_ones():
+    # A bounded run of benchmarks/stress_concurrent.py
+    programs = make_programs(count=8, size=20, seed=0)
+    expected = [compile_source(code) for code in programs]
+    jobs = list(range(len(programs))) * 3
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda n: (n, compile_source(programs[n])), jobs))
+    problems = [(n, check(n, expected[n], result)) for n, result in results]
+    assert [p for p in problems if p[1]] == []
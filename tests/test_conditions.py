@@ -0,0 +1,61 @@
+import pytest
+
+from compiler import MAX_CONDITION_DEPTH, compile_source
+from control_flow import validate_jumps
+
+PROGRAM = """int main() {
+    int x = 0;
+    int y = 1;
+    %s
+    return y;
+}"""
+
+MALFORMED = [
+    "if (x < 1) y = 2;",
+    "if (x < 1) { y = 2; } else y = 3;",
+    "if (x < 1) { y = 2; } else if (x > 5) y = 3;",
+    "if (x < 1) { y = 2; } else if (x >) { y = 3; }",
+    "else { y = 3; }",
+    "if (x < 1) { y = 2;",
+    "if (x < 1) { y = 2; } }",
+    "if (%sx < 1%s) { y = 2; }" % ("(" * (MAX_CONDITION_DEPTH + 1), ")" * (MAX_CONDITION_DEPTH + 1)),
+]
+
+
+@pytest.mark.parametrize("statement", MALFORMED)
+def test_malformed_if_is_a_semantic_error(statement):
+    for level in "012":
+        result = compile_source(PROGRAM % statement, opt_level=level)
+        assert any("Syntax Error" in e for e in result["semantic_errors"]), level
+        validate_jumps(result["ir"])
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("if (x < 1 && y != 0) { y = 2; }", 2),
+    ("if (x > 1 || y == 0) { y = 2; } else { y = 3; }", 3),
+    ("if (!(x == 0)) { y = 2; } else if (y) { y = 4; } else { y = 5; }", 4),
+    ("if ((x < 1 || y < 0) || !!(y > 5)) { y = 6; }", 6),
+    # Chains far longer than the recursion limit
+    ("if (%s) { y = 2; }" % " && ".join(["x < 1"] * 1500), 2),
+    ("if (%s || y == 1) { y = 3; }" % " || ".join(["x > 1"] * 1500), 3),
+])
+def test_conditions(run_ir, statement, expected):
+    for level in "012":
+        result = compile_source(PROGRAM % statement, opt_level=level)
+        assert result["semantic_errors"] == []
+        assert run_ir(result["optimized_ir"]) == expected, level
+
+
+def test_short_circuit_skips_the_right_operand(run_ir):
+    # a[i] is out of bounds; && / || must not evaluate it
+    code = """int main() {
+    int i = 9;
+    int c = 0;
+    int r = 1;
+    int a[4];
+    if (c != 0 && a[i] > 0) { r = 2; }
+    if (c == 0 || a[i] > 0) { r = r + 5; }
+    return r;
+}"""
+    for level in "012":
+        assert run_ir(compile_source(code, opt_level=level)["optimized_ir"]) == 6, level
@@ -0,0 +1,27 @@
+from compiler import compile_source
+from control_flow import constant_condition, literal_value
+
+
+def test_only_numeric_tokens_are_literals():
+    assert literal_value("12") == 12
+    assert literal_value("-3") == -3
+    assert literal_value(".5") == 0.5
+    for name in ("inf", "nan", "infinity", "Infinity", "1_000", "1e3"):
+        assert literal_value(name) is None, name
+
+
+def test_condition_on_a_variable_named_inf_is_not_folded():
+    assert constant_condition("inf <= 5") is None
+    assert constant_condition("3 <= 5") is True
+
+
+def test_variable_named_inf_keeps_its_branch(run_ir):
+    code = """int main() {
+    int inf = 3;
+    int y = 1;
+    if (y > 0) { y = 2; }
+    if (inf > 5) { y = 7; }
+    return y;
+}"""
+    for level in "012":
+        assert run_ir(compile_source(code, opt_level=level)["optimized_ir"]) == 2, level
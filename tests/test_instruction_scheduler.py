@@ -0,0 +1,51 @@
+from instruction_scheduler import InstructionScheduler
+
+
+def test_independent_load_fills_the_multiply_latency():
+    code = [
+        "LOAD R1, 5",
+        "MUL R2, R1, R1",
+        "LOAD R3, 7",
+        "ADD R4, R3, 1",
+        "ADD R5, R2, R4",
+        "RET R5",
+    ]
+    scheduler = InstructionScheduler(code)
+    assert scheduler.schedule() == [
+        "LOAD R1, 5",
+        "LOAD R3, 7",
+        "MUL R2, R1, R1",
+        "ADD R4, R3, 1",
+        "ADD R5, R2, R4",
+        "RET R5",
+    ]
+    assert (scheduler.cycles_before, scheduler.cycles_after) == (10, 8)
+
+
+def test_memory_flags_and_terminators_keep_their_order():
+    code = [
+        "LOAD R1, 5",
+        "STOREX a, 0, R1",
+        "LOADX R2, a, 0",
+        "LOAD R3, 2",
+        "ADD R4, R2, R3",
+        "CMP R4, 0",
+        "JGT L1",
+        "L1:",
+        "RET R4",
+    ]
+    scheduled = InstructionScheduler(code).schedule()
+    assert sorted(scheduled) == sorted(code)
+    position = {text: n for n, text in enumerate(scheduled)}
+    assert position["STOREX a, 0, R1"] < position["LOADX R2, a, 0"] < position["ADD R4, R2, R3"]
+    assert position["CMP R4, 0"] == position["JGT L1"] - 1
+    assert scheduled[-3:] == ["JGT L1", "L1:", "RET R4"]
+
+
+def test_latencies_can_be_overridden():
+    code = ["LOAD R1, 5", "MUL R2, R1, R1", "RET R2"]
+    fast = InstructionScheduler(code)
+    slow = InstructionScheduler(code, latencies={"MUL": 10})
+    fast.schedule()
+    slow.schedule()
+    assert slow.cycles_after - fast.cycles_after == 7
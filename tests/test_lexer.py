@@ -0,0 +1,32 @@
+import pytest
+
+from compiler import compile_source
+from lexer import tokenize, tokenize_array
+from resource_governor import ResourceGovernor
+
+
+@pytest.mark.parametrize("source", [
+    "int main() { char c = 'a'; return 0; }",
+    "char c = 'é';\nint π = 1; /* ü */ float x = 2.5;\n",
+    "int a = 1; // naïve\nchar d = '€'; int b = a;",
+])
+def test_tokenize_array_matches_tokenize(source):
+    tokens_list, errors, _ = tokenize(source)
+    token_array, array_errors, _ = tokenize_array(source)
+    assert list(token_array) == tokens_list
+    assert array_errors == errors
+
+
+def test_unclosed_comments_stay_within_the_phase_deadline():
+    # The comment regex used to retry every '/*' against the rest of the input
+    source = "/* " * 20000
+    result = compile_source(source, governor=ResourceGovernor(phase_deadline=0.2))
+    assert result["tokens"] == []
+
+
+def test_comment_stripping_matches_the_old_rules():
+    source = "int a; /* x // y\n */ int b; // c /* d\nint e; /* f"
+    tokens_list, _, clean_code = tokenize(source)
+    assert clean_code == "int a;  int b; \nint e; /* f"
+    token_array, _, array_code = tokenize_array(source)
+    assert array_code == clean_code.encode()
@@ -0,0 +1,78 @@
+import pytest
+
+from optimizer import CodeOptimizer
+from pass_manager import PassManager
+
+IR = [
+    "t1 = 2 + 3",
+    "x = t1",
+    "t2 = x * 0",
+    "IF 1 < 2 GOTO L1",
+    "x = 0",
+    "L1:",
+    "t3 = x + 1",
+    "RETURN x",
+]
+
+
+def optimize(opt_level):
+    optimizer = CodeOptimizer(opt_level=opt_level)
+    optimizer.optimize(IR)
+    return optimizer.optimized_lines, optimizer.pass_manager.stats
+
+
+def test_optimisation_levels(run_ir):
+    o0, stats0 = optimize("0")
+    o1, stats1 = optimize("1")
+    o2, stats2 = optimize("2")
+    assert o0 == IR and stats0 == []
+    assert o1 == o2 == ["x = 5", "RETURN x"]
+    assert {s["iteration"] for s in stats1} == {1}
+    # -O2 stops after the first round that changes nothing
+    assert max(s["iteration"] for s in stats2) == 2
+    assert all(s["removed"] == 0 for s in stats2 if s["iteration"] == 2)
+    assert sum(s["removed"] for s in stats1) == len(IR) - len(o1)
+    assert run_ir(o0) == run_ir(o1) == run_ir(o2) == 5
+
+
+def test_fixpoint_pipeline_repeats_until_nothing_changes():
+    pm = PassManager()
+    pm.register_pass("drop_one", lambda lines, am: lines[1:] if len(lines) > 2 else lines)
+    pm.register_pipeline("once", ["drop_one"])
+    pm.register_pipeline("fixpoint", ["drop_one"], fixpoint=True)
+    lines = ["a", "b", "c", "d", "e"]
+    assert pm.run(lines, "once") == ["b", "c", "d", "e"]
+    assert pm.run(lines, "fixpoint") == ["d", "e"]
+    assert [s["iteration"] for s in pm.stats] == [1, 2, 3, 4]
+
+
+def test_dependencies_run_first_and_analyses_are_cached():
+    pm = PassManager()
+    calls = []
+
+    def count_lines(lines):
+        calls.append(len(lines))
+        return len(lines)
+
+    pm.register_analysis("size", count_lines)
+    pm.register_pass("first", lambda lines, am: lines + ["first"], invalidates=["size"])
+    pm.register_pass("second", lambda lines, am: lines + [str(am.get("size"))],
+                     requires=["size"], depends_on=["first"])
+    pm.register_pass("third", lambda lines, am: lines + [str(am.get("size"))],
+                     requires=["size"], invalidates=())
+    pm.register_pipeline("O1", ["second", "third"])
+    assert pm.resolve(["second", "third"]) == ["first", "second", "third"]
+    # "second" invalidates everything, so "third" sees the new size
+    assert pm.run(["x"]) == ["x", "first", "2", "3"]
+    assert calls == [2, 3]
+
+
+def test_unknown_pipeline_and_dependency_cycles_are_errors():
+    pm = PassManager()
+    pm.register_pass("a", lambda lines, am: lines, depends_on=["b"])
+    pm.register_pass("b", lambda lines, am: lines, depends_on=["a"])
+    pm.register_pipeline("cycle", ["a"])
+    with pytest.raises(Exception, match="unknown pipeline 'O3'"):
+        pm.run([], "O3")
+    with pytest.raises(Exception, match="dependency cycle"):
+        pm.run([], "cycle")
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from perf_estimator import DEFAULT_MACHINE, PerformanceEstimator, load_machine
+
+# R1 counts to 10; R2 sums the counter
+LOOP = [
+    "LOAD R1, 0",
+    "LOAD R2, 0",
+    "L1:",
+    "CMP R1, 10",
+    "JGE L2",
+    "ADD R2, R2, R1",
+    "ADD R1, R1, 1",
+    "JMP L1",
+    "L2:",
+    "RET R2",
+]
+
+
+def estimate(code, **machine):
+    return PerformanceEstimator(code, dict(DEFAULT_MACHINE, **machine)).estimate()
+
+
+def test_loop_blocks_are_weighted_by_their_depth():
+    function = estimate(LOOP)["functions"][0]
+    blocks = {b["block"]: b for b in function["blocks"]}
+    assert [b["block"] for b in function["blocks"]] == ["B0", "L1", "B2", "L2"]
+    assert function["loops"] == [{"header": "L1", "blocks": ["L1", "B2"]}]
+    assert [blocks[name]["loop_depth"] for name in ("B0", "L1", "B2", "L2")] == [0, 1, 1, 0]
+    for b in function["blocks"]:
+        assert b["weighted_cycles"] == b["cycles"] * 10 ** b["loop_depth"]
+    assert function["weighted_cycles"] == sum(b["weighted_cycles"] for b in function["blocks"])
+
+    longer = estimate(LOOP, loop_iterations=100)["totals"]
+    loop_cycles = blocks["L1"]["cycles"] + blocks["B2"]["cycles"]
+    assert longer["weighted_cycles"] - function["weighted_cycles"] == 90 * loop_cycles
+
+
+def test_spills_add_reloads_and_stores():
+    roomy = estimate(LOOP)
+    tight = estimate(LOOP, registers=1)
+    assert roomy["totals"]["spills"] == 0
+    assert tight["totals"]["spills"] == 1
+    function = tight["functions"][0]
+    # The loop counter is used more often, so the sum is spilled: a store per
+    # definition (B0, B2) and a reload per instruction reading it (B2, L2)
+    assert function["spilled_registers"] == ["R2"]
+    assert [(b["spill_loads"], b["spill_stores"]) for b in function["blocks"]] == [
+        (0, 1), (0, 0), (1, 1), (1, 0),
+    ]
+    extra = 2 * DEFAULT_MACHINE["spill_load"] + 2 * DEFAULT_MACHINE["spill_store"]
+    assert tight["totals"]["cycles"] == roomy["totals"]["cycles"] + extra
+
+
+def test_register_pressure_counts_live_registers():
+    # R1 and R2 are both live around the loop
+    assert estimate(LOOP)["totals"]["register_pressure"] == 2
+    straight = ["LOAD R1, 1", "LOAD R2, 2", "LOAD R3, 3", "ADD R4, R1, R2", "ADD R5, R4, R3", "RET R5"]
+    assert estimate(straight)["totals"]["register_pressure"] == 3
+
+
+def test_machine_description_overrides_defaults(tmp_path):
+    path = tmp_path / "machine.json"
+    path.write_text(json.dumps({"registers": 4, "latencies": {"add": 5}}))
+    machine = load_machine(str(path))
+    assert machine["registers"] == 4 and machine["latencies"]["ADD"] == 5
+    assert machine["latencies"]["MUL"] == DEFAULT_MACHINE["latencies"]["MUL"]
+    slow = PerformanceEstimator(LOOP, machine).estimate()["totals"]["cycles"]
+    assert slow > estimate(LOOP)["totals"]["cycles"]
+
+    path.write_text(json.dumps({"cache": 3}))
+    with pytest.raises(Exception, match="unknown key 'cache'"):
+        load_machine(str(path))
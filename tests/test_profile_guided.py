@@ -0,0 +1,97 @@
+from compiler import compile_source
+from control_flow import label_blocks
+from profile_guided import (
+    MAX_UNROLL_FACTOR, BlockLayout, InstrumentedBuild, LoopUnroller, load_profile,
+    variable_weights,
+)
+
+
+def test_instrumented_arithmetic_wraps_to_64_bits(run_ir):
+    # 3037000500 * 3037000500 > 2**63: the native build sees a negative b
+    source = (
+        "int main() { int a = 3037000500; int b = a * a;"
+        " if (b < 0) { return 1; } return 0; }"
+    )
+    result = compile_source(source)
+    assert result["semantic_errors"] == []
+    assert run_ir(result["ir"]) == 1
+    assert run_ir(["a = 9223372036854775807", "b = a + 1", "c = b - 1", "RETURN c"]) == 2**63 - 1
+    assert run_ir(["a = -9223372036854775807", "b = a - 2", "RETURN b"]) == 2**63 - 1
+
+
+def profile_of(ir_lines, tmp_path):
+    """Run the instrumented build of labeled IR once and load its profile."""
+    path = str(tmp_path / "profile.json")
+    namespace = {"__name__": "instrumented"}
+    exec("\n".join(InstrumentedBuild(ir_lines, path).generate()), namespace)
+    counts = [0] * len(namespace["BLOCKS"])
+    taken = [0] * len(namespace["BLOCKS"])
+    namespace["main"](counts, taken)
+    namespace["write_profile"](path, counts, taken)
+    return load_profile(path)
+
+
+def counting_loop(limit):
+    # s = 0; for (i = 0; i < limit; i++) s = s + i;
+    return label_blocks([
+        "i = 0",
+        "s = 0",
+        "L1:",
+        f"IF i >= {limit} GOTO L2",
+        "s = s + i",
+        "i = i + 1",
+        "GOTO L1",
+        "L2:",
+        "RETURN s",
+    ])
+
+
+def test_layout_makes_the_hot_successor_fall_through(run_ir, tmp_path):
+    # The branch to L2 is taken 90 times out of 100
+    ir = label_blocks([
+        "i = 0",
+        "s = 0",
+        "L1:",
+        "IF i >= 100 GOTO L4",
+        "t1 = i % 10",
+        "IF t1 != 0 GOTO L2",
+        "s = s + 100",
+        "GOTO L3",
+        "L2:",
+        "s = s + 1",
+        "L3:",
+        "i = i + 1",
+        "GOTO L1",
+        "L4:",
+        "RETURN s",
+    ])
+    profile = profile_of(ir, tmp_path)
+    assert profile.taken("B2") == 90 and profile.not_taken("B2") == 10
+    layout = BlockLayout(ir, profile)
+    laid_out = layout.run()
+    assert layout.stats["branches_inverted"] == 1
+    # L2 falls through; the rare "s = s + 100" block moved out of the loop
+    branch = laid_out.index("t1 = i % 10") + 1
+    assert laid_out[branch:branch + 3] == ["IF t1 == 0 GOTO B3", "L2:", "s = s + 1"]
+    assert laid_out[-5:-2] == ["B3:", "s = s + 100", "GOTO L3"]
+    assert run_ir(laid_out) == run_ir(ir) == 10 * 100 + 90
+
+
+def test_hot_loops_are_unrolled(run_ir, tmp_path):
+    ir = counting_loop(100)
+    unroller = LoopUnroller(ir, profile_of(ir, tmp_path))
+    unrolled = unroller.run()
+    assert unroller.stats["loops_unrolled"] == 1
+    assert unrolled.count("s = s + i") == MAX_UNROLL_FACTOR
+    # Every copy but the last re-tests the exit condition
+    assert unrolled.count("IF i >= 100 GOTO L2") == MAX_UNROLL_FACTOR
+    assert run_ir(unrolled) == run_ir(ir) == 4950
+
+
+def test_cold_loops_and_weights(tmp_path):
+    ir = counting_loop(3)
+    profile = profile_of(ir, tmp_path)
+    unroller = LoopUnroller(ir, profile)
+    assert unroller.run() == ir and unroller.stats["loops_unrolled"] == 0
+    weights = variable_weights(ir, profile)
+    assert weights["i"] > weights["s"] > 0
@@ -0,0 +1,38 @@
+from compiler import compile_source
+from range_analysis import BoundsCheckEliminator, INT_MAX, TOP, arithmetic
+
+
+def test_arithmetic_past_64_bits_is_top():
+    assert arithmetic((INT_MAX, INT_MAX), "+", (1, 1)) == TOP
+    assert arithmetic((2 ** 40, 2 ** 40), "*", (2 ** 40, 2 ** 40)) == TOP
+    assert arithmetic((0, 9), "+", (1, 1)) == (1, 10)
+
+
+def test_wrapped_index_keeps_its_bounds_check():
+    # i wraps to INT_MIN at run time, so j is -2, not 2
+    ir = [
+        "ARRAY a[10]",
+        "x = 9223372036854775807",
+        "i = x + 1",
+        "j = i / 4611686018427387904",
+        "BOUNDS_CHECK j 10",
+        "a[j] = 5",
+        "RETURN x",
+    ]
+    assert "BOUNDS_CHECK j 10" in BoundsCheckEliminator(ir).run()
+
+
+def test_wrapped_index_keeps_its_bounds_check_end_to_end():
+    code = """int main() {
+    int x = 9223372036854775807;
+    int i = 0;
+    int j = 0;
+    int a[10];
+    i = x + 1;
+    j = i / 4611686018427387904;
+    a[j] = 5;
+    return j;
+}"""
+    for level in "012":
+        result = compile_source(code, opt_level=level)
+        assert any(line.startswith("BOUNDS_CHECK") for line in result["optimized_ir"]), level
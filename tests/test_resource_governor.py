@@ -0,0 +1,28 @@
+from compiler import compile_source
+from resource_governor import ResourceGovernor
+
+
+class RecordingGovernor(ResourceGovernor):
+    """Remembers every phase in which check() was called."""
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self.checked = set()
+
+    def check(self):
+        self.checked.add(self.phase)
+        super().check()
+
+
+def test_many_returns_stay_within_the_phase_deadline():
+    # Every return used to scan ahead to the next ';', so this took seconds
+    source = "int main() {\n" + "return\n" * 8000 + "}\n"
+    result = compile_source(source, governor=ResourceGovernor(phase_deadline=0.5))
+    assert result["semantic_errors"] == ["Line 2: Syntax Error (line 2): Expected ';' after return."]
+
+
+def test_long_phases_poll_the_governor():
+    source = "int main() {\n" + "int x = 1;\n" * 2000 + "return x;\n}\n"
+    governor = RecordingGovernor(phase_deadline=60)
+    compile_source(source, governor=governor)
+    assert {"semantic", "ir", "schedule"} <= governor.checked
@@ -0,0 +1,27 @@
+import pytest
+
+from compiler import compile_source
+
+
+@pytest.mark.parametrize("level", ["0", "1", "2"])
+@pytest.mark.parametrize("statement, expected", [
+    ("return a[i];", 7),
+    ("return a[i] + b;", 10),
+    ("return b * a[2];", 21),
+    ("return b;", 3),
+    ("return 4;", 4),
+])
+def test_return_value(run_ir, level, statement, expected):
+    code = "int main() { int a[10]; int i; int b; i = 2; b = 3; a[i] = 7; %s }" % statement
+    result = compile_source(code, opt_level=level)
+    assert result["semantic_errors"] == []
+    assert run_ir(result["optimized_ir"]) == expected
+
+
+@pytest.mark.parametrize("statement", ["return a + b * c;", "return a b;", "return (a);"])
+def test_unsupported_return_is_a_semantic_error(statement):
+    code = "int main() { int a; int b; int c; a = 1; b = 2; c = 3; %s }" % statement
+    result = compile_source(code)
+    assert any("return" in e for e in result["semantic_errors"])
+    # Nothing is lowered for it, so no bare RETURN (which would return 0)
+    assert not any(line.startswith("RETURN") for line in result["ir"])
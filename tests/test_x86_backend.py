@@ -0,0 +1,63 @@
+import platform
+import shutil
+import signal
+
+import pytest
+
+from compiler import compile_source
+from program_generator import generate_program
+from x86_backend import X86Backend, assemble, run_executable
+
+pytestmark = pytest.mark.skipif(
+    platform.machine().lower() not in ("x86_64", "amd64") or shutil.which("cc") is None,
+    reason="needs an x86-64 machine with a C compiler driver",
+)
+
+PROGRAMS = {
+    "arithmetic": "int main() { int a = 7; int b = 0 - 3; int c = a * b + a / b - a % b; return c + 100; }",
+    "overflow": (
+        "int main() { int a = 3037000500; int b = a * a;"
+        " if (b < 0) { return 1; } return 0; }"
+    ),
+    "conditions": (
+        "int main() { int x = 4; int y = 9; int r = 0;"
+        " if (x < y && !(y == 3) || x > 100) { r = x + y; } else { r = 1; }"
+        " return r; }"
+    ),
+    "arrays": "int main() { int a[4]; int i = 3; a[i] = 11; a[0] = a[i] * 2; return a[0] + a[3]; }",
+}
+
+
+def expected_status(run_ir, ir_lines):
+    # Traps in the IR run are signals natively: abort() and the idiv fault
+    try:
+        return run_ir(ir_lines) & 0xFF
+    except IndexError:
+        return -signal.SIGABRT
+    except ZeroDivisionError:
+        return -signal.SIGFPE
+
+
+def native_status(target_code, tmp_path):
+    backend = X86Backend(target_code)
+    backend.generate()
+    backend.write_assembly(str(tmp_path / "program.s"))
+    return run_executable(assemble(str(tmp_path / "program.s"), str(tmp_path / "program")))
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+@pytest.mark.parametrize("opt_level", ["0", "2"])
+def test_native_exit_status_matches_the_ir(name, opt_level, run_ir, tmp_path):
+    result = compile_source(PROGRAMS[name], opt_level=opt_level)
+    assert result["semantic_errors"] == []
+    expected = run_ir(result["optimized_ir"]) & 0xFF
+    assert native_status(result["target_code"], tmp_path) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("shape", ["arrays", "branches", "mixed"])
+def test_generated_programs_match_the_ir(shape, seed, run_ir, tmp_path):
+    result = compile_source(generate_program(shape, 40, seed))
+    assert result["semantic_errors"] == []
+    expected = expected_status(run_ir, result["optimized_ir"])
+    assert native_status(result["target_code"], tmp_path) == expected
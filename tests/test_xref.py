@@ -0,0 +1,30 @@
+from compiler import compile_source
+from xref_index import XrefIndex
+
+PROGRAM = """int main() {
+    int x = 5;
+    int a[4];
+    a[x] = x + 1;
+    if (x > 2) { x = a[1]; }
+    return x;
+}"""
+
+
+def test_semantic_pass_records_every_reference():
+    xref = compile_source(PROGRAM)["analyzer"].xref
+    assert xref.declaration("x") == ("x", "decl", 2, 9, 0)
+    assert [r[2] for r in xref.definitions("x")] == [2, 5]
+    assert [(r[2], r[3]) for r in xref.uses("x")] == [(4, 7), (4, 12), (5, 9), (6, 12)]
+    # a[x] = x + 1; is statement 2 and the if condition statement 3
+    assert xref.defines(2) == ["a"] and xref.depends_on(2) == ["x"]
+    assert xref.depends_on(3) == ["x"]
+
+
+def test_round_trip_through_json(tmp_path):
+    xref = compile_source(PROGRAM)["analyzer"].xref
+    path = tmp_path / "xref.json"
+    xref.write(path)
+    copy = XrefIndex.read(path)
+    assert len(copy) == len(xref)
+    for name in ("x", "a"):
+        assert copy.references(name) == xref.references(name)
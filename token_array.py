@@ -0,0 +1,119 @@
+# token_array.py
+# Columnar token storage. Instead of one (type, value, line, col) tuple per
+# token, a TokenArray keeps parallel typed arrays:
+#
+#   type_ids : array('B')  index into type_names
+#   starts   : array('I')  start offset of the lexeme in the source buffer
+#   ends     : array('I')  end offset (exclusive)
+#   lines    : array('I')  line number
+#   cols     : array('I')  column number
+#
+# That is 17 bytes per token. The lexeme text is not stored at all: it is
+# sliced out of the source buffer (bytes or mmap) when asked for, either as
+# a zero-copy memoryview or as a str. Indexing and iteration still return
+# the familiar (type, value, line, col) tuples, so a TokenArray can be passed
+# anywhere a tokens_list is expected.
+
+import sys
+from array import array
+
+
+class TokenArray:
+    def __init__(self, source, type_names):
+        """
+        source: bytes-like buffer (bytes, bytearray, mmap) holding the lexemes
+        type_names: list of token type names; a token's type id indexes it
+        """
+        if len(type_names) > 256:
+            raise ValueError("TokenArray supports at most 256 token types")
+        self.source = source
+        self.view = memoryview(source)
+        self.type_names = list(type_names)
+        self.type_index = {name: i for i, name in enumerate(self.type_names)}
+        # Identifiers, keywords, operators and symbols repeat a lot; their
+        # values are interned so every "x" or ";" shares one str object.
+        # Literals are left alone.
+        self.interned = {
+            i for i, name in enumerate(self.type_names)
+            if not name.endswith("_LITERAL")
+        }
+
+        self.type_ids = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+        self.cols = array("I")
+
+    # -----------------------
+    # Building
+    # -----------------------
+    def append(self, tok_type, start, end, line, col):
+        self.type_ids.append(self.type_index[tok_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.cols.append(col)
+
+    # -----------------------
+    # Field access
+    # -----------------------
+    def _index(self, i):
+        n = len(self.type_ids)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("token index out of range")
+        return i
+
+    def type_of(self, i):
+        return self.type_names[self.type_ids[i]]
+
+    def raw(self, i):
+        """Lexeme of token i as a zero-copy memoryview slice of the source."""
+        i = self._index(i)
+        return self.view[self.starts[i]:self.ends[i]]
+
+    def value(self, i):
+        """Lexeme of token i as a str (interned unless it is a literal)."""
+        i = self._index(i)
+        text = str(self.view[self.starts[i]:self.ends[i]], "utf-8")
+        if self.type_ids[i] in self.interned:
+            return sys.intern(text)
+        return text
+
+    def line_of(self, i):
+        return self.lines[i]
+
+    def col_of(self, i):
+        return self.cols[i]
+
+    # -----------------------
+    # Tuple view (compatible with tokenize())
+    # -----------------------
+    def __len__(self):
+        return len(self.type_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = self._index(i)
+        return (self.type_of(i), self.value(i), self.lines[i], self.cols[i])
+
+    def __iter__(self):
+        for i in range(len(self.type_ids)):
+            yield (self.type_of(i), self.value(i), self.lines[i], self.cols[i])
+
+    def tuples(self):
+        # Materialise the old list-of-tuples representation
+        return list(self)
+
+    def nbytes(self):
+        # Memory held by the columns (excluding the shared source buffer)
+        return sum(
+            a.itemsize * len(a)
+            for a in (self.type_ids, self.starts, self.ends, self.lines, self.cols)
+        )
+
+    def release(self):
+        # Drop the memoryview so an mmap source can be closed
+        self.view.release()
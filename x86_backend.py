@@ -0,0 +1,439 @@
+# x86_backend.py
+# x86-64 System V backend for the target code produced by target_codegen.py
+# (LOAD / MOV / ADD ... / SETcc / CMP + Jcc / JMP / RET).
+#
+# The whole program becomes a single `main` function in GNU assembler
+# (AT&T) syntax:
+#   - virtual registers R1, R2, ... are mapped onto hardware registers,
+#     most frequently used first; the rest are spilled to stack slots
+#   - %rax, %rdx, %r10 and %r11 are kept free as scratch registers
+#     (idiv needs %rax:%rdx, %r10 holds a saved condition, %r11 large immediates)
+#   - RET R returns R in %rax, so the exit status of the executable is
+#     main's return value (mod 256)
+#   - arrays live in zero-initialised .bss storage (8 bytes per element);
+#     a failed BOUND check calls abort()
+#
+# assemble() runs the local `as` and `cc` to turn the assembly into an
+# executable. Only integer code is supported.
+
+import os
+import platform
+import re
+import shutil
+import subprocess
+
+from resource_governor import CHECK_INTERVAL
+from semantic_analyzer import MAX_ARRAY_BYTES
+
+REGISTER = re.compile(r"R\d+$")
+INTEGER = re.compile(r"-?\d+$")
+
+# Caller-saved registers first: main does not have to preserve them
+CALLER_SAVED = ["%rcx", "%rsi", "%rdi", "%r8", "%r9"]
+CALLEE_SAVED = ["%rbx", "%r12", "%r13", "%r14", "%r15"]
+ALLOCATABLE = CALLER_SAVED + CALLEE_SAVED
+
+ARITH = {"ADD": "addq", "SUB": "subq", "MUL": "imulq"}
+CONDITIONS = {"LT": "l", "LE": "le", "GT": "g", "GE": "ge", "EQ": "e", "NE": "ne"}
+
+
+def fits_imm32(value):
+    return -2**31 <= value < 2**31
+
+
+def rank_registers(target_code, weights=None):
+    """
+    Virtual registers in the order they get hardware registers: profile
+    weight first, then static use count, then first appearance.
+    """
+    weights = weights or {}
+    uses = {}
+    for line in target_code:
+        for op in line.replace(",", " ").split()[1:]:
+            if REGISTER.match(op):
+                uses[op] = uses.get(op, 0) + 1
+    # Dicts keep insertion order, so sorted() leaves ties in first-appearance order
+    return sorted(uses, key=lambda r: (-weights.get(r, 0), -uses[r]))
+
+
+class X86Backend:
+    def __init__(self, target_code, function="main", weights=None, governor=None):
+        self.target_code = [line.strip() for line in target_code if line.strip()]
+        self.function = function
+        self.weights = weights or {}    # virtual register → profile weight
+        self.governor = governor        # optional ResourceGovernor, polled while lowering
+        self.locations = {}         # virtual register → "%rbx" / "-16(%rbp)"
+        self.saved = []             # callee-saved registers main has to restore
+        self.spill_slots = 0
+        self.saved_condition = None     # Jcc whose outcome was kept in %r10
+        self.arrays = {}                # array name → number of elements
+        self.bounds_checked = False
+        self.asm = []
+
+    # -----------------------
+    # Register assignment
+    # -----------------------
+    def assign_locations(self):
+        """
+        Give the most used virtual registers hardware registers, spill the rest.
+        Profile weights, when given, rank before static use counts.
+        """
+        ranked = rank_registers(self.target_code, self.weights)
+
+        in_registers = ranked[:len(ALLOCATABLE)]
+        spilled = ranked[len(ALLOCATABLE):]
+        for reg, hw in zip(in_registers, ALLOCATABLE):
+            self.locations[reg] = hw
+        self.saved = [hw for hw in CALLEE_SAVED if hw in self.locations.values()]
+        self.spill_slots = len(spilled)
+        base = 8 * len(self.saved)
+        for n, reg in enumerate(spilled, 1):
+            self.locations[reg] = f"-{base + 8 * n}(%rbp)"
+
+    # -----------------------
+    # Operands
+    # -----------------------
+    def location(self, op, n):
+        if op not in self.locations:
+            raise Exception(f"x86 Backend Error (instruction {n}): unknown operand '{op}'")
+        return self.locations[op]
+
+    def literal(self, op, n):
+        if not INTEGER.match(op):
+            raise Exception(
+                f"x86 Backend Error (instruction {n}): only integer code is supported, got '{op}'"
+            )
+        return int(op)
+
+    def in_register(self, loc):
+        return loc.startswith("%")
+
+    def source(self, op, n):
+        """Operand usable as the source of an ALU instruction (register, memory or imm32)."""
+        if REGISTER.match(op):
+            return self.location(op, n)
+        value = self.literal(op, n)
+        if fits_imm32(value):
+            return f"${value}"
+        self.emit(f"movabsq ${value}, %r11")
+        return "%r11"
+
+    def load(self, op, reg, n):
+        # reg = op
+        src = self.source(op, n)
+        if src != reg:
+            self.emit(f"movq {src}, {reg}")
+
+    def store(self, reg, dst):
+        if reg != dst:
+            self.emit(f"movq {reg}, {dst}")
+
+    def array_symbol(self, name, n):
+        if name not in self.arrays:
+            raise Exception(f"x86 Backend Error (instruction {n}): unknown array '{name}'")
+        return f"{self.function}.{name}"
+
+    def element_address(self, name, index, n):
+        """Memory operand for name[index]; may use %r11 and %rdx."""
+        symbol = self.array_symbol(name, n)
+        if not REGISTER.match(index):
+            offset = 8 * self.literal(index, n)
+            return f"{symbol}+{offset}(%rip)" if offset else f"{symbol}(%rip)"
+        index_reg = self.location(index, n)
+        if not self.in_register(index_reg):
+            self.emit(f"movq {index_reg}, %rdx")
+            index_reg = "%rdx"
+        self.emit(f"leaq {symbol}(%rip), %r11")
+        return f"(%r11,{index_reg},8)"
+
+    def label(self, name):
+        return f".L{self.function}_{name}"
+
+    def emit(self, instr):
+        self.asm.append(f"\t{instr}")
+
+    # -----------------------
+    # Instruction selection
+    # -----------------------
+    def lower(self, n, line, next_line):
+        parts = line.replace(",", " ").split()
+        opcode, ops = parts[0], parts[1:]
+
+        if line.endswith(":") and len(parts) == 1:
+            self.asm.append(f"{self.label(line[:-1])}:")
+
+        elif opcode == "LOAD":
+            dst = self.location(ops[0], n)
+            self.emit(f"movq {self.source(ops[1], n)}, {dst}")
+
+        elif opcode == "MOV":
+            dst, src = self.location(ops[0], n), self.location(ops[1], n)
+            if dst == src:
+                return
+            if self.in_register(dst) or self.in_register(src):
+                self.emit(f"movq {src}, {dst}")
+            else:
+                self.emit(f"movq {src}, %rax")
+                self.emit(f"movq %rax, {dst}")
+
+        elif opcode in ARITH:
+            dst = self.location(ops[0], n)
+            b = ops[2]
+            # Work in the destination register unless b lives there too
+            work = dst if self.in_register(dst) and self.locations.get(b) != dst else "%rax"
+            self.load(ops[1], work, n)
+            self.emit(f"{ARITH[opcode]} {self.source(b, n)}, {work}")
+            self.store(work, dst)
+
+        elif opcode in ("DIV", "MOD"):
+            dst = self.location(ops[0], n)
+            self.load(ops[1], "%rax", n)
+            self.emit("cqto")
+            if REGISTER.match(ops[2]):
+                divisor = self.location(ops[2], n)
+            else:
+                divisor = "%r11"
+                self.load(ops[2], divisor, n)
+            self.emit(f"idivq {divisor}")
+            self.store("%rax" if opcode == "DIV" else "%rdx", dst)
+
+        elif opcode.startswith("SET") and opcode[3:] in CONDITIONS:
+            dst = self.location(ops[0], n)
+            self.compare(ops[1], ops[2], n)
+            self.emit(f"set{CONDITIONS[opcode[3:]]} %al")
+            self.emit("movzbq %al, %rax")
+            self.store("%rax", dst)
+
+        elif opcode == "CMP":
+            self.compare(ops[0], ops[1], n)
+            jump = self.pending_jump(n)
+            if jump is not None and jump != next_line:
+                # Other instructions were scheduled between CMP and its jump and
+                # would clobber the flags: keep the outcome in %r10 instead.
+                cc = CONDITIONS[jump.split()[0][1:]]
+                self.emit(f"set{cc} %r10b")
+                self.emit("movzbq %r10b, %r10")
+                self.saved_condition = jump
+
+        elif opcode == "ARRAY":
+            # Storage is emitted in .bss after the function
+            return
+
+        elif opcode == "LOADX":
+            # LOADX Rd, a, i
+            dst = self.location(ops[0], n)
+            address = self.element_address(ops[1], ops[2], n)
+            work = dst if self.in_register(dst) else "%rax"
+            self.emit(f"movq {address}, {work}")
+            self.store(work, dst)
+
+        elif opcode == "STOREX":
+            # STOREX a, i, x
+            value = ops[2]
+            if REGISTER.match(value) and self.in_register(self.location(value, n)):
+                src = self.location(value, n)
+            elif not REGISTER.match(value) and fits_imm32(self.literal(value, n)):
+                src = f"${self.literal(value, n)}"
+            else:
+                self.load(value, "%rax", n)
+                src = "%rax"
+            self.emit(f"movq {src}, {self.element_address(ops[0], ops[1], n)}")
+
+        elif opcode == "BOUND":
+            # BOUND i, N: unsigned compare also catches negative indices
+            self.bounds_checked = True
+            index = self.location(ops[0], n) if REGISTER.match(ops[0]) else None
+            if index is None:
+                self.load(ops[0], "%rax", n)
+                index = "%rax"
+            self.emit(f"cmpq ${self.literal(ops[1], n)}, {index}")
+            self.emit(f"jae {self.label('bounds_error')}")
+
+        elif opcode == "JMP":
+            self.emit(f"jmp {self.label(ops[0])}")
+
+        elif opcode.startswith("J") and opcode[1:] in CONDITIONS:
+            if self.saved_condition == line:
+                self.saved_condition = None
+                self.emit("testq %r10, %r10")
+                self.emit(f"jne {self.label(ops[0])}")
+            else:
+                self.emit(f"j{CONDITIONS[opcode[1:]]} {self.label(ops[0])}")
+
+        elif opcode == "RET":
+            if ops:
+                self.load(ops[0], "%rax", n)
+            else:
+                self.emit("xorl %eax, %eax")
+            if next_line is not None:
+                self.emit(f"jmp {self.label('return')}")
+
+        else:
+            raise Exception(f"x86 Backend Error (instruction {n}): cannot lower '{line}'")
+
+    def compare(self, a, b, n):
+        # Flags for a - b
+        left = self.locations.get(a) if REGISTER.match(a) else None
+        if left is None or not self.in_register(left):
+            self.load(a, "%rax", n)
+            left = "%rax"
+        self.emit(f"cmpq {self.source(b, n)}, {left}")
+
+    def pending_jump(self, n):
+        # The conditional jump reading the flags set by the CMP at instruction n
+        for line in self.target_code[n:]:
+            opcode = line.split()[0]
+            if opcode.startswith("J") and opcode[1:] in CONDITIONS:
+                return line
+            if opcode in ("JMP", "RET", "CMP") or line.endswith(":"):
+                return None
+        return None
+
+    # -----------------------
+    # Function
+    # -----------------------
+    def generate(self):
+        """
+        Lower the target code into x86-64 assembly.
+        Returns the assembly as a list of lines.
+        """
+        self.asm = []
+        self.saved_condition = None
+        self.bounds_checked = False
+        self.arrays = {}
+        array_bytes = 0
+        for n, line in enumerate(self.target_code, 1):
+            if line.startswith("ARRAY "):
+                name, size = line[6:].replace(",", " ").split()
+                self.arrays[name] = int(size)
+                array_bytes += 8 * int(size)
+                if array_bytes > MAX_ARRAY_BYTES:
+                    raise Exception(
+                        f"x86 Backend Error (instruction {n}): arrays exceed {MAX_ARRAY_BYTES} bytes of .bss"
+                    )
+        self.assign_locations()
+        fn = self.function
+
+        self.asm += ["\t.text", f"\t.globl {fn}", f"\t.type {fn}, @function", f"{fn}:"]
+        self.emit("pushq %rbp")
+        self.emit("movq %rsp, %rbp")
+        for reg in self.saved:
+            self.emit(f"pushq {reg}")
+        frame = 8 * self.spill_slots
+        if (frame + 8 * len(self.saved)) % 16:
+            frame += 8      # keep %rsp 16-byte aligned
+        if frame:
+            self.emit(f"subq ${frame}, %rsp")
+        # Variables read before they are written start out as 0
+        for loc in self.locations.values():
+            self.emit(f"movq $0, {loc}")
+
+        for n, line in enumerate(self.target_code, 1):
+            if self.governor is not None and n % CHECK_INTERVAL == 0:
+                self.governor.check()
+            next_line = self.target_code[n] if n < len(self.target_code) else None
+            self.lower(n, line, next_line)
+
+        # Falling off the end of main returns 0
+        if not self.target_code or not self.target_code[-1].startswith("RET"):
+            self.emit("xorl %eax, %eax")
+        self.asm.append(f"{self.label('return')}:")
+        if self.saved:
+            self.emit(f"leaq -{8 * len(self.saved)}(%rbp), %rsp")
+            for reg in reversed(self.saved):
+                self.emit(f"popq {reg}")
+        else:
+            self.emit("movq %rbp, %rsp")
+        self.emit("popq %rbp")
+        self.emit("ret")
+        if self.bounds_checked:
+            # Out-of-bounds index: %rsp is still 16-byte aligned here
+            self.asm.append(f"{self.label('bounds_error')}:")
+            self.emit("call abort@PLT")
+        self.asm.append(f"\t.size {fn}, .-{fn}")
+        if self.arrays:
+            self.asm.append("\t.bss")
+            self.asm.append("\t.align 8")
+            for name, size in self.arrays.items():
+                self.asm.append(f"{fn}.{name}:")
+                self.emit(f".zero {8 * size}")
+        self.asm.append('\t.section .note.GNU-stack,"",@progbits')
+        return self.asm
+
+    def write_assembly(self, filename):
+        with open(filename, "w") as f:
+            for line in self.asm:
+                f.write(line + "\n")
+
+    def report(self):
+        in_registers = sum(1 for loc in self.locations.values() if self.in_register(loc))
+        return (
+            f"x86-64 backend: {in_registers} virtual registers in hardware registers, "
+            f"{self.spill_slots} spilled to the stack"
+        )
+
+
+# -----------------------
+# System toolchain
+# -----------------------
+def run_tool(cmd):
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(
+            f"x86 Backend Error: '{' '.join(cmd)}' failed (exit {result.returncode}):\n"
+            f"{result.stderr.strip()}"
+        )
+
+
+def assemble(asm_file, exe_file):
+    """Assemble with `as` and link with `cc` into an executable."""
+    if platform.machine().lower() not in ("x86_64", "amd64"):
+        raise Exception(
+            f"x86 Backend Error: cannot build native code on {platform.machine()} "
+            "(x86-64 only)"
+        )
+    linker = shutil.which("cc") or shutil.which("gcc")
+    if linker is None:
+        raise Exception("x86 Backend Error: no C compiler driver (cc / gcc) found to link with")
+    assembler = shutil.which("as")
+    if assembler is None:
+        # The compiler driver can assemble on its own
+        run_tool([linker, "-o", exe_file, asm_file])
+        return exe_file
+
+    object_file = os.path.splitext(exe_file)[0] + ".o"
+    try:
+        run_tool([assembler, "-o", object_file, asm_file])
+        run_tool([linker, "-o", exe_file, object_file])
+    finally:
+        if os.path.exists(object_file):
+            os.remove(object_file)
+    return exe_file
+
+
+def run_executable(exe_file):
+    """Run a native build; returns its exit status (main's return value mod 256)."""
+    return subprocess.run([os.path.abspath(exe_file)]).returncode
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    code = [
+        "LOAD R1, 6",
+        "LOAD R2, 7",
+        "MUL R3, R1, R2",
+        "CMP R3, 40",
+        "JGT L1",
+        "LOAD R3, 0",
+        "L1:",
+        "RET R3",
+    ]
+    backend = X86Backend(code)
+    print("\n".join(backend.generate()))
+    print(backend.report())
+    backend.write_assembly("demo.s")
+    try:
+        assemble("demo.s", "demo")
+        print("demo exited with", run_executable("demo"))   # 42
+    except Exception as e:
+        print(e)
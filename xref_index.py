@@ -0,0 +1,227 @@
+# xref_index.py
+# Def-use / cross-reference index built by the semantic pass.
+#
+# Every occurrence of a variable in the source is one reference:
+#   kind  : decl (int x;), def (x = ...; a[i] = ...), use (... = x + 1; return x;)
+#   line, column of the token
+#   stmt  : statement id, counted in ';'-terminated statements from 0;
+#           the condition of an if is a statement of its own
+#
+# References are stored column-wise in typed arrays (like TokenArray): 17
+# bytes per reference, plus 4 in each of the two posting lists that make
+# lookups direct instead of a scan over the token stream:
+#   by_name : name id → array of reference rows
+#   by_stmt : statement id → array of reference rows
+# Recording a reference only appends a tuple to a pending list; the first
+# query after a change moves the pending references into the columns (one
+# bulk extend per column) and adds them to the posting lists.
+#
+# The index is written next to the symbol table as xref.json.
+
+import json
+from array import array
+
+KINDS = ["decl", "def", "use"]
+DECL, DEF, USE = range(len(KINDS))
+KIND_IDS = {kind: n for n, kind in enumerate(KINDS)}
+
+
+class NameIds(dict):
+    """name → name id; looking up a new name gives it the next id."""
+
+    def __init__(self, names):
+        super().__init__()
+        self.names = names          # name id → name, shared with the index
+
+    def __missing__(self, name):
+        name_id = self[name] = len(self.names)
+        self.names.append(name)
+        return name_id
+
+
+class XrefIndex:
+    def __init__(self):
+        self.names = []                     # name id → name
+        self.name_ids = NameIds(self.names) # name → name id
+
+        # One entry per reference
+        self.name_col = array("I")
+        self.kinds = array("B")
+        self.lines = array("I")
+        self.cols = array("I")
+        self.stmts = array("I")
+
+        self.pending = []           # (name, kind, line, col, stmt) not yet in the columns
+
+        self.by_name = {}           # name id → array("I") of rows
+        self.by_stmt = {}           # statement id → array("I") of rows
+        self.indexed = 0            # rows already in the posting lists
+
+    # -----------------------
+    # Building
+    # -----------------------
+    def add(self, name, kind, line, col, stmt):
+        """Record one reference; kind is "decl", "def" or "use"."""
+        self.pending.append((name, kind, line, col, stmt))
+
+    def add_tokens(self, tokens, start, stop, kind, stmt):
+        """Record every IDENTIFIER in tokens[start:stop] ((type, value, line, col) tuples)."""
+        self.pending += [
+            (name, kind, line, col, stmt)
+            for tok_type, name, line, col in tokens[start:stop] if tok_type == "IDENTIFIER"
+        ]
+
+    def flush(self):
+        # Move the pending references into the columns
+        if not self.pending:
+            return
+        names, kinds, lines, cols, stmts = zip(*self.pending)
+        self.pending = []
+        self.name_col.extend(map(self.name_ids.__getitem__, names))
+        self.kinds.extend(map(KIND_IDS.__getitem__, kinds))
+        self.lines.extend(lines)
+        self.cols.extend(cols)
+        self.stmts.extend(stmts)
+
+    def update_postings(self):
+        # Add the rows recorded since the last query to the posting lists
+        self.flush()
+        by_name, by_stmt = self.by_name, self.by_stmt
+        for row in range(self.indexed, len(self.kinds)):
+            name_id, stmt = self.name_col[row], self.stmts[row]
+            rows = by_name.get(name_id)
+            if rows is None:
+                rows = by_name[name_id] = array("I")
+            rows.append(row)
+            rows = by_stmt.get(stmt)
+            if rows is None:
+                rows = by_stmt[stmt] = array("I")
+            rows.append(row)
+        self.indexed = len(self.kinds)
+
+    def rows_of_name(self, name_id):
+        if self.pending or self.indexed != len(self.kinds):
+            self.update_postings()
+        return self.by_name.get(name_id, ())
+
+    def rows_of_statement(self, stmt):
+        if self.pending or self.indexed != len(self.kinds):
+            self.update_postings()
+        return self.by_stmt.get(stmt, ())
+
+    def __len__(self):
+        return len(self.kinds) + len(self.pending)
+
+    # -----------------------
+    # Queries
+    # -----------------------
+    def row(self, r):
+        return (
+            self.names[self.name_col[r]], KINDS[self.kinds[r]],
+            self.lines[r], self.cols[r], self.stmts[r],
+        )
+
+    def references(self, name, kind=None):
+        """
+        Every reference to name, in source order, optionally only one kind.
+        Returns a list of (name, kind, line, col, stmt).
+        """
+        self.flush()
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            return []
+        wanted = None if kind is None else KIND_IDS[kind]
+        return [
+            self.row(r) for r in self.rows_of_name(name_id)
+            if wanted is None or self.kinds[r] == wanted
+        ]
+
+    def declaration(self, name):
+        refs = self.references(name, "decl")
+        return refs[0] if refs else None
+
+    def definitions(self, name):
+        return self.references(name, "def")
+
+    def uses(self, name):
+        return self.references(name, "use")
+
+    def statement(self, stmt):
+        """Every reference in one statement, as (name, kind, line, col, stmt)."""
+        return [self.row(r) for r in self.rows_of_statement(stmt)]
+
+    def defines(self, stmt):
+        """Names a statement assigns (or declares)."""
+        return sorted({
+            self.names[self.name_col[r]] for r in self.rows_of_statement(stmt)
+            if self.kinds[r] != USE
+        })
+
+    def depends_on(self, stmt):
+        """Names a statement reads."""
+        return sorted({
+            self.names[self.name_col[r]] for r in self.rows_of_statement(stmt)
+            if self.kinds[r] == USE
+        })
+
+    def unused(self):
+        """Names that are never read."""
+        self.flush()
+        return [
+            name for name_id, name in enumerate(self.names)
+            if not any(self.kinds[r] == USE for r in self.rows_of_name(name_id))
+        ]
+
+    # -----------------------
+    # Serialisation
+    # -----------------------
+    def to_dict(self):
+        # Column-wise, the same layout as in memory
+        self.flush()
+        return {
+            "kinds": KINDS,
+            "names": self.names,
+            "name": self.name_col.tolist(),
+            "kind": self.kinds.tolist(),
+            "line": self.lines.tolist(),
+            "col": self.cols.tolist(),
+            "stmt": self.stmts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        kinds = data["kinds"]
+        for name_id, kind, line, col, stmt in zip(
+            data["name"], data["kind"], data["line"], data["col"], data["stmt"]
+        ):
+            index.add(data["names"][name_id], kinds[kind], line, col, stmt)
+        return index
+
+    def write(self, filename="xref.json"):
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def read(cls, filename="xref.json"):
+        with open(filename, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+# Optional test to demonstrate functionality
+if __name__ == "__main__":
+    # int x = 5;  int y = x + 1;  x = y * x;  return x;
+    index = XrefIndex()
+    index.add("x", "decl", 1, 5, 0)
+    index.add("x", "def", 1, 5, 0)
+    index.add("y", "decl", 2, 5, 1)
+    index.add("y", "def", 2, 5, 1)
+    index.add("x", "use", 2, 9, 1)
+    index.add("x", "def", 3, 1, 2)
+    index.add("y", "use", 3, 5, 2)
+    index.add("x", "use", 3, 9, 2)
+    index.add("x", "use", 4, 8, 3)
+    print("uses of x:", index.uses("x"))
+    print("definitions of x:", index.definitions("x"))
+    print("statement 2 defines", index.defines(2), "and depends on", index.depends_on(2))
+    print("round trip:", XrefIndex.from_dict(index.to_dict()).references("y") == index.references("y"))